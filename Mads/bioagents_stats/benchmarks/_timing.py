@@ -0,0 +1,75 @@
+"""
+The helpers shared by the benchmark scripts: timing a benchmark, the commit of the working tree and writing the
+JSON report.
+"""
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+
+def run(benchmark: str, size: Optional[int], mode: str, repeat: int, function: Callable[[], object]) -> dict:
+    """
+    Run a benchmark.
+
+    The times are the best of the repeated runs, and the peak memory (of the Python allocations) is measured in a
+    separate run, as tracing the allocations slows the run down.
+
+    :param benchmark: The name of the benchmark.
+    :param size: The number of agents, or None.
+    :param mode: The mode of the benchmark, e.g. 'memory' or 'stream'.
+    :param repeat: The number of timed runs.
+    :param function: The function to benchmark.
+    :return: The best wall and CPU time in seconds and the peak memory in bytes.
+    """
+    wall_seconds: float = float("inf")
+    cpu_seconds: float = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        function()
+        wall_seconds = min(wall_seconds, time.perf_counter() - wall_start)
+        cpu_seconds = min(cpu_seconds, time.process_time() - cpu_start)
+
+    gc.collect()
+    tracemalloc.start()
+    function()
+    peak_bytes: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result: dict = {"benchmark": benchmark, "size": size, "mode": mode, "wall_seconds": round(wall_seconds, 4),
+                    "cpu_seconds": round(cpu_seconds, 4), "peak_bytes": peak_bytes}
+    print(f"{benchmark:32} {size or '':>8} {mode:8} {wall_seconds:9.3f} s {peak_bytes / 2 ** 20:9.1f} MiB",
+          file=sys.stderr)
+    return result
+
+
+def get_commit() -> Optional[str]:
+    """
+    Get the commit of the working tree.
+
+    :return: The commit hash, or None outside of a git repository.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(report: dict, output: Optional[str]) -> None:
+    """
+    Write the JSON report of a benchmark script.
+
+    :param report: The report.
+    :param output: The path to the JSON file, or None to print the report.
+    """
+    if output:
+        with open(output, "w", encoding="utf8") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
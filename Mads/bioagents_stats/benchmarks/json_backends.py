@@ -0,0 +1,133 @@
+"""
+Benchmark the JSON backends on the synthetic and the real bio.agents dumps: the wall time, CPU time and peak memory
+of reading all the agents.
+
+Usage: python json_backends.py [--sizes 20000 200000] [--seed N] [--repeat N] [--data-dir DIR]
+    [--dumps ../../RScriptVeit/bio.agentsFullDump.json] [--output results.json]
+
+Each installed backend (see the json_backend module) reads the dumps with load_agents, with and without pausing the
+garbage collector, and the streaming iter_agents and the plain json.load of the JSON array are measured as the
+baselines. The synthetic dumps are written once to the
+data directory, as a JSON array and as NDJSON. The given real dumps which are not JSON (e.g. Git LFS pointers) are
+skipped.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from typing import List
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bioagents_statistics import get_json_backend, iter_agents, load_agents, set_json_backend
+from bioagents_statistics._utilities import get_cache_directory
+from bioagents_statistics.json_backend import available_json_backends, pause_gc
+from bioagents_statistics.synthetic import generate_agents
+from _timing import get_commit, run, write_report
+
+DEFAULT_DUMPS: List[str] = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "RScriptVeit",
+                                         "bio.agentsFullDump.json")]
+
+
+def main():
+    """
+    The main entry point of the script.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the JSON backends on the bio.agents dumps.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 200000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="The number of timed runs of each benchmark.")
+    parser.add_argument("--data-dir", default=os.path.join(get_cache_directory(), "synthetic"),
+                        help="The directory for the synthetic dumps.")
+    parser.add_argument("--dumps", nargs="*", default=DEFAULT_DUMPS, help="The real dumps.")
+    parser.add_argument("--output", default=None, help="The JSON file for the results. Default: print them.")
+    args = parser.parse_args()
+
+    dumps: List[str] = []
+    os.makedirs(args.data_dir, exist_ok=True)
+    for size in args.sizes:
+        array_path: str = os.path.join(args.data_dir, f"synthetic_{size}_{args.seed}.json")
+        ndjson_path: str = os.path.join(args.data_dir, f"synthetic_{size}_{args.seed}.ndjson")
+        if not os.path.exists(array_path) or not os.path.exists(ndjson_path):
+            print(f"Generating {size} agents to {array_path} and {ndjson_path}", file=sys.stderr)
+            with open(f"{array_path}.tmp", "w", encoding="utf8") as array_file, \
+                    open(f"{ndjson_path}.tmp", "w", encoding="utf8") as ndjson_file:
+                array_file.write("[")
+                for number, agent in enumerate(generate_agents(count=size, seed=args.seed)):
+                    content: str = json.dumps(agent, ensure_ascii=False)
+                    array_file.write((", " if number else "") + content)
+                    ndjson_file.write(content + "\n")
+                array_file.write("]")
+            os.replace(f"{array_path}.tmp", array_path)
+            os.replace(f"{ndjson_path}.tmp", ndjson_path)
+        dumps.extend([array_path, ndjson_path])
+    for path in args.dumps:
+        if _is_json_dump(path):
+            dumps.append(path)
+        else:
+            print(f"Skipping {path}, which is not a JSON dump", file=sys.stderr)
+
+    results: List[dict] = []
+    default_backend: str = get_json_backend()
+    for path in dumps:
+        name: str = os.path.basename(path)
+        for backend in available_json_backends():
+            set_json_backend(backend)
+            results.append(run(benchmark=f"load_agents {name}", size=None, mode=backend, repeat=args.repeat,
+                               function=lambda: load_agents(path)))
+            results.append(run(benchmark=f"load_agents {name}", size=None, mode=f"{backend}+nogc",
+                               repeat=args.repeat, function=lambda: _load_agents_paused(path)))
+        set_json_backend(default_backend)
+        results.append(run(benchmark=f"iter_agents {name}", size=None, mode=default_backend, repeat=args.repeat,
+                           function=lambda: list(iter_agents(path))))
+        if not path.endswith(".ndjson"):
+            results.append(run(benchmark=f"json.load {name}", size=None, mode="json", repeat=args.repeat,
+                               function=lambda: _json_load(path)))
+
+    report: dict = {"commit": get_commit(), "date": datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(), "platform": platform.platform(),
+                    "backends": available_json_backends(), "seed": args.seed, "repeat": args.repeat,
+                    "results": results}
+    write_report(report=report, output=args.output)
+
+
+def _load_agents_paused(path: str) -> list:
+    """
+    Read a dump with load_agents, with the garbage collector paused as a script can do.
+
+    :param path: The path to the dump.
+    :return: The agents.
+    """
+    with pause_gc():
+        return load_agents(path)
+
+
+def _json_load(path: str) -> list:
+    """
+    Read a JSON array dump with the json module, as the scripts did before the JSON backends.
+
+    :param path: The path to the dump.
+    :return: The agents.
+    """
+    with open(path, "r", encoding="utf8") as f:
+        return json.load(f)
+
+
+def _is_json_dump(path: str) -> bool:
+    """
+    Check whether a dump exists and is JSON, and not e.g. a Git LFS pointer.
+
+    :param path: The path to the dump.
+    :return: True for a JSON dump.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read(64).lstrip()[:1] in (b"[", b"{")
+    except OSError:
+        return False
+
+
+if __name__ == "__main__":
+    main()
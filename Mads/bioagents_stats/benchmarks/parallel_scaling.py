@@ -0,0 +1,91 @@
+"""
+Benchmark of the parallel statistics: the run time for an increasing number of worker processes.
+
+Usage: python parallel_scaling.py <dump> [--workers 1 2 4 8 16 32] [--repeat N] [--shard-size N]
+    [--edam-owl ../../../JavaVedran/bioagentsAnnotations/res/edam.owl] [--output results.json]
+
+The dump is loaded once, and repeated N times to simulate a larger registry. The statistics of every run are checked
+to be identical to the serial statistics. The results are written as JSON, as by the statistics suite.
+
+The results of a run on 20000 synthetic agents (see the synthetic module, seed 0) with the EDAM statistics are in
+results/parallel_scaling.json. That machine has a single CPU, so the curve shows the overhead of the worker processes
+(the 1 worker run is in the calling process) rather than the speedup; the speedup needs a run on a machine with more
+CPUs.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bioagents_statistics import (calculate_all_edam_term_statistics, calculate_all_edam_term_statistics_parallel,
+                                  calculate_general_statistics, calculate_general_statistics_parallel, load_agents,
+                                  load_edam_index)
+from _timing import get_commit, write_report
+
+
+def main():
+    """
+    The main entry point of the script.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the parallel statistics.")
+    parser.add_argument("dump", help="The bio.agents dump (JSON array, optionally gzip compressed).")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat the agents to simulate a larger registry.")
+    parser.add_argument("--shard-size", type=int, default=2000)
+    parser.add_argument("--edam-owl", default=None, help="Also benchmark the EDAM statistics with the ontology.")
+    parser.add_argument("--output", default=None, help="The JSON file for the results. Default: print them.")
+    args = parser.parse_args()
+
+    agents = load_agents(args.dump) * args.repeat
+    upper_time_limit = datetime.today()
+    index_lists = load_edam_index(owl_path=args.edam_owl) if args.edam_owl else None
+    print(f"{len(agents)} agents, {os.cpu_count()} CPUs", file=sys.stderr)
+
+    # Warm up the caches (e.g. the SPDX license list and the EDAM term indexes)
+    calculate_general_statistics(agents=agents[:1], upper_time_limit=upper_time_limit)
+    if index_lists:
+        calculate_all_edam_term_statistics(agents=agents[:1], index_lists=index_lists,
+                                           upper_time_limit=upper_time_limit)
+
+    start = time.perf_counter()
+    general = json.dumps(calculate_general_statistics(agents=agents, upper_time_limit=upper_time_limit))
+    if index_lists:
+        edam = json.dumps(calculate_all_edam_term_statistics(agents=agents, index_lists=index_lists,
+                                                             upper_time_limit=upper_time_limit))
+    serial = time.perf_counter() - start
+    results: List[dict] = [{"benchmark": "parallel_scaling", "size": len(agents), "mode": "serial", "workers": None,
+                            "wall_seconds": round(serial, 4), "speedup": 1.0}]
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}", file=sys.stderr)
+    print(f"{'serial':>8} {serial:9.2f} {1:8.2f}", file=sys.stderr)
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        result = json.dumps(calculate_general_statistics_parallel(agents=agents, upper_time_limit=upper_time_limit,
+                                                                  workers=workers, shard_size=args.shard_size))
+        assert result == general, "The parallel general statistics differ from the serial statistics."
+        if index_lists:
+            result = json.dumps(calculate_all_edam_term_statistics_parallel(
+                agents=agents, index_lists=index_lists, upper_time_limit=upper_time_limit, workers=workers,
+                shard_size=args.shard_size))
+            assert result == edam, "The parallel EDAM statistics differ from the serial statistics."
+        seconds = time.perf_counter() - start
+        results.append({"benchmark": "parallel_scaling", "size": len(agents), "mode": "parallel", "workers": workers,
+                        "wall_seconds": round(seconds, 4), "speedup": round(serial / seconds, 4)})
+        print(f"{workers:>8} {seconds:9.2f} {serial / seconds:8.2f}", file=sys.stderr)
+
+    report: dict = {"commit": get_commit(), "date": datetime.now().isoformat(timespec="seconds"),
+                    "dump": os.path.basename(args.dump),
+                    "python": platform.python_version(), "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(), "repeat": args.repeat, "shard_size": args.shard_size,
+                    "edam": bool(index_lists), "results": results}
+    write_report(report=report, output=args.output)
+
+
+if __name__ == "__main__":
+    main()
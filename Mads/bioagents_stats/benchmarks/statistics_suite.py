@@ -0,0 +1,138 @@
+"""
+Benchmark suite of the statistics on synthetic registries of increasing size: the wall time, CPU time and peak memory.
+
+Usage: python statistics_suite.py [--sizes 20000 200000 2000000] [--seed N] [--repeat N]
+    [--edam-owl ../../../JavaVedran/bioagentsAnnotations/res/edam.owl] [--data-dir DIR]
+    [--in-memory-limit N] [--output results.json] [--compare baseline.json] [--threshold 0.1]
+
+The synthetic dumps are generated once (see the synthetic module) and kept in the data directory. Registries up to
+the in-memory limit are loaded into a list before the benchmarks; larger registries are streamed from the dump, so
+their times include reading the dump, and the benchmarks which hold all the agents are skipped for them. The times
+are the best of the repeated runs, and the peak memory (of the Python allocations) is measured in a separate run, as
+tracing the allocations slows the run down. The results are written as JSON, and compared with the results of an
+earlier commit with --compare, which exits with status 1 if a benchmark got slower or bigger than the threshold.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from typing import Callable, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bioagents_statistics import (calculate_edam_term_statistics, calculate_general_statistics, iter_agents,
+                                  load_agents, load_edam_index)
+from bioagents_statistics._utilities import clean_and_filter_agent_list, get_cache_directory
+from bioagents_statistics.edam_index import _edam_indexes
+from bioagents_statistics.synthetic import write_synthetic_dump
+from _timing import get_commit, run, write_report
+
+DEFAULT_EDAM_OWL: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "JavaVedran",
+                                     "bioagentsAnnotations", "res", "edam.owl")
+
+
+def main():
+    """
+    The main entry point of the script.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the statistics on synthetic registries.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 200000, 2000000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="The number of timed runs of each benchmark.")
+    parser.add_argument("--edam-owl", default=DEFAULT_EDAM_OWL, help="The EDAM ontology.")
+    parser.add_argument("--data-dir", default=os.path.join(get_cache_directory(), "synthetic"),
+                        help="The directory for the synthetic dumps.")
+    parser.add_argument("--in-memory-limit", type=int, default=200000,
+                        help="The largest registry loaded into memory; larger registries are streamed.")
+    parser.add_argument("--output", default=None, help="The JSON file for the results. Default: print them.")
+    parser.add_argument("--compare", default=None, help="The JSON results of an earlier run to compare with.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="The relative increase of the time or memory reported as a regression.")
+    args = parser.parse_args()
+
+    results: List[dict] = []
+    upper_time_limit = datetime.today()
+
+    # The EDAM index, built from the ontology, loaded from the cache on disk and from the in-process cache
+    results.append(run(benchmark="load_edam_index", size=None, mode="uncached", repeat=args.repeat,
+                       function=lambda: load_edam_index(owl_path=args.edam_owl, use_cache=False)))
+    load_edam_index(owl_path=args.edam_owl)
+    results.append(run(benchmark="load_edam_index", size=None, mode="disk", repeat=args.repeat,
+                       function=lambda: (_edam_indexes.clear(), load_edam_index(owl_path=args.edam_owl))))
+    results.append(run(benchmark="load_edam_index", size=None, mode="cached", repeat=args.repeat,
+                       function=lambda: load_edam_index(owl_path=args.edam_owl)))
+    index_lists = load_edam_index(owl_path=args.edam_owl)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    for size in args.sizes:
+        dump_path: str = os.path.join(args.data_dir, f"synthetic_{size}_{args.seed}.ndjson.gz")
+        if not os.path.exists(dump_path):
+            print(f"Generating {size} agents to {dump_path}", file=sys.stderr)
+            write_synthetic_dump(path=f"{dump_path}.tmp.gz", count=size, seed=args.seed, index_lists=index_lists)
+            os.replace(f"{dump_path}.tmp.gz", dump_path)
+
+        if size <= args.in_memory_limit:
+            mode: str = "memory"
+            agent_list: list = load_agents(dump_path)
+            agents: Callable[[], list] = lambda: agent_list
+        else:
+            mode = "stream"
+            agent_list = []
+            agents = lambda: iter_agents(dump_path)
+
+        if mode == "memory":
+            results.append(run(benchmark="clean_and_filter_agent_list", size=size, mode=mode, repeat=args.repeat,
+                               function=lambda: clean_and_filter_agent_list(raw_agents=agents(),
+                                                                            upper_time_limit=upper_time_limit)))
+        results.append(run(benchmark="calculate_general_statistics", size=size, mode=mode, repeat=args.repeat,
+                           function=lambda: calculate_general_statistics(agents=agents(),
+                                                                         upper_time_limit=upper_time_limit)))
+        results.append(run(benchmark="calculate_edam_term_statistics", size=size, mode=mode, repeat=args.repeat,
+                           function=lambda: calculate_edam_term_statistics(agents=agents(), term_type="topic",
+                                                                           index_list=index_lists["topic"],
+                                                                           upper_time_limit=upper_time_limit)))
+        del agent_list, agents
+        gc.collect()
+
+    report: dict = {"commit": get_commit(), "date": datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(), "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(), "seed": args.seed, "repeat": args.repeat, "results": results}
+    write_report(report=report, output=args.output)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf8") as f:
+            baseline: dict = json.load(f)
+        if _compare(baseline=baseline, report=report, threshold=args.threshold):
+            sys.exit(1)
+
+
+def _compare(baseline: dict, report: dict, threshold: float) -> bool:
+    """
+    Compare the results with the results of an earlier run.
+
+    :param baseline: The earlier results.
+    :param report: The results.
+    :param threshold: The relative increase reported as a regression.
+    :return: True if any benchmark regressed.
+    """
+    earlier: dict = {(result["benchmark"], result["size"], result["mode"]): result for result in baseline["results"]}
+    regressed: bool = False
+    print(f"Compared with {baseline.get('commit')} ({baseline.get('date')}):")
+    for result in report["results"]:
+        before: Optional[dict] = earlier.get((result["benchmark"], result["size"], result["mode"]))
+        if before is None:
+            continue
+        time_ratio: float = result["wall_seconds"] / before["wall_seconds"] if before["wall_seconds"] else 1.0
+        memory_ratio: float = result["peak_bytes"] / before["peak_bytes"] if before["peak_bytes"] else 1.0
+        regression: bool = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        regressed = regressed or regression
+        print(f"{result['benchmark']:32} {result['size'] or '':>8} {result['mode']:8} time x{time_ratio:5.2f} "
+              f"memory x{memory_ratio:5.2f}{'  REGRESSION' if regression else ''}")
+    return regressed
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,41 @@
 """
 The bioagents_statistics package is a package for calculating different bio.agents statistics.
 """
-from .stats import calculate_general_statistics
+from .stats import calculate_general_statistics, calculate_grouped_general_statistics, LazyGeneralStatistics
 
-from .edam_stats import calculate_edam_term_statistics
+from .edam_stats import calculate_edam_term_statistics, calculate_all_edam_term_statistics
+
+from .reader import iter_agents, load_agents
+
+from .agent_view import AgentView
+
+from .agent_index import AgentIndex
+
+from .time_stats import calculate_statistics_over_time, iter_statistics_over_time
+
+from .edam_index import load_edam_index, EdamTermIndex
+
+from .columnar import agents_to_table, write_agents_parquet, read_agents_parquet
+
+from .compact import CompactAgent, compact_agents
+
+from .facet_index import FacetIndex
+
+from .parallel import calculate_general_statistics_parallel, calculate_all_edam_term_statistics_parallel
+
+from .downloader import download_registry
+
+from .sync import SnapshotStore, sync_registry
+
+from .incremental import IncrementalStatistics
+
+from .snapshot_archive import SnapshotArchive
+
+from .instrumentation import Instrumentation, logging_callback
+
+from .vocabularies import load_vocabularies, Vocabulary
+
+from .json_backend import get_json_backend, set_json_backend
+
+from .term_statistics_file import (TermStatisticsReader, TermStatisticsWriter, write_edam_term_statistics,
+                                   write_term_statistics)
@@ -0,0 +1,418 @@
+"""
+The accumulator engine used for calculating statistics in a single pass over the agents.
+
+Every statistic is an accumulator, which is fed one agent at a time and afterwards reports its part of the
+statistics dictionary. The engine visits each agent once and feeds it to all the registered accumulators.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .instrumentation import accumulate_instrumented, get_active_instrumentation, stage
+from .vocabularies import Vocabulary
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the codes are counted in Python without it
+    np = None
+
+# The statistics key for the values outside of the vocabularies, by the types key of the facet
+UNRECOGNISED_KEY: str = "unrecognisedValues"
+
+
+class Accumulator:
+    """
+    The base class for the accumulators.
+    """
+    # The statistics keys of the result and the agent field, declared on the accumulator classes (or factories) so the
+    # accumulators can be selected without creating them; None if unknown
+    statistics_keys: Optional[Tuple[str, ...]] = None
+    field: Optional[str] = None
+
+    def add(self, agent: dict) -> None:
+        """
+        Add an agent to the accumulator.
+
+        :param agent: The (cleaned) agent.
+        """
+        raise NotImplementedError
+
+    def remove(self, agent: dict) -> None:
+        """
+        Remove an agent which was added to the accumulator, e.g. when the agent is updated or deleted in the registry.
+
+        :param agent: The (cleaned) agent, as it was added.
+        """
+        raise NotImplementedError
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Get the statistics of the accumulator.
+
+        :return: The ordered dictionary with the statistics fields of the accumulator.
+        """
+        raise NotImplementedError
+
+    def merge(self, other: "Accumulator") -> None:
+        """
+        Merge the state of an accumulator of the same kind, which was fed the agents following the agents of this
+        accumulator, e.g. the next shard of the agents.
+
+        :param other: The other accumulator.
+        """
+        raise NotImplementedError
+
+    def partial(self) -> Any:
+        """
+        Get the compact, picklable state of the accumulator (e.g. the counts, row sets and IDs), which is sent back
+        from a worker process instead of the accumulator with its shared data (e.g. the term indexes).
+
+        :return: The partial result. Default: The accumulator itself.
+        """
+        return self
+
+    def merge_partial(self, partial: Any) -> None:
+        """
+        Merge the partial result (see partial) of an accumulator of the same kind, which was fed the agents following
+        the agents of this accumulator.
+
+        :param partial: The partial result.
+        """
+        self.merge(partial)
+
+
+class AgentCountAccumulator(Accumulator):
+    """
+    Count the number of agents.
+    """
+    statistics_keys: Tuple[str, ...] = ("agentCount",)
+
+    def __init__(self, key: str = "agentCount"):
+        self.key = key
+        self.count = 0
+
+    def add(self, agent: dict) -> None:
+        self.count += 1
+
+    def remove(self, agent: dict) -> None:
+        self.count -= 1
+
+    def result(self) -> Dict[str, Any]:
+        return {self.key: self.count}
+
+    def merge(self, other: "AgentCountAccumulator") -> None:
+        self.merge_partial(other.partial())
+
+    def partial(self) -> int:
+        return self.count
+
+    def merge_partial(self, partial: int) -> None:
+        self.count += partial
+
+
+class FacetAccumulator(Accumulator):
+    """
+    Accumulate the statistics for a single agent field (facet).
+
+    The facet reports the number of agents having the field, optionally the total number of entries in the field
+    and optionally the number of occurrences of each value in a controlled vocabulary. The values are counted by their
+    integer codes: the codes of the vocabulary, followed by the codes given to the values outside of the vocabulary,
+    which are reported under UNRECOGNISED_KEY. Arrays of codes (e.g. of a columnar table) are counted with a bincount.
+    """
+
+    def __init__(self, field: str, has_key: str, count_key: Optional[str] = None, types_key: Optional[str] = None,
+                 vocabulary: Optional[Union[Vocabulary, List[str]]] = None,
+                 values: Optional[Callable[[Any], Iterable[str]]] = None):
+        """
+        Create the facet accumulator.
+
+        :param field: The agent field.
+        :param has_key: The statistics key for the number of agents having the field.
+        :param count_key: The statistics key for the total number of entries in the field. Default: None.
+        :param types_key: The statistics key for the vocabulary counts. Default: None.
+        :param vocabulary: The controlled vocabulary for the field values (see the vocabularies module), or the list
+            of its terms. Required if types_key is given.
+        :param values: Function extracting the vocabulary values from the field value. Default: The field value is
+            a list of values.
+        """
+        self.field = field
+        self.has_key = has_key
+        self.count_key = count_key
+        self.types_key = types_key
+        self.vocabulary = (vocabulary if vocabulary is None or isinstance(vocabulary, Vocabulary)
+                           else Vocabulary(name=field, terms=list(vocabulary)))
+        self.values = values if values is not None else each_value
+
+        self.has_count = 0
+        self.entry_count = 0
+        # The codes of the values: the codes of the vocabulary, followed by the unrecognised values
+        self.value_codes: Dict[str, int] = dict(self.vocabulary.codes) if types_key is not None else {}
+        self.code_values: List[str] = list(self.vocabulary.terms) if types_key is not None else []
+        self.counts: List[int] = [0] * len(self.code_values)
+
+    def add(self, agent: dict) -> None:
+        if self.field not in agent:
+            return
+        value = agent[self.field]
+
+        self.has_count += 1
+        if self.count_key is not None:
+            self.entry_count += len(value)
+        if self.types_key is not None:
+            counts, value_codes = self.counts, self.value_codes
+            for value_type in self.values(value):
+                try:
+                    counts[value_codes[value_type]] += 1
+                except KeyError:
+                    counts[self._add_unrecognised(value_type)] += 1
+
+    def remove(self, agent: dict) -> None:
+        if self.field not in agent:
+            return
+        value = agent[self.field]
+
+        self.has_count -= 1
+        if self.count_key is not None:
+            self.entry_count -= len(value)
+        if self.types_key is not None:
+            counts, value_codes = self.counts, self.value_codes
+            for value_type in self.values(value):
+                counts[value_codes[value_type]] -= 1
+
+    @property
+    def type_counts(self) -> Dict[str, int]:
+        """
+        The number of occurrences of each value of the vocabulary.
+        """
+        return dict(zip(self.vocabulary.terms, self.counts))
+
+    @property
+    def unrecognised_counts(self) -> Dict[str, int]:
+        """
+        The number of occurrences of each value outside of the vocabulary, in the order they were first seen.
+        """
+        size: int = len(self.vocabulary)
+        return {value: count for value, count in zip(self.code_values[size:], self.counts[size:]) if count}
+
+    def encode(self, values: Iterable[str]) -> List[int]:
+        """
+        Get the codes of values, adding codes for the values outside of the vocabulary.
+
+        :param values: The values.
+        :return: The codes.
+        """
+        value_codes: Dict[str, int] = self.value_codes
+        return [value_codes[value] if value in value_codes else self._add_unrecognised(value) for value in values]
+
+    def add_codes(self, codes: Any) -> None:
+        """
+        Count an array of value codes (see encode) with a bincount.
+
+        :param codes: The codes, e.g. a NumPy array or a list.
+        """
+        counts: List[int] = self.counts
+        for code, count in enumerate(_bincount(codes=codes, size=len(counts))):
+            counts[code] += count
+
+    def add_value_counts(self, value_counts: Dict[str, int]) -> None:
+        """
+        Add the number of occurrences of values.
+
+        :param value_counts: The number of occurrences of each value.
+        """
+        for code, count in zip(self.encode(value_counts), value_counts.values()):
+            self.counts[code] += count
+
+    def result(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {self.has_key: self.has_count}
+        if self.count_key is not None:
+            stats[self.count_key] = self.entry_count
+        if self.types_key is not None:
+            stats[self.types_key] = self.type_counts
+            unrecognised: Dict[str, int] = self.unrecognised_counts
+            if unrecognised:
+                stats[UNRECOGNISED_KEY] = {self.types_key: unrecognised}
+        return stats
+
+    def merge(self, other: "FacetAccumulator") -> None:
+        self.merge_partial(other.partial())
+
+    def partial(self) -> Tuple[int, int, Dict[str, int]]:
+        # The occurring values with their counts, in the order of their codes
+        return (self.has_count, self.entry_count,
+                {value: count for value, count in zip(self.code_values, self.counts) if count})
+
+    def merge_partial(self, partial: Tuple[int, int, Dict[str, int]]) -> None:
+        has_count, entry_count, value_counts = partial
+        self.has_count += has_count
+        self.entry_count += entry_count
+        if self.types_key is not None:
+            self.add_value_counts(value_counts)
+
+    def _add_unrecognised(self, value: str) -> int:
+        """
+        Add a code for a value outside of the vocabulary.
+
+        :param value: The value.
+        :return: The code.
+        """
+        code: int = len(self.code_values)
+        self.value_codes[value] = code
+        self.code_values.append(value)
+        self.counts.append(0)
+        return code
+
+
+def _bincount(codes: Any, size: int) -> List[int]:
+    """
+    Count the occurrences of each code.
+
+    :param codes: The codes.
+    :param size: The number of codes.
+    :return: The number of occurrences of each code.
+    """
+    if np is not None:
+        return np.bincount(np.asarray(codes, dtype=np.intp), minlength=size).tolist()
+    counts: List[int] = [0] * size
+    for code in codes:
+        counts[code] += 1
+    return counts
+
+
+def each_value(value: list) -> list:
+    """
+    Get the values of a field holding a list of values.
+
+    :param value: The field value.
+    :return: The values.
+    """
+    return value
+
+
+def single_value(value: str) -> tuple:
+    """
+    Get the value of a field holding a single value.
+
+    :param value: The field value.
+    :return: The values.
+    """
+    return value,
+
+
+def nested_values(key: str) -> Callable[[list], Iterable[str]]:
+    """
+    Create a function getting the values of a field holding a list of entries, each with a list of values.
+
+    :param key: The key of the values in each entry.
+    :return: The function extracting the values.
+    """
+    return _NestedValues(key)
+
+
+def nested_single_values(key: str) -> Callable[[list], Iterable[str]]:
+    """
+    Create a function getting the values of a field holding a list of entries, each with a single value.
+
+    :param key: The key of the value in each entry.
+    :return: The function extracting the values.
+    """
+    return _NestedSingleValues(key)
+
+
+class _NestedValues:
+    """
+    Get the values of a field holding a list of entries, each with a list of values under the key.
+
+    A class instead of a closure, so the accumulators can be pickled.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def __call__(self, entries: list) -> Iterable[str]:
+        key: str = self.key
+        for entry in entries:
+            if key in entry:
+                yield from entry[key]
+
+
+class _NestedSingleValues:
+    """
+    Get the values of a field holding a list of entries, each with a single value under the key.
+
+    A class instead of a closure, so the accumulators can be pickled.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def __call__(self, entries: list) -> Iterable[str]:
+        key: str = self.key
+        for entry in entries:
+            yield entry[key]
+
+
+def accumulate(agents: Iterable[dict], accumulators: List[Accumulator]) -> List[Accumulator]:
+    """
+    Feed each of the agents to all the accumulators in a single pass.
+
+    :param agents: The (cleaned) agents.
+    :param accumulators: The accumulators.
+    :return: The accumulators.
+    """
+    instrumentation = get_active_instrumentation()
+    if instrumentation is not None:
+        return accumulate_instrumented(instrumentation=instrumentation, agents=agents, accumulators=accumulators)
+
+    adders = [accumulator.add for accumulator in accumulators]
+    for agent in agents:
+        for add in adders:
+            add(agent)
+    return accumulators
+
+
+def merge_accumulators(accumulators: List[Accumulator], others: List[Accumulator]) -> List[Accumulator]:
+    """
+    Merge the accumulators fed the following agents into the accumulators, pairwise.
+
+    :param accumulators: The accumulators.
+    :param others: The accumulators of the same kinds, fed the agents following the agents of the accumulators.
+    :return: The accumulators.
+    """
+    for accumulator, other in zip(accumulators, others):
+        accumulator.merge(other)
+    return accumulators
+
+
+def merge_partials(accumulators: List[Accumulator], partials: List[Any]) -> List[Accumulator]:
+    """
+    Merge the partial results (see Accumulator.partial) of the accumulators fed the following agents into the
+    accumulators, pairwise.
+
+    :param accumulators: The accumulators.
+    :param partials: The partial results of accumulators of the same kinds, fed the agents following the agents of
+        the accumulators.
+    :return: The accumulators.
+    """
+    for accumulator, partial in zip(accumulators, partials):
+        accumulator.merge_partial(partial)
+    return accumulators
+
+
+def collect_results(accumulators: List[Accumulator], stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Collect the results of the accumulators into a single statistics dictionary.
+
+    :param accumulators: The accumulators.
+    :param stats: The dictionary to add the results to. Default: A new dictionary.
+    :return: The statistics dictionary.
+    """
+    stats = {} if stats is None else stats
+    unrecognised: Dict[str, Dict[str, int]] = {}
+    with stage("collect_results", items=len(accumulators)):
+        for accumulator in accumulators:
+            result: Dict[str, Any] = accumulator.result()
+            # The unrecognised values of all the facets are reported together, after the statistics
+            unrecognised.update(result.pop(UNRECOGNISED_KEY, {}))
+            stats.update(result)
+    if unrecognised:
+        stats[UNRECOGNISED_KEY] = unrecognised
+    return stats
@@ -0,0 +1,43 @@
+"""
+Helper methods for the timestamps of the agents.
+"""
+import datetime
+
+import dateutil
+from dateutil import parser
+import pytz
+
+
+def localize_time_limit(upper_time_limit: datetime.datetime) -> datetime.datetime:
+    """
+    Localize the upper time limit to UTC.
+
+    :param upper_time_limit: The (naive) upper time limit.
+    :return: The UTC upper time limit.
+    """
+    return pytz.utc.localize(upper_time_limit)
+
+
+def parse_timestamp(timestamp: str) -> float:
+    """
+    Parse an ISO 8601 timestamp of an agent into seconds since the epoch.
+
+    Timestamps without a time zone are taken as UTC.
+
+    :param timestamp: The timestamp, e.g. the additionDate.
+    :return: The seconds since the epoch.
+    """
+    time: datetime.datetime = dateutil.parser.isoparse(timestamp)
+    if time.tzinfo is None:
+        time = pytz.utc.localize(time)
+    return time.timestamp()
+
+
+def time_limit_epoch(upper_time_limit: datetime.datetime) -> float:
+    """
+    Get the upper time limit in seconds since the epoch.
+
+    :param upper_time_limit: The (naive) upper time limit.
+    :return: The seconds since the epoch.
+    """
+    return localize_time_limit(upper_time_limit).timestamp()
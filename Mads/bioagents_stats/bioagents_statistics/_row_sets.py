@@ -0,0 +1,332 @@
+"""
+Compact sets of agent row numbers.
+
+The agents are numbered with dense integer rows, and a RowSet holds the rows of the agents with some property, e.g.
+the agents annotated with an EDAM term. A small set is a sorted array of the rows, which is switched to a bitmap
+once the bitmap is the smaller of the two (and switched back if the bitmap grows too sparse).
+"""
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, Optional, Tuple
+
+_ROW_SIZE: int = array("I").itemsize
+# The minimum number of rows before switching to a bitmap
+_MIN_BITMAP_ROWS: int = 64
+
+
+class RowSet:
+    """
+    Set of agent rows, stored as a sorted array of the rows or as a bitmap. The number of rows is maintained, so it
+    is not counted in the bitmap.
+    """
+    __slots__ = ("_rows", "_bitmap", "_count")
+
+    def __init__(self, rows: Optional[Iterable[int]] = None):
+        """
+        Create the row set.
+
+        :param rows: The initial rows. Default: None, an empty set.
+        """
+        self._rows: Optional[array] = array("I")
+        self._bitmap: Optional[bytearray] = None
+        self._count: int = 0
+        if rows is not None:
+            for row in sorted(set(rows)):
+                self.add(row)
+
+    @classmethod
+    def from_bitmap(cls, bitmap: bytearray) -> "RowSet":
+        """
+        Create the row set from a bitmap.
+
+        :param bitmap: The bitmap, bit (row & 7) of byte (row >> 3) set for each row.
+        :return: The row set.
+        """
+        row_set = cls()
+        row_set._rows = None
+        row_set._bitmap = bitmap
+        row_set._count = int.from_bytes(bitmap, "little").bit_count()
+        row_set._compact()
+        return row_set
+
+    @classmethod
+    def from_sorted_rows(cls, rows: Iterable[int]) -> "RowSet":
+        """
+        Create the row set from rows which are already sorted and unique, without checking them.
+
+        :param rows: The sorted rows.
+        :return: The row set.
+        """
+        row_set = cls()
+        row_set._rows = array("I", rows)
+        row_set._count = len(row_set._rows)
+        row_set._compact()
+        return row_set
+
+    @classmethod
+    def range(cls, stop: int) -> "RowSet":
+        """
+        Create the row set with the rows 0, ..., stop - 1.
+
+        :param stop: The number of rows.
+        :return: The row set.
+        """
+        return cls._from_int((1 << stop) - 1)
+
+    def copy(self) -> "RowSet":
+        """
+        Copy the row set.
+
+        :return: The new row set.
+        """
+        row_set = RowSet()
+        row_set._rows = array("I", self._rows) if self._rows is not None else None
+        row_set._bitmap = bytearray(self._bitmap) if self._bitmap is not None else None
+        row_set._count = self._count
+        return row_set
+
+    @property
+    def is_bitmap(self) -> bool:
+        """
+        Indicate whether the rows are stored as a bitmap.
+        """
+        return self._bitmap is not None
+
+    def add(self, row: int) -> None:
+        """
+        Add a row. Adding the rows in increasing order is the fast path.
+
+        :param row: The row.
+        """
+        bitmap: Optional[bytearray] = self._bitmap
+        if bitmap is not None:
+            byte: int = row >> 3
+            if byte < len(bitmap):
+                if not bitmap[byte] & (1 << (row & 7)):
+                    bitmap[byte] |= 1 << (row & 7)
+                    self._count += 1
+                return
+            # Keep the bitmap unless it is twice the size of the array, so the storage does not flip back and forth
+            if 2 * self._count * _ROW_SIZE >= len(bitmap):
+                bitmap.extend(bytes(max(byte + 1 - len(bitmap), len(bitmap) >> 1)))
+                bitmap[byte] |= 1 << (row & 7)
+                self._count += 1
+                return
+            # The bitmap is too sparse, switch back to the array
+            self._rows = array("I", self)
+            self._bitmap = None
+
+        rows: array = self._rows
+        if not rows or row > rows[-1]:
+            rows.append(row)
+            self._count += 1
+            # Switch to the bitmap when it is smaller than the array
+            if len(rows) >= _MIN_BITMAP_ROWS and len(rows) * _ROW_SIZE > (row >> 3) + 1:
+                self._to_bitmap()
+        elif row != rows[-1]:
+            position: int = bisect_left(rows, row)
+            if rows[position] != row:
+                rows.insert(position, row)
+                self._count += 1
+
+    def discard(self, row: int) -> None:
+        """
+        Remove a row, if it is in the set.
+
+        :param row: The row.
+        """
+        bitmap: Optional[bytearray] = self._bitmap
+        if bitmap is not None:
+            byte: int = row >> 3
+            if 0 <= byte < len(bitmap) and bitmap[byte] & (1 << (row & 7)):
+                bitmap[byte] &= ~(1 << (row & 7)) & 0xFF
+                self._count -= 1
+                # Switch back to the array only once the bitmap is too sparse, as when adding
+                if 2 * self._count * _ROW_SIZE < len(bitmap):
+                    self._compact()
+            return
+        rows: array = self._rows
+        position: int = bisect_left(rows, row)
+        if position < len(rows) and rows[position] == row:
+            del rows[position]
+            self._count -= 1
+
+    def _to_bitmap(self) -> None:
+        """
+        Switch the storage to a bitmap.
+        """
+        rows: array = self._rows
+        bitmap = bytearray((rows[-1] >> 3) + 1)
+        for row in rows:
+            bitmap[row >> 3] |= 1 << (row & 7)
+        self._bitmap = bitmap
+        self._rows = None
+
+    def to_bitmap(self, size: int = 0) -> bytearray:
+        """
+        Get the rows as a bitmap.
+
+        :param size: The minimum size of the bitmap in bytes. Default: 0.
+        :return: The (new) bitmap.
+        """
+        if self._bitmap is not None:
+            bitmap = bytearray(self._bitmap)
+        else:
+            bitmap = bytearray((self._rows[-1] >> 3) + 1 if self._rows else 0)
+            for row in self._rows:
+                bitmap[row >> 3] |= 1 << (row & 7)
+        if len(bitmap) < size:
+            bitmap.extend(bytes(size - len(bitmap)))
+        return bitmap
+
+    def _compact(self) -> None:
+        """
+        Switch to the smaller storage.
+        """
+        if self._bitmap is not None:
+            if 2 * self._count * _ROW_SIZE < len(self._bitmap):
+                self._rows = array("I", self)
+                self._bitmap = None
+        elif len(self._rows) >= _MIN_BITMAP_ROWS and len(self._rows) * _ROW_SIZE > (self._rows[-1] >> 3) + 1:
+            self._to_bitmap()
+
+    def _to_int(self) -> int:
+        """
+        Get the rows as a (big) integer, with bit row set for each row.
+
+        :return: The integer.
+        """
+        return int.from_bytes(self._bitmap if self._bitmap is not None else self.to_bitmap(), "little")
+
+    @classmethod
+    def _from_int(cls, value: int) -> "RowSet":
+        """
+        Create the row set from a (big) integer, with bit row set for each row.
+
+        :param value: The integer.
+        :return: The row set.
+        """
+        return cls.from_bitmap(bytearray(value.to_bytes((value.bit_length() + 7) >> 3, "little")))
+
+    def __and__(self, other: "RowSet") -> "RowSet":
+        if not isinstance(other, RowSet):
+            return NotImplemented
+        if self._rows is not None and other._rows is not None:
+            return RowSet.from_sorted_rows(sorted(set(self._rows).intersection(other._rows)))
+        if self._rows is not None or other._rows is not None:
+            # Look up the rows of the array in the bitmap
+            rows, bitmap = (self, other) if self._rows is not None else (other, self)
+            return RowSet.from_sorted_rows([row for row in rows._rows if row in bitmap])
+        return RowSet._from_int(self._to_int() & other._to_int())
+
+    def __or__(self, other: "RowSet") -> "RowSet":
+        if not isinstance(other, RowSet):
+            return NotImplemented
+        if self._rows is not None and other._rows is not None:
+            return RowSet.from_sorted_rows(sorted(set(self._rows).union(other._rows)))
+        return RowSet._from_int(self._to_int() | other._to_int())
+
+    def __sub__(self, other: "RowSet") -> "RowSet":
+        if not isinstance(other, RowSet):
+            return NotImplemented
+        if self._rows is not None:
+            return RowSet.from_sorted_rows([row for row in self._rows if row not in other])
+        return RowSet._from_int(self._to_int() & ~other._to_int())
+
+    def __contains__(self, row: object) -> bool:
+        if not isinstance(row, int) or row < 0:
+            return False
+        if self._bitmap is not None:
+            byte: int = row >> 3
+            return byte < len(self._bitmap) and bool(self._bitmap[byte] & (1 << (row & 7)))
+        position: int = bisect_left(self._rows, row)
+        return position < len(self._rows) and self._rows[position] == row
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Iterate over the rows in increasing order.
+        """
+        if self._bitmap is None:
+            yield from self._rows
+            return
+        for byte_position, byte in enumerate(self._bitmap):
+            if byte:
+                row: int = byte_position << 3
+                while byte:
+                    if byte & 1:
+                        yield row
+                    byte >>= 1
+                    row += 1
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RowSet):
+            return NotImplemented
+        return self.to_bitmap().rstrip(b"\x00") == other.to_bitmap().rstrip(b"\x00")
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"RowSet({list(self)!r})"
+
+
+def encode_rows(rows: Iterable[int]) -> Tuple[bool, bytes, int]:
+    """
+    Encode rows as delta-encoded varints or as a bitmap, whichever is smaller, e.g. for storing them in a file.
+
+    :param rows: The rows, in increasing order, e.g. a RowSet.
+    :return: Whether the content is a bitmap, the content and the number of rows.
+    """
+    deltas: bytearray = bytearray()
+    count: int = 0
+    previous: int = -1
+    for row in rows:
+        delta: int = row - previous - 1
+        previous = row
+        count += 1
+        while delta >= 0x80:
+            deltas.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        deltas.append(delta)
+
+    if count and (previous >> 3) + 1 < len(deltas):
+        return True, bytes(RowSet.from_sorted_rows(iter_deltas(deltas)).to_bitmap()), count
+    return False, bytes(deltas), count
+
+
+def decode_rows(content: bytes, bitmap: bool) -> RowSet:
+    """
+    Decode rows encoded with encode_rows.
+
+    :param content: The content.
+    :param bitmap: Whether the content is a bitmap.
+    :return: The rows.
+    """
+    if bitmap:
+        return RowSet.from_bitmap(bytearray(content))
+    return RowSet.from_sorted_rows(iter_deltas(content))
+
+
+def iter_deltas(content: bytes) -> Iterator[int]:
+    """
+    Decode delta-encoded varints.
+
+    :param content: The varints of the differences between the consecutive rows, minus one.
+    :return: The generator yielding the rows.
+    """
+    row: int = -1
+    delta: int = 0
+    shift: int = 0
+    for byte in content:
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        row += delta + 1
+        yield row
+        delta = shift = 0
@@ -1,29 +1,200 @@
 """
 Utilities for the parsing the license list from SPDX.
+
+The license list is cached on disk and revalidated with SPDXs GitHub repository once the cache is older than the
+time-to-live. Without network access the (possibly stale) cache is used, and otherwise the snapshot bundled with
+the package. The parsed license data is memoised in-process, also for the time-to-live.
 """
-from dataclasses import dataclass
-from typing import List, Dict
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, FrozenSet, Optional, Tuple
 import requests
 from requests import Response
 
+from ._utilities import get_cache_directory
+from .instrumentation import stage
+from .json_backend import load_json
+
+SPDX_LICENSES_URL: str = "https://raw.githubusercontent.com/spdx/license-list-data/master/json/licenses.json"
+# The default time-to-live of the cached license list in seconds (one week)
+DEFAULT_TTL: float = 7 * 24 * 60 * 60
+
+_CACHE_FILE_NAME: str = "spdx_licenses.json"
+_BUNDLED_SNAPSHOT: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "spdx_licenses.json.gz")
+
+_licenses_data: Optional["LicensesData"] = None
+# The time the memoised license data was fetched (or last failed to be revalidated), for the time-to-live
+_licenses_fetched: float = 0.0
+_licenses_data_lock = threading.Lock()
 
-@dataclass
+
+@dataclass(frozen=True)
 class LicensesData:
     licenses: Dict[str, str]
     licenses_list: List[str]
     osi_approved_licenses: List[str]
     fsf_approved_licenses: List[str]
     deprecated_licenses: List[str]
+    # Precomputed sets for the membership tests
+    license_ids: FrozenSet[str] = field(init=False, repr=False)
+    osi_approved_set: FrozenSet[str] = field(init=False, repr=False)
+    fsf_approved_set: FrozenSet[str] = field(init=False, repr=False)
+    deprecated_set: FrozenSet[str] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "license_ids", frozenset(self.licenses_list))
+        object.__setattr__(self, "osi_approved_set", frozenset(self.osi_approved_licenses))
+        object.__setattr__(self, "fsf_approved_set", frozenset(self.fsf_approved_licenses))
+        object.__setattr__(self, "deprecated_set", frozenset(self.deprecated_licenses))
 
 
-def parse_license_list() -> LicensesData:
+def parse_license_list(ttl: float = DEFAULT_TTL, offline: bool = False, refresh: bool = False) -> LicensesData:
     """
-    Parse the licenses list from SPDXs GitHub repository
+    Parse the licenses list from SPDXs GitHub repository.
+
+    The parsed license data is memoised in-process and used again while it is younger than the time-to-live (or
+    always when offline). Use refresh=True to load the license list again anyway.
+
+    :param ttl: The time-to-live of the cached license list in seconds. Default: One week.
+    :param offline: Never access the network, use the cached license list (or the bundled snapshot). Default: False.
+    :param refresh: Load the license list again, instead of using the memoised license data. Default: False.
     :return: The license data.
     """
-    resp: Response = requests.get("https://raw.githubusercontent.com/spdx/license-list-data/master/json/licenses.json")
+    global _licenses_data, _licenses_fetched
+    with _licenses_data_lock:
+        if refresh or _licenses_data is None or not (offline or time.time() - _licenses_fetched < ttl):
+            with stage("load_license_list"):
+                license_list, fetched = _load_license_list(ttl=ttl, offline=offline)
+            with stage("parse_license_list", items=len(license_list["licenses"])):
+                _licenses_data = _parse_licenses(license_list)
+            _licenses_fetched = fetched
+        return _licenses_data
+
+
+def share_license_data(license_info: LicensesData) -> None:
+    """
+    Use license data parsed in another process (e.g. in the parent of a worker process) as the memoised license data,
+    so it is not loaded and parsed again. The license data is used for the time-to-live from now on.
+
+    :param license_info: The license data.
+    """
+    global _licenses_data, _licenses_fetched
+    with _licenses_data_lock:
+        _licenses_data = license_info
+        _licenses_fetched = time.time()
+
+
+def load_license_list(ttl: float = DEFAULT_TTL, offline: bool = False) -> dict:
+    """
+    Load the raw SPDX license list, using the on-disk cache.
+
+    :param ttl: The time-to-live of the cached license list in seconds. Default: One week.
+    :param offline: Never access the network. Default: False.
+    :return: The raw license list (the content of SPDXs licenses.json).
+    """
+    return _load_license_list(ttl=ttl, offline=offline)[0]
+
+
+def _load_license_list(ttl: float, offline: bool) -> Tuple[dict, float]:
+    """
+    Load the raw SPDX license list, using the on-disk cache.
+
+    :param ttl: The time-to-live of the cached license list in seconds.
+    :param offline: Never access the network.
+    :return: The raw license list, and the time it was fetched. After a failed revalidation the time of the attempt,
+        so the network is only tried again after the time-to-live; 0 for the bundled snapshot when offline.
+    """
+    cache_path: str = os.path.join(get_cache_directory(), _CACHE_FILE_NAME)
+    cache: Optional[dict] = _read_cache(cache_path=cache_path)
+
+    if cache is not None and (offline or time.time() - cache["fetched"] < ttl):
+        return cache["data"], cache["fetched"]
+
+    if not offline:
+        try:
+            cache = _revalidate(cache=cache)
+            _write_cache(cache_path=cache_path, cache=cache)
+            return cache["data"], cache["fetched"]
+        except (requests.RequestException, ValueError, KeyError):
+            # Fall back to the stale cache or the bundled snapshot
+            pass
+
+    fetched: float = 0.0 if offline else time.time()
+    if cache is not None:
+        return cache["data"], fetched
+    return load_json(path=_BUNDLED_SNAPSHOT), fetched
+
+
+def _revalidate(cache: Optional[dict]) -> dict:
+    """
+    Download the license list, if it has changed since the cached version.
+
+    :param cache: The cached license list with the HTTP validators. Default: None.
+    :return: The (new) cache entry.
+    """
+    headers: Dict[str, str] = {}
+    if cache is not None:
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+
+    resp: Response = requests.get(SPDX_LICENSES_URL, headers=headers, timeout=10)
+    if resp.status_code == 304 and cache is not None:
+        return dict(cache, fetched=time.time())
     resp.raise_for_status()
-    license_list = resp.json()["licenses"]
+
+    data: dict = resp.json()
+    # Ensure the license list can be parsed before it is cached
+    data["licenses"]
+    return {"fetched": time.time(), "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"), "data": data}
+
+
+def _read_cache(cache_path: str) -> Optional[dict]:
+    """
+    Read the cached license list.
+
+    :param cache_path: The path to the cache file.
+    :return: The cache entry, or None if there is no (valid) cache.
+    """
+    try:
+        cache: dict = load_json(path=cache_path)
+        cache["data"]["licenses"]
+        return cache
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_cache(cache_path: str, cache: dict):
+    """
+    Write the cached license list atomically, so parallel runs never read a partial file.
+
+    :param cache_path: The path to the cache file.
+    :param cache: The cache entry.
+    """
+    temp_path: str = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf8") as f:
+            json.dump(cache, f)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # The cache is only an optimisation
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _parse_licenses(license_data: dict) -> LicensesData:
+    """
+    Parse the raw license list.
+
+    :param license_data: The raw license list (the content of SPDXs licenses.json).
+    :return: The license data.
+    """
+    license_list = license_data["licenses"]
 
     licenses: Dict[str, str] = {}
     licenses_list: List[str] = []
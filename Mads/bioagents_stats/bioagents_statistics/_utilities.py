@@ -3,25 +3,83 @@ Different utilities and helper methods.
 
 """
 import datetime
+import os
+from typing import Any, Iterable, Iterator
 
-import dateutil
-from dateutil import parser
-import pytz
-from boltons.iterutils import remap
+from ._dates import parse_timestamp, time_limit_epoch
+from .agent_index import AgentIndex, AgentSlice
+from .agent_view import as_agent_view
+from .instrumentation import get_active_instrumentation, iter_instrumented
 
 
-def clean_and_filter_agent_list(raw_agents: list, upper_time_limit: datetime.datetime) -> list:
+def clean_and_filter_agent_list(raw_agents: Iterable[dict], upper_time_limit: datetime.datetime) -> list:
     """
     Clean the list of agents.
 
-    :param raw_agents: The raw list of agents.
+    :param raw_agents: The raw list of agents, an AgentIndex or an AgentSlice.
     :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
         Default: datetime.datetime.today()
     :return: The cleaned list of agents.
     """
-    # Clean the list
-    drop_false = lambda path, key, value: bool(value)
-    unfiltered_agents = remap(raw_agents, visit=drop_false)
-    # Filter the agents according to the upper time limit
-    return [agent for agent in unfiltered_agents
-            if dateutil.parser.isoparse(agent["additionDate"]) < pytz.utc.localize(upper_time_limit)]
+    if isinstance(raw_agents, AgentIndex):
+        return raw_agents.added_before(upper_time_limit)
+    if isinstance(raw_agents, AgentSlice):
+        return list(raw_agents.added_before(upper_time_limit))
+    return list(iter_clean_and_filtered_agents(raw_agents=raw_agents, upper_time_limit=upper_time_limit))
+
+
+def iter_clean_and_filtered_agents(raw_agents: Iterable[dict], upper_time_limit: datetime.datetime) -> Iterator[dict]:
+    """
+    Clean and filter the agents one at a time.
+
+    The agents are cleaned by wrapping them in an AgentView, which hides the empty values without copying the agent.
+    An AgentIndex (or AgentSlice) is filtered with a binary search on the pre-parsed addition dates instead.
+
+    :param raw_agents: The raw agents. Any iterable, e.g. the streaming reader, an AgentIndex or an AgentSlice.
+    :param upper_time_limit: Only yield agents added up to the time limit.
+    :return: The generator yielding the cleaned agents.
+    """
+    if isinstance(raw_agents, (AgentIndex, AgentSlice)):
+        yield from raw_agents.added_before(upper_time_limit)
+        return
+
+    time_limit: float = time_limit_epoch(upper_time_limit)
+
+    instrumentation = get_active_instrumentation()
+    if instrumentation is not None:
+        # The cleaning and the date filtering are measured as separate stages
+        yield from iter_instrumented(instrumentation=instrumentation, items=raw_agents, steps={
+            "clean_agents": lambda raw_agent: as_agent_view(raw_agent) or None,
+            "filter_dates": lambda agent: agent if parse_timestamp(agent["additionDate"]) < time_limit else None})
+        return
+
+    for raw_agent in raw_agents:
+        agent = as_agent_view(raw_agent)
+        # Skip the agents without any values and filter the agent according to the upper time limit
+        if agent and parse_timestamp(agent["additionDate"]) < time_limit:
+            yield agent
+
+
+def is_agent_table(agents: Any) -> bool:
+    """
+    Check if the agents are given as an Arrow table (see the columnar module), without importing pyarrow.
+
+    :param agents: The agents.
+    :return: True for a pyarrow table.
+    """
+    return type(agents).__name__ == "Table" and type(agents).__module__.startswith("pyarrow")
+
+
+def get_cache_directory() -> str:
+    """
+    Get (and create) the directory for the cached files of the package.
+
+    The directory is given by the BIOAGENTS_STATISTICS_CACHE environment variable.
+    Default: $XDG_CACHE_HOME/bioagents_statistics or ~/.cache/bioagents_statistics.
+
+    :return: The path to the cache directory.
+    """
+    cache_directory: str = os.environ.get("BIOAGENTS_STATISTICS_CACHE") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "bioagents_statistics")
+    os.makedirs(cache_directory, exist_ok=True)
+    return cache_directory
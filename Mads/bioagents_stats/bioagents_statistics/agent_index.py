@@ -0,0 +1,133 @@
+"""
+The agent index for calculating time-limited statistics.
+
+The index cleans the agents and parses their addition and last update timestamps once. The agents are kept sorted
+by their addition date, so selecting the agents added before a time limit is a binary search and a slice. An
+AgentSlice views the agents at a set of positions (rows) of the index.
+"""
+import datetime
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List
+
+from ._dates import parse_timestamp, time_limit_epoch
+from ._row_sets import RowSet
+from .agent_view import AgentView, as_agent_view
+
+
+class AgentIndex:
+    """
+    Index of cleaned agents sorted by their addition date.
+
+    The index can be given to the statistics functions in place of the list of agents.
+    """
+
+    def __init__(self, agents: Iterable[dict]):
+        """
+        Create the index.
+
+        :param agents: The raw agents. Any iterable, e.g. the streaming reader.
+        """
+        entries: list = []
+        for agent in agents:
+            agent = as_agent_view(agent)
+            if not agent:
+                continue
+            last_update: float = parse_timestamp(agent["lastUpdate"]) if "lastUpdate" in agent else float("nan")
+            entries.append((parse_timestamp(agent["additionDate"]), last_update, agent))
+        entries.sort(key=lambda entry: entry[0])
+
+        self._agents: List[AgentView] = [entry[2] for entry in entries]
+        self.addition_epochs: array = array("d", [entry[0] for entry in entries])
+        self.last_update_epochs: array = array("d", [entry[1] for entry in entries])
+
+        # The positions of the agents with a last update, sorted by the last update
+        update_order: List[int] = sorted((position for position, entry in enumerate(entries)
+                                          if not math.isnan(entry[1])),
+                                         key=lambda position: entries[position][1])
+        self._update_order: array = array("I", update_order)
+        self._sorted_update_epochs: array = array("d", [entries[position][1] for position in update_order])
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __iter__(self) -> Iterator[AgentView]:
+        return iter(self._agents)
+
+    def __getitem__(self, position: int) -> AgentView:
+        return self._agents[position]
+
+    def count_added_before(self, upper_time_limit: datetime.datetime) -> int:
+        """
+        Count the agents added before the time limit.
+
+        :param upper_time_limit: The (naive UTC) time limit.
+        :return: The number of agents.
+        """
+        return bisect_left(self.addition_epochs, time_limit_epoch(upper_time_limit))
+
+    def added_before(self, upper_time_limit: datetime.datetime) -> List[AgentView]:
+        """
+        Get the agents added before the time limit.
+
+        :param upper_time_limit: The (naive UTC) time limit.
+        :return: The agents sorted by their addition date.
+        """
+        return self._agents[:self.count_added_before(upper_time_limit)]
+
+    def updated_after(self, lower_time_limit: datetime.datetime) -> List[AgentView]:
+        """
+        Get the agents last updated after the time limit.
+
+        :param lower_time_limit: The (naive UTC) time limit.
+        :return: The agents sorted by their last update.
+        """
+        start: int = bisect_right(self._sorted_update_epochs, time_limit_epoch(lower_time_limit))
+        return [self._agents[position] for position in self._update_order[start:]]
+
+    def select(self, rows: RowSet) -> "AgentSlice":
+        """
+        Get the agents at a set of positions, without copying them.
+
+        :param rows: The positions of the agents.
+        :return: The slice of the agents.
+        """
+        return AgentSlice(index=self, rows=rows)
+
+
+class AgentSlice:
+    """
+    Read-only sequence of the agents of an AgentIndex at a set of rows, in the order of the index.
+    """
+
+    def __init__(self, index: AgentIndex, rows: RowSet):
+        """
+        Create the slice.
+
+        :param index: The agent index.
+        :param rows: The rows of the agents in the slice.
+        """
+        self.index: AgentIndex = index
+        self.rows: RowSet = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[AgentView]:
+        index: AgentIndex = self.index
+        return (index[row] for row in self.rows)
+
+    def added_before(self, upper_time_limit: datetime.datetime) -> Iterator[AgentView]:
+        """
+        Get the agents of the slice added before the time limit.
+
+        :param upper_time_limit: The (naive UTC) time limit.
+        :return: The generator yielding the agents, sorted by their addition date.
+        """
+        end: int = self.index.count_added_before(upper_time_limit)
+        index: AgentIndex = self.index
+        for row in self.rows:
+            if row >= end:
+                return
+            yield index[row]
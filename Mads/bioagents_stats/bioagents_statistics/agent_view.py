@@ -0,0 +1,148 @@
+"""
+Read-only views of the agents, which hide the empty values without copying the agents.
+
+The views give the same results as cleaning the agents with boltons' remap, dropping every value which is empty
+(after the nested values have been cleaned), but the nested structure of the agent is never rebuilt. Only the fields
+which are accessed are looked at.
+"""
+from collections.abc import Mapping
+from typing import Any, Iterator
+
+
+def is_present(value: Any) -> bool:
+    """
+    Check if a value is present, i.e. not empty after dropping all the nested empty values.
+
+    :param value: The value.
+    :return: True if the value is present.
+    """
+    value_type = type(value)
+    if value_type is dict:
+        values = value.values()
+    elif value_type is list:
+        values = value
+    else:
+        return bool(value)
+
+    for nested_value in values:
+        nested_type = type(nested_value)
+        if nested_type is dict or nested_type is list:
+            if is_present(nested_value):
+                return True
+        elif nested_value:
+            return True
+    return False
+
+
+def view(value: Any) -> Any:
+    """
+    Get the view of a value.
+
+    :param value: The value.
+    :return: An AgentView for dicts, a tuple with the views of the present values for lists and the value itself
+        otherwise.
+    """
+    value_type = type(value)
+    if value_type is dict:
+        return AgentView(value)
+    if value_type is list:
+        return view_list(value)
+    return value
+
+
+def view_list(values: list) -> tuple:
+    """
+    Get the view of a list, which is a tuple with the views of the present values.
+
+    Only the references to the values are copied, the nested values are not.
+
+    :param values: The list.
+    :return: The tuple with the views of the present values.
+    """
+    views: list = []
+    for value in values:
+        value_type = type(value)
+        if value_type is dict:
+            if is_present(value):
+                views.append(AgentView(value))
+        elif value_type is list:
+            if is_present(value):
+                views.append(view_list(value))
+        elif value:
+            views.append(value)
+    return tuple(views)
+
+
+class AgentView(Mapping):
+    """
+    Read-only view of an agent (or a nested dict of an agent) containing only the present fields.
+
+    `"field" in agent` is only True if the field has a present value and the values are returned as views: nested
+    dicts as AgentViews and lists as tuples of the present values. The set of present fields is computed on first
+    use, or once when the view is created with precompute_fields=True (as done for the top-level agents).
+    """
+    __slots__ = ("_data", "_fields")
+
+    def __init__(self, data: dict, precompute_fields: bool = False):
+        """
+        Create the view.
+
+        :param data: The raw agent (or nested dict).
+        :param precompute_fields: Compute the set of present fields right away. Default: False.
+        """
+        self._data = data
+        self._fields = None
+        if precompute_fields:
+            self._fields = frozenset([key for key, value in data.items() if is_present(value)])
+
+    @property
+    def raw(self) -> dict:
+        """
+        The raw agent (or nested dict) behind the view.
+        """
+        return self._data
+
+    @property
+    def fields(self) -> frozenset:
+        """
+        The set of present fields.
+        """
+        if self._fields is None:
+            self._fields = frozenset([key for key, value in self._data.items() if is_present(value)])
+        return self._fields
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._data[key]
+        if not (key in self._fields if self._fields is not None else is_present(value)):
+            raise KeyError(key)
+        return view(value)
+
+    def __contains__(self, key: object) -> bool:
+        if self._fields is not None:
+            return key in self._fields
+        return key in self._data and is_present(self._data[key])
+
+    def __iter__(self) -> Iterator[str]:
+        fields = self.fields
+        return (key for key in self._data if key in fields)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def __bool__(self) -> bool:
+        return bool(self.fields)
+
+    def __repr__(self) -> str:
+        return f"AgentView({self._data!r})"
+
+
+def as_agent_view(agent: dict) -> AgentView:
+    """
+    Get the view of a top-level agent.
+
+    :param agent: The raw agent, an AgentView or another (already cleaned) read-only mapping, e.g. a CompactAgent.
+    :return: The view of the agent with the present fields computed, or the already cleaned agent.
+    """
+    if isinstance(agent, AgentView) or (isinstance(agent, Mapping) and not isinstance(agent, dict)):
+        return agent
+    return AgentView(agent, precompute_fields=True)
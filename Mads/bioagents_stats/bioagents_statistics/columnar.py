@@ -0,0 +1,444 @@
+"""
+Columnar (Apache Arrow) representation of the agents, and vectorised statistics on it.
+
+The cleaned agents are converted once into an Arrow table, with a column for each agent field used by the
+statistics, which can be persisted as Parquet and read directly by other agents (e.g. R's arrow package). The general
+and EDAM term statistics of a table are computed with vectorised Arrow kernels and group-bys, and give the same
+output as for the list of agents. calculate_general_statistics, calculate_edam_term_statistics and
+calculate_all_edam_term_statistics accept a table in place of the agents.
+
+pyarrow is an optional dependency, only needed for this module.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ._accumulators import (Accumulator, AgentCountAccumulator, FacetAccumulator, accumulate, collect_results,
+                            each_value, single_value)
+from ._dates import parse_timestamp, time_limit_epoch
+from .agent_view import AgentView, as_agent_view
+from .edam_index import EDAM_PREFIX, EdamTermIndex, get_edam_term_index
+from .edam_stats import TERM_TYPES
+from .stats import CreditAccumulator, LicenseAccumulator, create_general_accumulators
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional
+    pa = pc = pq = None
+
+_schema = None
+
+
+def agent_schema():
+    """
+    Get the schema of the agent table.
+
+    Fields not present in an agent (after cleaning) are null, and lists only hold the present entries.
+
+    :return: The pyarrow schema.
+    """
+    global _schema
+    _require_pyarrow()
+    if _schema is None:
+        strings = pa.list_(pa.string())
+        term = pa.struct([("uri", pa.string()), ("term", pa.string())])
+        terms = pa.list_(term)
+        data_format = pa.list_(pa.struct([("data", term), ("format", terms)]))
+
+        def entries(*fields: Tuple[str, Any]):
+            return pa.list_(pa.struct(list(fields)))
+
+        _schema = pa.schema([
+            ("bioagentsID", pa.string()),
+            ("name", pa.string()),
+            ("additionDate", pa.timestamp("us", tz="UTC")),
+            ("lastUpdate", pa.timestamp("us", tz="UTC")),
+            ("agentType", strings),
+            ("topic", terms),
+            ("function", entries(("operation", terms), ("input", data_format), ("output", data_format))),
+            ("operatingSystem", strings),
+            ("language", strings),
+            ("license", pa.string()),
+            ("maturity", pa.string()),
+            ("cost", pa.string()),
+            ("collectionID", strings),
+            ("accessibility", pa.string()),
+            ("iechorPlatform", strings),
+            ("iechorNode", strings),
+            ("iechorCommunity", strings),
+            ("link", entries(("url", pa.string()), ("type", strings))),
+            ("download", entries(("url", pa.string()), ("type", pa.string()))),
+            ("documentation", entries(("url", pa.string()), ("type", strings))),
+            ("publication", entries(("doi", pa.string()), ("pmid", pa.string()), ("pmcid", pa.string()),
+                                    ("type", strings))),
+            ("credit", entries(("name", pa.string()), ("typeEntity", pa.string()), ("typeRole", strings))),
+            ("relation", entries(("bioagentsID", pa.string()), ("type", pa.string()))),
+            # The names of the present communities, e.g. ["biolib"]
+            ("community", strings),
+        ])
+    return _schema
+
+
+def agents_to_table(agents: Iterable[dict]):
+    """
+    Convert the agents to an Arrow table.
+
+    :param agents: The raw agents. Any iterable, e.g. the streaming reader, or an AgentIndex.
+    :return: The pyarrow table with the cleaned agents.
+    """
+    schema = agent_schema()
+    columns: Dict[str, list] = {field.name: [] for field in schema}
+    for agent in agents:
+        agent = as_agent_view(agent)
+        if not agent:
+            continue
+        for field in schema:
+            if field.name not in agent:
+                value = None
+            elif field.name in ("additionDate", "lastUpdate"):
+                value = round(parse_timestamp(agent[field.name]) * 1_000_000)
+            else:
+                value = _to_column_value(value=agent[field.name], value_type=field.type)
+            columns[field.name].append(value)
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def write_agents_parquet(agents: Iterable[dict], path: str) -> None:
+    """
+    Convert the agents to an Arrow table and write it as Parquet.
+
+    :param agents: The raw agents. Any iterable, e.g. the streaming reader, or an AgentIndex.
+    :param path: The path to the Parquet file.
+    """
+    pq.write_table(agents_to_table(agents), path)
+
+
+def read_agents_parquet(path: str):
+    """
+    Read the agent table from a Parquet file.
+
+    :param path: The path to the Parquet file.
+    :return: The pyarrow table.
+    """
+    _require_pyarrow()
+    return pq.read_table(path, schema=agent_schema())
+
+
+def calculate_general_statistics_columnar(table, upper_time_limit: Optional[datetime] = None,
+                                          accumulators: Optional[List[Accumulator]] = None) -> dict:
+    """
+    Calculate the general statistics for an agent table.
+
+    The registered accumulators of the general statistics are computed with vectorised kernels. Accumulators
+    registered by other code are fed the rows of the table.
+
+    :param table: The agent table.
+    :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+        Default: None, the time of the call.
+    :param accumulators: The new accumulators to compute, e.g. a selection of sections. Default: None, all the
+        registered accumulators.
+    :return: The dictionary with the statistics, as calculate_general_statistics.
+    """
+    upper_time_limit = upper_time_limit or datetime.today()
+    table = _filter_table(table=table, upper_time_limit=upper_time_limit)
+
+    stats: dict = {}
+    stats["date"] = upper_time_limit.isoformat(timespec="seconds")
+
+    if accumulators is None:
+        accumulators = create_general_accumulators()
+    row_accumulators: List[Accumulator] = []
+    for accumulator in accumulators:
+        if not _compute_accumulator(accumulator=accumulator, table=table):
+            row_accumulators.append(accumulator)
+    if row_accumulators:
+        accumulate(agents=iter_table_agents(table=table), accumulators=row_accumulators)
+
+    return collect_results(accumulators=accumulators, stats=stats)
+
+
+def iter_table_agents(table, upper_time_limit: Optional[datetime] = None) -> Iterator[AgentView]:
+    """
+    Get the agents of the table as (cleaned) agent views, e.g. for feeding them to accumulators.
+
+    The timestamps of the agents are datetimes, and the absent fields are not in the views.
+
+    :param table: The agent table.
+    :param upper_time_limit: Only yield the agents added up to the time limit. Default: None, all the agents.
+    :return: The generator yielding the agents.
+    """
+    if upper_time_limit is not None:
+        table = _filter_table(table=table, upper_time_limit=upper_time_limit)
+    for batch in table.to_batches():
+        for row in batch.to_pylist():
+            yield as_agent_view(row)
+
+
+def calculate_edam_term_statistics_columnar(table, index_lists: Dict[str, Union[dict, EdamTermIndex]],
+                                            upper_time_limit: Optional[datetime] = None,
+                                            output_ids: bool = False) -> dict:
+    """
+    Calculate the statistics for the EDAM terms of several term types for an agent table.
+
+    :param table: The agent table.
+    :param index_lists: The index lists for the term types to calculate statistics for, e.g.
+        {"topic": topic_index_list}.
+    :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+        Default: None, the time of the call.
+    :param output_ids: Indicate whether the ids should be in the output. Default: False.
+    :return: The dictionary with the date and the statistics of each term type, as
+        calculate_all_edam_term_statistics.
+    """
+    upper_time_limit = upper_time_limit or datetime.today()
+    term_indexes: Dict[str, EdamTermIndex] = {}
+    for term_type in TERM_TYPES:
+        for given_term_type, index_list in index_lists.items():
+            if given_term_type.lower() == term_type:
+                term_indexes[term_type] = get_edam_term_index(index_list=index_list)
+    if len(term_indexes) != len(index_lists):
+        raise ValueError(f"The term types {', '.join(index_lists)} are not valid. Must be 'Topic', 'Operation', "
+                         f"'Format', or 'Data'.")
+
+    table = _filter_table(table=table, upper_time_limit=upper_time_limit)
+
+    statistics: dict = {}
+    statistics["date"] = upper_time_limit.isoformat(timespec="seconds")
+    for term_type, term_index in term_indexes.items():
+        rows, uris = _get_term_uris(table=table, term_type=term_type)
+        statistics[term_type] = _calculate_term_statistics(agent_ids=pc.take(table["bioagentsID"], rows),
+                                                           uris=uris, term_index=term_index, output_ids=output_ids)
+    return statistics
+
+
+def _require_pyarrow():
+    """
+    Raise an ImportError if pyarrow is not installed.
+    """
+    if pa is None:
+        raise ImportError("The columnar representation requires pyarrow. Install it with 'pip install pyarrow'.")
+
+
+def _to_column_value(value: Any, value_type) -> Any:
+    """
+    Convert a (view of a) field value to the value of the column type.
+
+    :param value: The present field value.
+    :param value_type: The pyarrow type of the column (or nested field).
+    :return: The column value.
+    """
+    if pa.types.is_list(value_type):
+        if not isinstance(value, tuple):
+            # A dict (the community), or a single value where a list is expected
+            value = list(value) if hasattr(value, "keys") else [value]
+        return [_to_column_value(value=entry, value_type=value_type.value_type) for entry in value]
+    if pa.types.is_struct(value_type):
+        if not hasattr(value, "keys"):
+            return None
+        return {field.name: _to_column_value(value=value[field.name], value_type=field.type)
+                if field.name in value else None for field in value_type}
+    if isinstance(value, (tuple, dict)) or hasattr(value, "keys"):
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def _filter_table(table, upper_time_limit: datetime):
+    """
+    Filter the table according to the upper time limit.
+
+    :param table: The agent table.
+    :param upper_time_limit: Keep the agents added up to the time limit.
+    :return: The filtered table.
+    """
+    _require_pyarrow()
+    time_limit = pa.scalar(round(time_limit_epoch(upper_time_limit) * 1_000_000),
+                           type=table.schema.field("additionDate").type)
+    return table.filter(pc.less(table["additionDate"], time_limit))
+
+
+def _compute_accumulator(accumulator: Accumulator, table) -> bool:
+    """
+    Compute the state of a known accumulator with vectorised kernels, so its result is the result for the table.
+
+    :param accumulator: The accumulator.
+    :param table: The (filtered) agent table.
+    :return: False if the accumulator is not known and must be fed the rows instead.
+    """
+    if type(accumulator) is AgentCountAccumulator:
+        accumulator.count = table.num_rows
+        return True
+
+    if type(accumulator) is LicenseAccumulator:
+        column = table["license"]
+        accumulator.has_count = len(column) - column.null_count
+        for licens, count in _value_counts(column).items():
+            license_stats: Dict[str, int] = accumulator.license_stats
+            if licens in license_stats:
+                license_stats[licens] += count
+            elif licens == "Not licensed":
+                license_stats["NoLicense"] += count
+            if licens in accumulator.osi_approved_licenses:
+                license_stats["OSIApproved"] += count
+            if licens in accumulator.fsf_approved_licenses:
+                license_stats["FSFApproved"] += count
+            if licens in accumulator.deprecated_license_identifiers:
+                license_stats["DeprecatedIdentifier"] += count
+        return True
+
+    if type(accumulator) not in (FacetAccumulator, CreditAccumulator) or accumulator.field not in table.column_names:
+        return False
+    values_key: Optional[str] = getattr(accumulator.values, "key", None)
+    if accumulator.types_key is not None and accumulator.values not in (each_value, single_value) and \
+            values_key is None:
+        return False
+
+    column = table[accumulator.field]
+    accumulator.has_count = len(column) - column.null_count
+    if accumulator.count_key is not None:
+        accumulator.entry_count = _sum(pc.list_value_length(column))
+    if accumulator.types_key is not None:
+        if accumulator.values is single_value:
+            values = column
+        elif accumulator.values is each_value:
+            values = pc.list_flatten(column)
+        else:
+            values = pc.struct_field(pc.list_flatten(column), values_key)
+            if pa.types.is_list(values.type):
+                values = pc.list_flatten(values)
+        # Values outside of the vocabulary are counted as unrecognised values, as for the accumulator
+        _count_codes(accumulator=accumulator, values=values)
+    if type(accumulator) is CreditAccumulator:
+        accumulator.has_role_count = accumulator.has_count
+    return True
+
+
+def _sum(values) -> int:
+    """
+    Sum the values.
+
+    :param values: The pyarrow array.
+    :return: The sum, 0 for no values.
+    """
+    total = pc.sum(values).as_py()
+    return 0 if total is None else total
+
+
+def _value_counts(values) -> Dict[str, int]:
+    """
+    Count the occurrences of each (non-null) value.
+
+    :param values: The pyarrow array.
+    :return: The dictionary with the count of each value.
+    """
+    return {entry["values"]: entry["counts"] for entry in pc.value_counts(values.drop_null()).to_pylist()}
+
+
+def _count_codes(accumulator: FacetAccumulator, values) -> None:
+    """
+    Count the (non-null) values of a facet by their codes: the values are dictionary encoded, the dictionary is
+    mapped to the codes of the accumulator and the codes are counted with a bincount.
+
+    :param accumulator: The facet accumulator.
+    :param values: The pyarrow array.
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    encoded = pc.dictionary_encode(values.drop_null())
+    dictionary_codes: List[int] = accumulator.encode(encoded.dictionary.to_pylist())
+    accumulator.add_codes(pc.take(pa.array(dictionary_codes, type=pa.int32()), encoded.indices).to_numpy())
+
+
+def _flatten(values, rows) -> tuple:
+    """
+    Flatten a list array, keeping track of the table row of each value.
+
+    :param values: The list array.
+    :param rows: The table row of each list.
+    :return: The flattened values and their table rows.
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    return pc.list_flatten(values), pc.take(rows, pc.list_parent_indices(values))
+
+
+def _get_term_uris(table, term_type: str) -> tuple:
+    """
+    Get the URIs of the EDAM terms of the term type, with the table row of each term.
+
+    The terms are in the order of the rows.
+
+    :param table: The (filtered) agent table.
+    :param term_type: The term type.
+    :return: The table rows and the URIs.
+    """
+    rows = pa.array(range(table.num_rows), type=pa.uint32())
+    if term_type == "topic":
+        terms, term_rows = _flatten(values=table["topic"], rows=rows)
+    else:
+        functions, function_rows = _flatten(values=table["function"], rows=rows)
+        if term_type == "operation":
+            terms, term_rows = _flatten(values=pc.struct_field(functions, "operation"), rows=function_rows)
+        else:
+            parts: List[tuple] = []
+            for key in ("input", "output"):
+                entries, entry_rows = _flatten(values=pc.struct_field(functions, key), rows=function_rows)
+                if term_type == "data":
+                    parts.append((pc.struct_field(entries, "data"), entry_rows))
+                else:
+                    parts.append(_flatten(values=pc.struct_field(entries, "format"), rows=entry_rows))
+            terms = pa.concat_arrays([part[0] for part in parts])
+            term_rows = pa.concat_arrays([part[1] for part in parts])
+            # Keep the terms in the order of the rows
+            order = pc.sort_indices(term_rows)
+            terms, term_rows = pc.take(terms, order), pc.take(term_rows, order)
+
+    uris = pc.struct_field(terms, "uri")
+    present = pc.is_valid(uris)
+    return pc.filter(term_rows, present), pc.filter(uris, present)
+
+
+def _calculate_term_statistics(agent_ids, uris, term_index: EdamTermIndex, output_ids: bool) -> dict:
+    """
+    Calculate the statistics of the terms with group-bys over the (term, agent) pairs.
+
+    :param agent_ids: The bio.agents ID for each term.
+    :param uris: The term URIs.
+    :param term_index: The term index.
+    :param output_ids: Indicate whether the ids should be in the output.
+    :return: The statistics of each term, as EdamTermAccumulator.
+    """
+    term_ids = pc.replace_substring(uris, EDAM_PREFIX, "")
+    unique_term_ids = pc.unique(term_ids)
+    unique_numbers = pa.array([term_index.number(term_id) for term_id in unique_term_ids.to_pylist()],
+                              type=pa.uint32())
+    term_numbers = pc.take(unique_numbers, pc.index_in(term_ids, value_set=unique_term_ids))
+
+    # Expand the terms to their ancestors
+    ancestors: List[Any] = term_index.ancestors
+    offsets: List[int] = [0]
+    for term_ancestors in ancestors:
+        offsets.append(offsets[-1] + len(term_ancestors))
+    ancestor_lists = pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()),
+                                              pa.array([ancestor for term_ancestors in ancestors
+                                                        for ancestor in term_ancestors], type=pa.uint32()))
+    total_terms, total_ids = _flatten(values=pc.take(ancestor_lists, term_numbers), rows=agent_ids)
+
+    aggregations: list = [("id", "count_distinct")] + ([("id", "distinct")] if output_ids else [])
+    strict = pa.table({"term": term_numbers, "id": agent_ids}).group_by("term").aggregate(aggregations)
+    total = pa.table({"term": total_terms, "id": total_ids,
+                      "position": pa.array(range(len(total_terms)), type=pa.uint64())}).group_by("term").aggregate(
+        aggregations + [("position", "min")])
+    # Keep the terms in the order they are first seen
+    total = total.take(pc.sort_indices(total["position_min"]))
+
+    strict_rows: Dict[int, dict] = {row["term"]: row for row in strict.to_pylist()}
+    term_statistics: dict = {}
+    for row in total.to_pylist():
+        term_number: int = row["term"]
+        strict_row: dict = strict_rows.get(term_number, {"id_count_distinct": 0, "id_distinct": []})
+        term_statistics[term_index.term_ids[term_number]] = {
+            "name": term_index.names[term_number], "depth": term_index.depths[term_number],
+            "strict_ids": strict_row["id_distinct"] if output_ids else [],
+            "total_ids": row["id_distinct"] if output_ids else [],
+            "strict_count": strict_row["id_count_distinct"], "total_count": row["id_count_distinct"]}
+    return term_statistics
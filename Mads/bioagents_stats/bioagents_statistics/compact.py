@@ -0,0 +1,225 @@
+"""
+Compact in-memory records of the agents, for holding (several snapshots of) the registry in memory.
+
+A CompactAgent keeps the cleaned agent in slots instead of a dict. The values of the controlled vocabulary fields
+are stored as small integer codes, the short strings (e.g. link types and EDAM URIs) are interned, and the EDAM
+terms are shared by all the agents. The records are read-only mappings with the same fields and values as the cleaned
+agent, so they can be given to all the statistics functions in place of the agents. The nested values are read-only
+as well (lists as tuples, dicts as mappingproxy), so the shared EDAM terms cannot be changed through one record.
+"""
+import sys
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .agent_view import AgentView, as_agent_view
+from .stats import (ACCESSIBILITY, COMMUNITY, COSTS, LANGUAGES, MATURITY, NODES, OPERATING_SYSTEMS, PLATFORMS,
+                    TOOL_TYPES)
+
+# Strings up to this length are interned
+_INTERN_LENGTH: int = 128
+
+
+class _Codes:
+    """
+    The integer codes for the values of a controlled vocabulary field. New values get the next code.
+    """
+
+    def __init__(self, values: Iterable[str] = ()):
+        """
+        Create the codes.
+
+        :param values: The known values, which get the first codes.
+        """
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        """
+        Get the code of a value, adding the value if it is new.
+
+        :param value: The value.
+        :return: The code.
+        """
+        code: Optional[int] = self.codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self.codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(sys.intern(value))
+                    self.codes[self.values[code]] = code
+        return code
+
+
+# The fields stored in slots. The other fields are kept in a dict.
+_FIELDS: Tuple[str, ...] = ("bioagentsID", "name", "additionDate", "lastUpdate", "agentType", "topic", "function",
+                            "operatingSystem", "language", "license", "maturity", "cost", "collectionID",
+                            "accessibility", "iechorPlatform", "iechorNode", "iechorCommunity", "link", "download",
+                            "documentation", "publication", "credit", "relation", "community")
+_FIELD_SET = frozenset(_FIELDS)
+# The controlled vocabulary fields holding a list of values, stored as bytes of the codes
+_LIST_CODES: Dict[str, _Codes] = {"agentType": _Codes(TOOL_TYPES), "operatingSystem": _Codes(OPERATING_SYSTEMS),
+                                  "language": _Codes(LANGUAGES), "iechorPlatform": _Codes(PLATFORMS),
+                                  "iechorNode": _Codes(NODES), "iechorCommunity": _Codes(COMMUNITY)}
+# The controlled vocabulary fields holding a single value, stored as the code
+_VALUE_CODES: Dict[str, _Codes] = {"license": _Codes(), "maturity": _Codes(MATURITY), "cost": _Codes(COSTS),
+                                   "accessibility": _Codes(ACCESSIBILITY)}
+# The shared EDAM terms, by URI and term name
+_terms: Dict[Tuple[str, str], MappingProxyType] = {}
+
+
+class CompactAgent(Mapping):
+    """
+    Compact read-only record of a cleaned agent.
+    """
+    __slots__ = _FIELDS + ("_extra",)
+
+    def __init__(self, agent: dict):
+        """
+        Create the record.
+
+        :param agent: The raw agent, or an AgentView.
+        """
+        agent = as_agent_view(agent)
+        for field in _FIELDS:
+            setattr(self, field, _encode(field=field, value=agent[field]) if field in agent else None)
+        extra: dict = {sys.intern(field): _compact_value(agent[field]) for field in agent if field not in _FIELD_SET}
+        self._extra: Optional[dict] = extra or None
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return _decode(field=key, value=value)
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __contains__(self, key: object) -> bool:
+        if key in _FIELD_SET:
+            return getattr(self, key) is not None
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for field in _FIELDS:
+            if getattr(self, field) is not None:
+                yield field
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"CompactAgent({self.get('bioagentsID')!r})"
+
+    def __getstate__(self) -> tuple:
+        # The codes are only valid in the process and a mappingproxy cannot be pickled, so the values are pickled
+        # decoded, with plain dicts
+        return tuple(_thaw(_decode(field=field, value=value)) if (value := getattr(self, field)) is not None
+                     else None for field in _FIELDS) + (_thaw(self._extra),)
+
+    def __setstate__(self, state: tuple):
+        for field, value in zip(_FIELDS, state):
+            setattr(self, field, _encode(field=field, value=value) if value is not None else None)
+        self._extra = ({field: _compact_value(value) for field, value in state[-1].items()}
+                       if state[-1] is not None else None)
+
+    def to_dict(self) -> dict:
+        """
+        Get the agent as a dict (with the lists as tuples and the nested dicts as mappingproxy).
+
+        :return: The dict with the present fields.
+        """
+        return dict(self.items())
+
+
+def compact_agents(agents: Iterable[dict]) -> List[CompactAgent]:
+    """
+    Create the compact records of the agents.
+
+    :param agents: The raw agents. Any iterable, e.g. the streaming reader.
+    :return: The list of records, without the agents which have no values.
+    """
+    records: List[CompactAgent] = []
+    for agent in agents:
+        agent = as_agent_view(agent)
+        if agent:
+            records.append(CompactAgent(agent))
+    return records
+
+
+def _encode(field: str, value: Any) -> Any:
+    """
+    Encode a field value for storage.
+
+    :param field: The field.
+    :param value: The (view of the) field value.
+    :return: The stored value.
+    """
+    if field in _LIST_CODES and type(value) is tuple and all(type(entry) is str for entry in value):
+        codes: List[int] = [_LIST_CODES[field].code(entry) for entry in value]
+        # Very large vocabularies are kept as the values
+        return bytes(codes) if max(codes) < 256 else tuple(_LIST_CODES[field].values[code] for code in codes)
+    if field in _VALUE_CODES and type(value) is str:
+        return _VALUE_CODES[field].code(value)
+    return _compact_value(value)
+
+
+def _decode(field: str, value: Any) -> Any:
+    """
+    Decode a stored field value.
+
+    :param field: The field.
+    :param value: The stored value.
+    :return: The field value.
+    """
+    value_type = type(value)
+    if value_type is bytes:
+        values: List[str] = _LIST_CODES[field].values
+        return tuple([values[code] for code in value])
+    if value_type is int and field in _VALUE_CODES:
+        return _VALUE_CODES[field].values[value]
+    return value
+
+
+def _compact_value(value: Any) -> Any:
+    """
+    Compact a (view of a) value: intern the short strings, and share the EDAM terms.
+
+    :param value: The value.
+    :return: The compacted value, with the lists as tuples and the dicts as mappingproxy.
+    """
+    value_type = type(value)
+    if value_type is str:
+        return sys.intern(value) if len(value) <= _INTERN_LENGTH else value
+    if value_type is tuple or value_type is list:
+        return tuple([_compact_value(entry) for entry in value])
+    if value_type is AgentView or value_type is dict:
+        entry: dict = {sys.intern(key): _compact_value(value[key]) for key in value}
+        if entry.keys() == {"uri", "term"}:
+            # The EDAM terms are shared, so they must be read-only
+            return _terms.setdefault((entry["uri"], entry["term"]), MappingProxyType(entry))
+        return MappingProxyType(entry)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """
+    Convert the mappingproxy values of a compacted value to dicts, e.g. for pickling.
+
+    :param value: The compacted value.
+    :return: The value with dicts instead of mappingproxy.
+    """
+    value_type = type(value)
+    if value_type is tuple:
+        return tuple([_thaw(entry) for entry in value])
+    if value_type is MappingProxyType or value_type is dict:
+        return {key: _thaw(entry) for key, entry in value.items()}
+    return value
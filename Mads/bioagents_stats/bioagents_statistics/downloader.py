@@ -0,0 +1,214 @@
+"""
+Concurrent and resumable download of the bio.agents registry.
+
+The pages of the bio.agents API are fetched concurrently (with a pooled HTTP session, a bounded number of requests
+in flight and retries with exponential backoff), and the agents are written in the order of the pages to an NDJSON
+file, one agent per line. After every written page a checkpoint is saved, so an interrupted download resumes after
+the last written page; if the file is missing or shorter than at the checkpoint, the download starts again. The NDJSON
+file can be read with iter_agents.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .json_backend import load_json
+
+BIOAGENTS_API_URL: str = "https://bio.agents/api/t/"
+
+# The status codes which are retried
+_RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+
+def download_registry(output_path: str, base_url: str = BIOAGENTS_API_URL, concurrency: int = 8, retries: int = 5,
+                      backoff: float = 1.0, timeout: float = 30.0, restart: bool = False) -> int:
+    """
+    Download all the agents of the registry to an NDJSON file, resuming an interrupted download.
+
+    :param output_path: The path to the NDJSON file. The checkpoint is saved next to it.
+    :param base_url: The URL of the agent list endpoint of the API. Default: BIOAGENTS_API_URL.
+    :param concurrency: The maximum number of requests in flight. Default: 8.
+    :param retries: The number of retries of a failed request. Default: 5.
+    :param backoff: The delay before the first retry in seconds, doubled for every retry. Default: 1.0.
+    :param timeout: The timeout of a request in seconds. Default: 30.0.
+    :param restart: Start the download from the first page, even if there is a checkpoint. Default: False.
+    :return: The number of agents in the file.
+    """
+    return asyncio.run(download_registry_async(output_path=output_path, base_url=base_url, concurrency=concurrency,
+                                               retries=retries, backoff=backoff, timeout=timeout, restart=restart))
+
+
+async def download_registry_async(output_path: str, base_url: str = BIOAGENTS_API_URL, concurrency: int = 8,
+                                  retries: int = 5, backoff: float = 1.0, timeout: float = 30.0,
+                                  restart: bool = False) -> int:
+    """
+    Download all the agents of the registry to an NDJSON file, resuming an interrupted download.
+
+    See download_registry for the parameters.
+
+    :return: The number of agents in the file.
+    """
+    if concurrency < 1:
+        raise ValueError("The concurrency must be positive.")
+
+    checkpoint_path: str = f"{output_path}.checkpoint.json"
+    checkpoint: Optional[dict] = None if restart else _read_checkpoint(checkpoint_path=checkpoint_path)
+    if checkpoint is not None and checkpoint["base_url"] != base_url:
+        raise ValueError(f"The checkpoint '{checkpoint_path}' is for the download from {checkpoint['base_url']}. "
+                         f"Use restart=True to start a new download.")
+    if checkpoint is not None and not _has_checkpointed_output(output_path=output_path, offset=checkpoint["offset"]):
+        # The output is missing or shorter than checkpointed, so the download is started again
+        checkpoint = None
+    if checkpoint is not None and checkpoint["complete"]:
+        return checkpoint["agents"]
+
+    loop = asyncio.get_running_loop()
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(page: int) -> dict:
+            async with semaphore:
+                return await loop.run_in_executor(executor, _get_page, session, base_url, page, retries, backoff,
+                                                  timeout)
+
+        if checkpoint is None:
+            # The first page gives the number of pages
+            first_page: dict = await fetch(1)
+            page_size: int = len(first_page["list"])
+            page_count: int = max(1, math.ceil(first_page["count"] / page_size)) if page_size else 1
+            checkpoint = {"base_url": base_url, "page_count": page_count, "pages": 0, "agents": 0, "offset": 0,
+                          "complete": False}
+            pending: Dict[int, dict] = {1: first_page}
+        else:
+            pending = {}
+
+        with open(output_path, "ab" if checkpoint["offset"] else "wb") as output:
+            # Drop what was written after the last checkpoint
+            output.truncate(checkpoint["offset"])
+            output.seek(checkpoint["offset"])
+
+            next_page: int = checkpoint["pages"] + 1
+            tasks: Dict[int, asyncio.Task] = {}
+            page: int = next_page
+            try:
+                while next_page <= checkpoint["page_count"]:
+                    # Keep a bounded number of pages fetched ahead of the next page to write
+                    while page <= checkpoint["page_count"] and page < next_page + 4 * concurrency:
+                        if page not in pending:
+                            tasks[page] = asyncio.ensure_future(fetch(page))
+                        page += 1
+
+                    if next_page not in pending:
+                        pending[next_page] = await tasks.pop(next_page)
+
+                    # Write the pages in order, saving the checkpoint after each page
+                    while next_page in pending:
+                        agents: list = pending.pop(next_page)["list"]
+                        output.write("".join(json.dumps(agent, ensure_ascii=False) + "\n"
+                                             for agent in agents).encode("utf8"))
+                        output.flush()
+                        os.fsync(output.fileno())
+                        checkpoint.update(pages=next_page, agents=checkpoint["agents"] + len(agents),
+                                          offset=output.tell(), complete=next_page == checkpoint["page_count"])
+                        _write_checkpoint(checkpoint_path=checkpoint_path, checkpoint=checkpoint)
+                        next_page += 1
+            finally:
+                for task in tasks.values():
+                    task.cancel()
+
+    return checkpoint["agents"]
+
+
+def _get_page(session: requests.Session, base_url: str, page: int, retries: int, backoff: float,
+              timeout: float, params: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Get a page of the agent list, retrying failed requests with exponential backoff.
+
+    :param session: The HTTP session.
+    :param base_url: The URL of the agent list endpoint.
+    :param page: The page number, starting with 1.
+    :param retries: The number of retries.
+    :param backoff: The delay before the first retry in seconds.
+    :param timeout: The timeout of a request in seconds.
+    :param params: Additional query parameters, e.g. the sort order. Default: None.
+    :return: The page, with the agents in the field 'list'. A page after the first page which is not found (the
+        registry shrunk during the download) has no agents.
+    :raise requests.HTTPError: If the request fails after the retries, or the first page is not found (e.g. the URL
+        is wrong).
+    """
+    attempt: int = 0
+    while True:
+        try:
+            resp = session.get(base_url, params={"format": "json", "page": page, **(params or {})}, timeout=timeout)
+            if resp.status_code == 404 and page > 1:
+                return {"count": 0, "list": []}
+            if resp.status_code not in _RETRY_STATUS_CODES:
+                resp.raise_for_status()
+                return resp.json()
+            retry_after: Optional[str] = resp.headers.get("Retry-After")
+        except (requests.ConnectionError, requests.Timeout, ValueError):
+            if attempt >= retries:
+                raise
+            retry_after = None
+        else:
+            if attempt >= retries:
+                resp.raise_for_status()
+
+        delay: float = backoff * 2 ** attempt * (1 + random.random() / 2)
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        # The request runs in a worker thread, so sleeping does not block the event loop
+        time.sleep(delay)
+        attempt += 1
+
+
+def _read_checkpoint(checkpoint_path: str) -> Optional[dict]:
+    """
+    Read the checkpoint of a download.
+
+    :param checkpoint_path: The path to the checkpoint.
+    :return: The checkpoint, or None if there is no (valid) checkpoint.
+    """
+    try:
+        checkpoint: dict = load_json(path=checkpoint_path)
+    except (OSError, ValueError):
+        return None
+    required = {"base_url", "page_count", "pages", "agents", "offset", "complete"}
+    return checkpoint if isinstance(checkpoint, dict) and required <= set(checkpoint) else None
+
+
+def _has_checkpointed_output(output_path: str, offset: int) -> bool:
+    """
+    Check if the output of a download holds everything written up to the checkpoint.
+
+    :param output_path: The path to the NDJSON file.
+    :param offset: The size of the file at the checkpoint.
+    :return: True if the file exists and is at least as long as at the checkpoint.
+    """
+    try:
+        return os.path.getsize(output_path) >= offset
+    except OSError:
+        return False
+
+
+def _write_checkpoint(checkpoint_path: str, checkpoint: dict):
+    """
+    Write the checkpoint of a download atomically.
+
+    :param checkpoint_path: The path to the checkpoint.
+    :param checkpoint: The checkpoint.
+    """
+    temp_path: str = f"{checkpoint_path}.tmp"
+    with open(temp_path, "w", encoding="utf8") as f:
+        json.dump(checkpoint, f)
+    os.replace(temp_path, checkpoint_path)
@@ -0,0 +1,330 @@
+"""
+Build the EDAM term index from the EDAM ontology (EDAM.owl), instead of downloading it from bio.agents.
+
+The index has the same format as the bio.agents index endpoint (https://bio.agents/api/o/index_EDAM_{term_type}):
+{term_id: {"name": term_name, "path": [{"key": "root_id||...||term_id"}, ...]}}, with one path for each way from
+the root of the term type to the term. The index for all four term types is built in a single streaming pass over
+the OWL file and cached on disk, keyed by the hash of the file.
+
+The EdamTermIndex interns the term IDs of an index list as dense integers, with the name, depth and ancestors of each
+term precomputed, for the EDAM term statistics.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import xml.etree.ElementTree as ElementTree
+from array import array
+from typing import Dict, List, Optional, Union
+
+from ._utilities import get_cache_directory
+from .instrumentation import stage
+from .json_backend import load_json
+
+EDAM_PREFIX: str = "http://edamontology.org/"
+# The root terms of the term types
+EDAM_ROOTS: Dict[str, str] = {"topic": "topic_0003", "operation": "operation_0004", "data": "data_0006",
+                              "format": "format_1915"}
+
+_RDF: str = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+_RDFS: str = "{http://www.w3.org/2000/01/rdf-schema#}"
+_OWL: str = "{http://www.w3.org/2002/07/owl#}"
+
+_edam_indexes: Dict[str, Dict[str, dict]] = {}
+_edam_indexes_lock = threading.Lock()
+
+
+def load_edam_index(owl_path: str, term_type: Optional[str] = None, use_cache: bool = True) -> dict:
+    """
+    Load the EDAM term index built from the EDAM ontology.
+
+    The index is built once for each version of the ontology, and cached on disk and in-process.
+
+    :param owl_path: The path to the EDAM ontology (EDAM.owl).
+    :param term_type: The term type: 'topic', 'operation', 'data' or 'format'. Default: None, all the term types.
+    :param use_cache: Indicate whether the cached index should be used (and written). Default: True.
+    :return: The index list for the term type, or the dictionary with the index list of each term type.
+    """
+    if term_type is not None and term_type.lower() not in EDAM_ROOTS:
+        raise ValueError(f"The term type '{term_type}' is not valid. Must be 'Topic', 'Operation', 'Format', or"
+                         f"'Data'.")
+
+    file_hash: str = _hash_file(path=owl_path)
+    with _edam_indexes_lock:
+        if file_hash not in _edam_indexes or not use_cache:
+            cache_path: str = os.path.join(get_cache_directory(), f"edam_index_{file_hash[:16]}.json.gz")
+            with stage("read_cached_edam_index"):
+                indexes: Optional[Dict[str, dict]] = (_read_cached_index(cache_path=cache_path) if use_cache
+                                                      else None)
+            if indexes is None:
+                with stage("build_edam_index") as measured:
+                    indexes = build_edam_index(owl_path=owl_path)
+                    measured.items = sum(len(index_list) for index_list in indexes.values())
+                if use_cache:
+                    _write_cached_index(cache_path=cache_path, indexes=indexes)
+            _edam_indexes[file_hash] = indexes
+        indexes = _edam_indexes[file_hash]
+
+    return indexes if term_type is None else indexes[term_type.lower()]
+
+
+def build_edam_index(owl_path: str) -> Dict[str, dict]:
+    """
+    Build the index for all the term types by stream-parsing the EDAM ontology.
+
+    Deprecated terms, and terms which cannot be reached from the root of their term type, are not in the index.
+
+    :param owl_path: The path to the EDAM ontology (EDAM.owl).
+    :return: The dictionary with the index list of each term type.
+    """
+    names: Dict[str, str] = {}
+    parents: Dict[str, List[str]] = {}
+
+    for term_id, name, term_parents in _iter_owl_classes(owl_path=owl_path):
+        names[term_id] = name
+        parents[term_id] = term_parents
+
+    indexes: Dict[str, dict] = {term_type: {} for term_type in EDAM_ROOTS}
+    # The already computed paths of the terms, for each term type
+    paths: Dict[str, Dict[str, List[str]]] = {term_type: {} for term_type in EDAM_ROOTS}
+    for term_id in names:
+        term_type: str = term_id.split("_")[0]
+        if term_type not in EDAM_ROOTS:
+            continue
+        term_paths: List[str] = _get_paths(term_id=term_id, root=EDAM_ROOTS[term_type], parents=parents,
+                                           paths=paths[term_type], visiting=set())
+        if term_paths:
+            indexes[term_type][term_id] = {"name": names[term_id], "path": [{"key": path} for path in term_paths]}
+
+    return indexes
+
+
+def _iter_owl_classes(owl_path: str):
+    """
+    Stream the (non-deprecated) EDAM classes from the ontology.
+
+    :param owl_path: The path to the EDAM ontology.
+    :return: The generator yielding the term ID, name and the IDs of the direct parent terms.
+    """
+    depth: int = 0
+    for event, element in ElementTree.iterparse(owl_path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        # Only look at the classes directly under the rdf:RDF element
+        if depth != 1:
+            continue
+        if element.tag == f"{_OWL}Class":
+            about: str = element.get(f"{_RDF}about", "")
+            deprecated: Optional[str] = element.findtext(f"{_OWL}deprecated")
+            if about.startswith(EDAM_PREFIX) and (deprecated is None or deprecated.strip() != "true"):
+                term_parents: List[str] = [parent.get(f"{_RDF}resource").replace(EDAM_PREFIX, "")
+                                           for parent in element.findall(f"{_RDFS}subClassOf")
+                                           if (parent.get(f"{_RDF}resource") or "").startswith(EDAM_PREFIX)]
+                yield about.replace(EDAM_PREFIX, ""), element.findtext(f"{_RDFS}label", ""), term_parents
+        element.clear()
+
+
+def _get_paths(term_id: str, root: str, parents: Dict[str, List[str]], paths: Dict[str, List[str]],
+               visiting: set) -> List[str]:
+    """
+    Get all the paths from the root to the term.
+
+    :param term_id: The term ID.
+    :param root: The root term of the term type.
+    :param parents: The direct parent terms of each term.
+    :param paths: The already computed paths of the terms.
+    :param visiting: The terms on the current path, to guard against cycles.
+    :return: The paths ('||' separated term IDs, starting with the root).
+    """
+    if term_id in paths:
+        return paths[term_id]
+    if term_id == root:
+        return [root]
+    if term_id in visiting or term_id not in parents:
+        return []
+
+    visiting.add(term_id)
+    term_paths: List[str] = []
+    for parent in parents[term_id]:
+        term_paths.extend(f"{path}||{term_id}"
+                          for path in _get_paths(term_id=parent, root=root, parents=parents, paths=paths,
+                                                 visiting=visiting))
+    visiting.discard(term_id)
+
+    paths[term_id] = term_paths
+    return term_paths
+
+
+def _hash_file(path: str) -> str:
+    """
+    Calculate the SHA-256 hash of a file.
+
+    :param path: The path to the file.
+    :return: The hex digest.
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _read_cached_index(cache_path: str) -> Optional[Dict[str, dict]]:
+    """
+    Read the cached index.
+
+    :param cache_path: The path to the cached index.
+    :return: The dictionary with the index list of each term type, or None if there is no (valid) cache.
+    """
+    try:
+        indexes: Dict[str, dict] = load_json(path=cache_path)
+    except (OSError, ValueError):
+        return None
+    return indexes if set(indexes) == set(EDAM_ROOTS) else None
+
+
+def _write_cached_index(cache_path: str, indexes: Dict[str, dict]):
+    """
+    Write the cached index atomically.
+
+    :param cache_path: The path to the cached index.
+    :param indexes: The dictionary with the index list of each term type.
+    """
+    temp_path: str = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with gzip.open(temp_path, "wt", encoding="utf8") as f:
+            json.dump(indexes, f, separators=(",", ":"))
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # The cache is only an optimisation
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class EdamTermIndex:
+    """
+    The EDAM term index with the term IDs interned as dense integers.
+
+    For each term the name, the depth (the length of the shortest path from the root, root = 0) and the ancestors are
+    precomputed. The ancestors are the deduplicated terms on all the paths from the root, with the term itself first
+    and the others in the order they appear on the paths. Terms not in the index are interned on first use, with no
+    name, depth -1 and only themselves as ancestors, so a term index shared by several calculations must be copied
+    first (as get_edam_term_index does).
+    """
+
+    def __init__(self, index_list: dict):
+        """
+        Create the term index.
+
+        :param index_list: The index list for the terms, as returned by load_edam_index or the bio.agents API.
+        """
+        self.term_ids: List[str] = []
+        self.term_numbers: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.depths: array = array("i")
+        self.ancestors: List[array] = []
+        self._lock = threading.Lock()
+
+        branches: Dict[str, List[str]] = {}
+        for term_id, term in index_list.items():
+            branches[term_id] = [path["key"].split("||") for path in term["path"]]
+            self._add_term(term_id=term_id, name=term["name"],
+                           depth=min(len(branch) for branch in branches[term_id]) - 1 if branches[term_id] else -1)
+        for term_id in index_list:
+            ancestors: Dict[int, None] = {self.term_numbers[term_id]: None}
+            for branch in branches[term_id]:
+                for branch_term in branch:
+                    ancestors[self.number(branch_term)] = None
+            self.ancestors[self.term_numbers[term_id]] = array("I", ancestors)
+
+    def __len__(self) -> int:
+        return len(self.term_ids)
+
+    def __getstate__(self) -> dict:
+        state: dict = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def copy(self) -> "EdamTermIndex":
+        """
+        Copy the term index, so terms can be interned without changing this term index.
+
+        :return: The new term index.
+        """
+        term_index: EdamTermIndex = EdamTermIndex.__new__(EdamTermIndex)
+        term_index.term_ids = list(self.term_ids)
+        term_index.term_numbers = dict(self.term_numbers)
+        term_index.names = list(self.names)
+        term_index.depths = array("i", self.depths)
+        # The arrays of the ancestors are never changed, so they are shared
+        term_index.ancestors = list(self.ancestors)
+        term_index._lock = threading.Lock()
+        return term_index
+
+    def number(self, term_id: str) -> int:
+        """
+        Get the number of a term, interning the term if it is not in the index.
+
+        :param term_id: The term ID.
+        :return: The number of the term.
+        """
+        term_number: Optional[int] = self.term_numbers.get(term_id)
+        if term_number is None:
+            with self._lock:
+                term_number = self.term_numbers.get(term_id)
+                if term_number is None:
+                    term_number = self._add_term(term_id=term_id, name="", depth=-1)
+        return term_number
+
+    def _add_term(self, term_id: str, name: str, depth: int) -> int:
+        """
+        Add a term, with only itself as ancestor.
+
+        :param term_id: The term ID.
+        :param name: The term name.
+        :param depth: The term depth.
+        :return: The number of the term.
+        """
+        term_number: int = len(self.term_ids)
+        self.term_ids.append(term_id)
+        self.names.append(name)
+        self.depths.append(depth)
+        self.ancestors.append(array("I", [term_number]))
+        self.term_numbers[term_id] = term_number
+        return term_number
+
+
+# The term indexes of the recently used index lists, by the hash of the content of the index list
+_term_indexes: Dict[str, EdamTermIndex] = {}
+_TERM_INDEXES_SIZE: int = 16
+
+
+def get_edam_term_index(index_list: Union[dict, EdamTermIndex]) -> EdamTermIndex:
+    """
+    Get a term index for an index list. The term index is only built once for each content of the index list (a
+    changed index list gets a new term index), and each call gets its own copy, so the terms interned by one
+    calculation are not seen by the others.
+
+    :param index_list: The index list for the terms, or an EdamTermIndex.
+    :return: The new term index.
+    """
+    if isinstance(index_list, EdamTermIndex):
+        return index_list.copy()
+
+    content_hash: str = hashlib.sha256(json.dumps(index_list, separators=(",", ":")).encode("utf8")).hexdigest()
+    with _edam_indexes_lock:
+        term_index: Optional[EdamTermIndex] = _term_indexes.get(content_hash)
+    if term_index is None:
+        term_index = EdamTermIndex(index_list=index_list)
+        with _edam_indexes_lock:
+            if len(_term_indexes) >= _TERM_INDEXES_SIZE:
+                del _term_indexes[next(iter(_term_indexes))]
+            _term_indexes[content_hash] = term_index
+    return term_index.copy()
@@ -2,209 +2,468 @@
 The scripts for calculating statistics for the EDAM terms for the terms.
 
 """
-import iteragents
 from collections import defaultdict
 from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-from ._utilities import clean_and_filter_agent_list
+from ._accumulators import Accumulator, accumulate, collect_results
+from ._row_sets import RowSet
+from ._utilities import is_agent_table, iter_clean_and_filtered_agents
+from .edam_index import EDAM_PREFIX, EdamTermIndex, get_edam_term_index
+from .instrumentation import stage
 
+# The EDAM term types, in the order of the statistics
+TERM_TYPES: List[str] = ["topic", "operation", "format", "data"]
 
-def calculate_edam_term_statistics(agents: list, term_type: str, index_list: dict,
+
+def calculate_edam_term_statistics(agents: Iterable[dict], term_type: str, index_list: Union[dict, EdamTermIndex],
                                    upper_time_limit: datetime = datetime.today(), output_ids: bool = False) -> dict:
     """
     Calculate the statistics for EDAM terms.
 
-    :param agents: The agent list.
+    :param agents: The agent list. Any iterable of agents is accepted, e.g. the streaming reader, or an Arrow agent
+        table (see the columnar module).
     :param term_type: The term type to calculate statistics for.
-    :param index_list: The index list for the terms.
+    :param index_list: The index list for the terms, or an EdamTermIndex.
     :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
         Default: datetime.datetime.today().
-    :param output_ids: Indicate whether the ids should be in the output. Default: False.
+    :param output_ids: Indicate whether the ids should be in the output. Default: False. For a compact output of
+        the ids, see write_edam_term_statistics.
     :return: The dictionary with the terms, the IDs and counts for strict (Only the specific term)
         and total (for parent terms).
     """
+    if is_agent_table(agents):
+        return calculate_all_edam_term_statistics(agents=agents, index_lists={term_type: index_list},
+                                                  upper_time_limit=upper_time_limit, output_ids=output_ids)
 
-    agents = clean_and_filter_agent_list(raw_agents=agents, upper_time_limit=upper_time_limit)
+    with stage("calculate_edam_term_statistics") as measured:
+        accumulator = EdamTermAccumulator(term_type=term_type, index_list=index_list, output_ids=output_ids)
 
-    # Create the dictionary to hold the topic statistics with the default fields.
-    temp_statistics = defaultdict(
-        lambda: {"name": "", "depth": -1,
-                 "strict_ids": set(), "total_ids": set(),
-                 "strict_count": 0, "total_count": 0})
+        agents = iter_clean_and_filtered_agents(raw_agents=agents, upper_time_limit=upper_time_limit)
+        accumulate(agents=agents, accumulators=[accumulator])
+        measured.items = len(accumulator.agent_rows)
 
-    term_type = term_type.lower()
+        # Create the final statistics dict
+        statistics: dict = {}
+        statistics["date"] = upper_time_limit.isoformat(timespec="seconds")
+        return collect_results(accumulators=[accumulator], stats=statistics)
 
-    agent_terms: dict = _extract_terms(agents=agents, term_type=term_type)
-    # Loop over the agents and the topics
-    for agentID in agent_terms:
-        for term in agent_terms[agentID]:
-            statistics = _add_terms(stats=temp_statistics, term=term, agent_id=agentID, index_list=index_list)
 
-    # Create the final statistics dict
-    statistics: dict = {}
-    statistics["date"] = upper_time_limit.isoformat(timespec="seconds")
-    statistics[term_type]: defaultdict = defaultdict(
-        lambda: {"name": "", "depth": -1,
-                 "strict_ids": [], "total_ids": [],
-                 "strict_count": 0, "total_count": 0})
+def calculate_all_edam_term_statistics(agents: Iterable[dict], index_lists: Dict[str, Union[dict, EdamTermIndex]],
+                                       upper_time_limit: Optional[datetime] = None,
+                                       output_ids: bool = False) -> dict:
+    """
+    Calculate the statistics for the EDAM terms of several term types in a single pass over the agents.
 
-    # Loop over the statistics
-    for term_id in temp_statistics:
-        statistics[term_type][term_id]["name"] = temp_statistics[term_id]["name"]
-        statistics[term_type][term_id]["depth"] = temp_statistics[term_id]["depth"]
-        statistics[term_type][term_id]["total_count"] = len(temp_statistics[term_id]["total_ids"])
-        statistics[term_type][term_id]["strict_count"] = len(temp_statistics[term_id]["strict_ids"])
+    :param agents: The agent list. Any iterable of agents is accepted, e.g. the streaming reader, or an Arrow agent
+        table (see the columnar module).
+    :param index_lists: The index lists for the term types to calculate statistics for, e.g.
+        {"topic": topic_index_list, "operation": operation_index_list, "format": format_index_list,
+        "data": data_index_list}.
+    :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+        Default: None, the time of the call.
+    :param output_ids: Indicate whether the ids should be in the output. Default: False. For a compact output of
+        the ids, see write_edam_term_statistics.
+    :return: The dictionary with the date and the statistics of each term type, as calculate_edam_term_statistics.
+    """
+    upper_time_limit = upper_time_limit or datetime.today()
+    if is_agent_table(agents):
+        # Imported here, as the columnar module depends on this module
+        from .columnar import calculate_edam_term_statistics_columnar
+        return calculate_edam_term_statistics_columnar(table=agents, index_lists=index_lists,
+                                                       upper_time_limit=upper_time_limit, output_ids=output_ids)
 
-        if output_ids:
-            statistics[term_type][term_id]["total_ids"] = list(temp_statistics[term_id]["total_ids"])
-            statistics[term_type][term_id]["strict_ids"] = list(temp_statistics[term_id]["strict_ids"])
+    with stage("calculate_all_edam_term_statistics") as measured:
+        accumulator = EdamTermsAccumulator(index_lists=index_lists, output_ids=output_ids)
 
-    return statistics
+        agents = iter_clean_and_filtered_agents(raw_agents=agents, upper_time_limit=upper_time_limit)
+        accumulate(agents=agents, accumulators=[accumulator])
+        measured.items = len(accumulator.agent_rows)
 
+        # Create the final statistics dict
+        statistics: dict = {}
+        statistics["date"] = upper_time_limit.isoformat(timespec="seconds")
+        return collect_results(accumulators=[accumulator], stats=statistics)
 
-def _add_terms(stats: dict, term: dict, agent_id: str, index_list: dict) -> dict:
-    """
-    Add term to the statistics.
 
-    :param stats: The statistics dictionary.
-    :param term: The EDAM term.
-    :param agent_id: The bio.agents ID.
-    :param index_list: The index list.
-    :return: The statistics dictionary.
+class EdamTermAccumulator(Accumulator):
     """
-    # Get the term id
-    term_id = term["uri"].replace("http://edamontology.org/", "")
-    # Add to the id lists
-    stats[term_id]["strict_ids"].add(agent_id)
-    stats[term_id]["total_ids"].add(agent_id)
+    Accumulate the statistics for the EDAM terms of one term type.
 
-    # Add topic name and depth if not added
-    stats = _add_term_info(stats=stats, term_id=term_id, index_list=index_list)
+    The terms are looked up in the EdamTermIndex, so adding a term is a loop over its precomputed ancestors. The
+    agents are numbered with dense rows and the agents of each term are kept as a RowSet, so the agent IDs are only
+    held once.
 
-    # Go through the branches
-    for branch_term in _get_branch_terms(term_id=term_id, term_index=index_list):
-        # Add topic name and depth if not added
-        stats = _add_term_info(stats=stats, term_id=branch_term, index_list=index_list)
-        stats[branch_term]["total_ids"].add(agent_id)
+    The rows are in the order the agents were added, which is the order of the IDs in the statistics; an updated
+    agent keeps its row. The row of a removed agent is freed (its ID is None), and a removed agent which is added
+    again gets a new row at the end, as in a snapshot of the registry. Once more than half of the rows are freed, the
+    rows are renumbered in the same order.
+    """
 
-    return stats
+    def __init__(self, term_type: str, index_list: Union[dict, EdamTermIndex], output_ids: bool = False):
+        """
+        Create the EDAM term accumulator.
+
+        :param term_type: The term type to calculate statistics for.
+        :param index_list: The index list for the terms, or an EdamTermIndex.
+        :param output_ids: Indicate whether the ids should be in the output. Default: False.
+        """
+        self.term_type: str = term_type.lower()
+        self.term_index: EdamTermIndex = get_edam_term_index(index_list=index_list)
+        self.output_ids: bool = output_ids
+        self.extract_terms: Callable[[dict], list] = _get_term_extractor(term_type=self.term_type)
+
+        # The agents are numbered with dense rows, and the rows of the agents are kept for each term number.
+        # The terms are kept in the order they are first seen.
+        self.agent_rows: Dict[str, int] = {}
+        self.agent_ids: List[Optional[str]] = []
+        self.strict_rows: Dict[int, RowSet] = {}
+        self.total_rows: Dict[int, RowSet] = {}
+
+    def add(self, agent: dict) -> None:
+        row: int = _get_row(agent_rows=self.agent_rows, agent_ids=self.agent_ids, agent_id=agent["bioagentsID"])
+        self.add_terms(row=row, terms=self.extract_terms(agent))
+
+    def add_terms(self, row: int, terms: list) -> None:
+        """
+        Add the terms of an agent.
+
+        :param row: The row of the agent.
+        :param terms: The EDAM terms of the term type of the agent.
+        """
+        for term_numbers, term_rows in zip(self._term_numbers(terms=terms), (self.strict_rows, self.total_rows)):
+            for term_number in term_numbers:
+                rows: Optional[RowSet] = term_rows.get(term_number)
+                if rows is None:
+                    rows = term_rows[term_number] = RowSet()
+                rows.add(row)
+
+    def remove(self, agent: dict) -> None:
+        row: Optional[int] = _free_row(agent_rows=self.agent_rows, agent_ids=self.agent_ids,
+                                       agent_id=agent["bioagentsID"])
+        if row is not None:
+            self.remove_terms(row=row, terms=self.extract_terms(agent))
+            _compact_rows(agent_rows=self.agent_rows, agent_ids=self.agent_ids, accumulators=[self])
+
+    def remove_terms(self, row: int, terms: list) -> None:
+        """
+        Remove the terms of an agent. The terms left without agents are removed from the statistics.
+
+        :param row: The row of the agent.
+        :param terms: The EDAM terms of the term type of the agent, as they were added.
+        """
+        for term_numbers, term_rows in zip(self._term_numbers(terms=terms), (self.strict_rows, self.total_rows)):
+            for term_number in term_numbers:
+                rows: Optional[RowSet] = term_rows.get(term_number)
+                if rows is not None:
+                    rows.discard(row)
+                    if not rows:
+                        del term_rows[term_number]
+
+    def update(self, old_agent: dict, new_agent: dict) -> None:
+        """
+        Replace the terms of an updated agent, keeping the row (and so the position in the IDs) of the agent.
+
+        :param old_agent: The agent, as it was added.
+        :param new_agent: The updated agent, with the same bio.agents ID.
+        """
+        row: int = _get_row(agent_rows=self.agent_rows, agent_ids=self.agent_ids, agent_id=new_agent["bioagentsID"])
+        self.remove_terms(row=row, terms=self.extract_terms(old_agent))
+        self.add_terms(row=row, terms=self.extract_terms(new_agent))
+
+    def _term_numbers(self, terms: list) -> tuple:
+        """
+        Get the (deduplicated) term numbers of the terms of an agent, so each row set is only updated once.
+
+        :param terms: The EDAM terms of the term type of the agent.
+        :return: The numbers of the strict terms and the numbers of the terms with all their ancestors.
+        """
+        number = self.term_index.number
+        ancestors: list = self.term_index.ancestors
+        strict_terms: dict = {}
+        total_terms: dict = {}
+        for term in terms:
+            term_number: int = number(term["uri"].replace(EDAM_PREFIX, ""))
+            strict_terms[term_number] = None
+            total_terms.update(dict.fromkeys(ancestors[term_number]))
+        return strict_terms, total_terms
+
+    def merge(self, other: "EdamTermAccumulator") -> None:
+        self.merge_partial(other.partial())
+
+    def partial(self) -> Tuple[List[Optional[str]], Dict[str, RowSet], Dict[str, RowSet]]:
+        # The rows of the terms by the term IDs, as the term numbers may differ between processes, without the term
+        # index
+        term_ids: List[str] = self.term_index.term_ids
+        return (self.agent_ids, {term_ids[term_number]: rows for term_number, rows in self.strict_rows.items()},
+                {term_ids[term_number]: rows for term_number, rows in self.total_rows.items()})
+
+    def merge_partial(self, partial: Tuple[List[Optional[str]], Dict[str, RowSet], Dict[str, RowSet]]) -> None:
+        agent_ids, strict_rows, total_rows = partial
+        # Number the agents of the other accumulator after the agents of this accumulator (the freed rows are not in
+        # the row sets)
+        rows: List[int] = [_get_row(agent_rows=self.agent_rows, agent_ids=self.agent_ids, agent_id=agent_id)
+                           if agent_id is not None else -1 for agent_id in agent_ids]
+        for other_term_rows, term_rows in ((strict_rows, self.strict_rows), (total_rows, self.total_rows)):
+            for term_id, other_rows in other_term_rows.items():
+                term_number: int = self.term_index.number(term_id)
+                merged_rows: Optional[RowSet] = term_rows.get(term_number)
+                if merged_rows is None:
+                    merged_rows = term_rows[term_number] = RowSet()
+                for row in other_rows:
+                    merged_rows.add(rows[row])
+
+    def result(self) -> Dict[str, Any]:
+        term_statistics: defaultdict = defaultdict(
+            lambda: {"name": "", "depth": -1,
+                     "strict_ids": [], "total_ids": [],
+                     "strict_count": 0, "total_count": 0})
+
+        # Loop over the terms
+        empty: RowSet = RowSet()
+        for term_number, total_rows in self.total_rows.items():
+            strict_rows: RowSet = self.strict_rows.get(term_number, empty)
+            term_id: str = self.term_index.term_ids[term_number]
+            term_statistics[term_id]["name"] = self.term_index.names[term_number]
+            term_statistics[term_id]["depth"] = self.term_index.depths[term_number]
+            term_statistics[term_id]["total_count"] = len(total_rows)
+            term_statistics[term_id]["strict_count"] = len(strict_rows)
+
+            if self.output_ids:
+                # The IDs are only decoded from the rows here, in the order the agents were added
+                term_statistics[term_id]["total_ids"] = [self.agent_ids[row] for row in total_rows]
+                term_statistics[term_id]["strict_ids"] = [self.agent_ids[row] for row in strict_rows]
+
+        return {self.term_type: term_statistics}
+
+
+class EdamTermsAccumulator(Accumulator):
+    """
+    Accumulate the statistics for the EDAM terms of several term types.
 
+    The terms of all the term types are extracted in a single walk over the agent, and the agent rows are shared by
+    the term types.
+    """
 
-def _get_branch_terms(term_id: str, term_index: dict) -> list:
+    def __init__(self, index_lists: Dict[str, Union[dict, EdamTermIndex]], output_ids: bool = False):
+        """
+        Create the EDAM terms accumulator.
+
+        :param index_lists: The index lists for the term types to calculate statistics for.
+        :param output_ids: Indicate whether the ids should be in the output. Default: False.
+        """
+        self.accumulators: Dict[str, EdamTermAccumulator] = {}
+        for term_type in TERM_TYPES:
+            for given_term_type, index_list in index_lists.items():
+                if given_term_type.lower() == term_type:
+                    self.accumulators[term_type] = EdamTermAccumulator(term_type=term_type, index_list=index_list,
+                                                                       output_ids=output_ids)
+        if len(self.accumulators) != len(index_lists):
+            raise ValueError(f"The term types {', '.join(index_lists)} are not valid. Must be 'Topic', 'Operation', "
+                             f"'Format', or 'Data'.")
+
+        # Share the agent rows
+        self.agent_rows: Dict[str, int] = {}
+        self.agent_ids: List[Optional[str]] = []
+        for accumulator in self.accumulators.values():
+            accumulator.agent_rows = self.agent_rows
+            accumulator.agent_ids = self.agent_ids
+
+    def add(self, agent: dict) -> None:
+        row: int = _get_row(agent_rows=self.agent_rows, agent_ids=self.agent_ids, agent_id=agent["bioagentsID"])
+        for term_type, terms in _extract_edam_terms(agent).items():
+            if term_type in self.accumulators:
+                self.accumulators[term_type].add_terms(row=row, terms=terms)
+
+    def remove(self, agent: dict) -> None:
+        row: Optional[int] = _free_row(agent_rows=self.agent_rows, agent_ids=self.agent_ids,
+                                       agent_id=agent["bioagentsID"])
+        if row is None:
+            return
+        for term_type, terms in _extract_edam_terms(agent).items():
+            if term_type in self.accumulators:
+                self.accumulators[term_type].remove_terms(row=row, terms=terms)
+        _compact_rows(agent_rows=self.agent_rows, agent_ids=self.agent_ids,
+                      accumulators=list(self.accumulators.values()))
+
+    def update(self, old_agent: dict, new_agent: dict) -> None:
+        """
+        Replace the terms of an updated agent, keeping the row (and so the position in the IDs) of the agent.
+
+        :param old_agent: The agent, as it was added.
+        :param new_agent: The updated agent, with the same bio.agents ID.
+        """
+        row: int = _get_row(agent_rows=self.agent_rows, agent_ids=self.agent_ids, agent_id=new_agent["bioagentsID"])
+        old_terms: Dict[str, list] = _extract_edam_terms(old_agent)
+        for term_type, terms in _extract_edam_terms(new_agent).items():
+            if term_type in self.accumulators:
+                self.accumulators[term_type].remove_terms(row=row, terms=old_terms[term_type])
+                self.accumulators[term_type].add_terms(row=row, terms=terms)
+
+    def result(self) -> Dict[str, Any]:
+        return collect_results(accumulators=list(self.accumulators.values()))
+
+    def merge(self, other: "EdamTermsAccumulator") -> None:
+        self.merge_partial(other.partial())
+
+    def partial(self) -> Dict[str, tuple]:
+        # The agent IDs are shared by the term types, so they are only pickled once
+        return {term_type: accumulator.partial() for term_type, accumulator in self.accumulators.items()}
+
+    def merge_partial(self, partial: Dict[str, tuple]) -> None:
+        for term_type, accumulator in self.accumulators.items():
+            accumulator.merge_partial(partial[term_type])
+
+
+def _get_row(agent_rows: Dict[str, int], agent_ids: List[Optional[str]], agent_id: str) -> int:
     """
-    Get the branch terms.
+    Get the row of an agent, numbering the agent if it is new.
 
-    :param term_id: The term ID.
-    :param term_index: The term index list.
-    :return: The list of branch terms.
+    :param agent_rows: The rows of the numbered agents.
+    :param agent_ids: The IDs of the numbered agents, by row.
+    :param agent_id: The bio.agents ID.
+    :return: The row of the agent.
     """
-    terms: list = []
-    if term_id in term_index:
-        for branch in term_index[term_id]["path"]:
-            terms.extend(branch["key"].split("||"))
-    return terms
+    row: Optional[int] = agent_rows.get(agent_id)
+    if row is None:
+        row = agent_rows[agent_id] = len(agent_ids)
+        agent_ids.append(agent_id)
+    return row
 
 
-def _add_term_info(stats: dict, term_id: str, index_list: dict) -> dict:
+def _free_row(agent_rows: Dict[str, int], agent_ids: List[Optional[str]], agent_id: str) -> Optional[int]:
     """
-    Add term information, if none exists.
+    Free the row of a removed agent.
 
-    :param stats: The statistics dictionary.
-    :param term_id: The EDAM term.
-    :param index_list: The index list.
-    :return: The statistics dictionary.
+    :param agent_rows: The rows of the numbered agents.
+    :param agent_ids: The IDs of the numbered agents, by row, None for the freed rows.
+    :param agent_id: The bio.agents ID.
+    :return: The freed row, or None if the agent is not numbered.
     """
-    if term_id in index_list:
-        if stats[term_id]["name"] == "":
-            stats[term_id]["name"] = index_list[term_id]["name"]
+    row: Optional[int] = agent_rows.pop(agent_id, None)
+    if row is not None:
+        agent_ids[row] = None
+    return row
 
-            # Calculate the term depth
-            path_depths: list = []
-            for path in index_list[term_id]["path"]:
-                path_depths.append(len(path["key"].split("||")))
-            stats[term_id]["depth"] = min(path_depths) - 1  # Ensure topic is depth 0 = Root
-
-    return stats
 
+def _compact_rows(agent_rows: Dict[str, int], agent_ids: List[Optional[str]],
+                  accumulators: List[EdamTermAccumulator]) -> None:
+    """
+    Renumber the rows in the same order, without the freed rows, once more than half of the rows are freed.
 
-def _extract_terms(agents: list, term_type: str) -> dict:
+    :param agent_rows: The rows of the numbered agents, updated in place.
+    :param agent_ids: The IDs of the numbered agents, by row, updated in place.
+    :param accumulators: The accumulators sharing the rows.
     """
-    Extract terms from the agents.
+    if 2 * len(agent_rows) >= len(agent_ids):
+        return
+    # The renumbering keeps the order, so the row sets stay sorted
+    new_rows: List[int] = []
+    live_ids: List[str] = []
+    for agent_id in agent_ids:
+        new_rows.append(len(live_ids))
+        if agent_id is not None:
+            agent_rows[agent_id] = len(live_ids)
+            live_ids.append(agent_id)
+    agent_ids[:] = live_ids
+    for accumulator in accumulators:
+        for term_rows in (accumulator.strict_rows, accumulator.total_rows):
+            for term_number, rows in term_rows.items():
+                term_rows[term_number] = RowSet.from_sorted_rows(new_rows[row] for row in rows)
+
+
+def _get_term_extractor(term_type: str) -> Callable[[dict], list]:
+    """
+    Get the function extracting the terms of the term type from an agent.
 
-    :param agents: The list of agents.
     :param term_type: The term type.
-    :return: The dictionary with the agent ID and the terms.
+    :return: The function extracting the terms from an agent.
     """
     term_type = term_type.capitalize()
 
     if term_type == "Topic":
-        return _extract_edam_topics(agents=agents)
+        return _extract_edam_topics
     elif term_type == "Operation":
-        return _extract_edam_operation(agents=agents)
+        return _extract_edam_operation
     elif term_type == "Format":
-        return _extract_edam_format(agents=agents)
+        return _extract_edam_format
     elif term_type == "Data":
-        return _extract_edam_data(agents=agents)
+        return _extract_edam_data
     else:
         raise ValueError(f"The term type '{term_type}' is not valid. Must be 'Topic', 'Operation', 'Format', or"
                          f"'Data'.")
 
 
-def _extract_edam_topics(agents: list) -> dict:
+def _extract_edam_topics(agent: dict) -> list:
     """
-    Get the EDAM topics for each agent.
+    Get the EDAM topics for an agent.
 
-    :param agents: The list of agents.
-    :return: The dictionary with the agent id and the topics.
+    :param agent: The agent dict.
+    :return: The list with the topics.
     """
-    terms: defaultdict = defaultdict(lambda: [])
+    return list(agent.get("topic", []))
 
-    for agent in agents:
-        terms[agent["bioagentsID"]].extend([topic for topic in agent["topic"]])
 
+def _extract_edam_operation(agent: dict) -> list:
+    """
+    Get the EDAM operations for an agent.
+
+    :param agent: The agent dict.
+    :return: The list with the operations.
+    """
+    terms: list = []
+    for function in agent.get("function", []):
+        if "operation" in function:
+            terms.extend(function["operation"])
     return terms
 
 
-def _extract_edam_operation(agents: list) -> dict:
+def _extract_edam_format(agent: dict) -> list:
     """
-    Get the EDAM operation for each agent.
+    Get the EDAM formats for an agent.
 
-    :param agents: The list of agents.
-    :return: The dictionary with the agent id and the operations.
+    :param agent: The agent dict.
+    :return: The list with the formats.
     """
-    terms: defaultdict = defaultdict(lambda: [])
-
-    for agent in agents:
-        terms[agent["bioagentsID"]].extend(*[function["operation"] for function in agent["function"]])
-
+    terms: list = []
+    for formats in _get_inputs_outputs_info(agent=agent, term_type="format"):
+        terms.extend(formats)
     return terms
 
 
-def _extract_edam_format(agents: list) -> dict:
+def _extract_edam_data(agent: dict) -> list:
     """
-    Get the EDAM format for each agent.
+    Get the EDAM data for an agent.
 
-    :param agents: The list of agents.
-    :return: The dictionary with the agent id and the formats.
+    :param agent: The agent dict.
+    :return: The list with the data.
     """
-    terms: defaultdict = defaultdict(lambda: [])
-
-    for agent in agents:
-        terms[agent["bioagentsID"]].extend(iteragents.chain(*_get_inputs_outputs_info(agent=agent, term_type="format")))
-    return terms
+    return _get_inputs_outputs_info(agent=agent, term_type="data")
 
 
-def _extract_edam_data(agents: list) -> dict:
+def _extract_edam_terms(agent: dict) -> Dict[str, list]:
     """
-    Get the EDAM data for each agent.
+    Get the EDAM terms of all the term types for an agent, in a single walk over the functions.
 
-    :param agents: The list of agents.
-    :return: The dictionary with the agent id and the topics.
+    :param agent: The agent dict.
+    :return: The dictionary with the list of terms of each term type.
     """
-    terms: defaultdict = defaultdict(lambda: [])
-    for agent in agents:
-        terms[agent["bioagentsID"]].extend(_get_inputs_outputs_info(agent=agent, term_type="data"))
-    return terms
+    operations: list = []
+    formats: list = []
+    data: list = []
+
+    for function in agent.get("function", []):
+        if "operation" in function:
+            operations.extend(function["operation"])
+        for key in ("input", "output"):
+            if key in function:
+                for entry in function[key]:
+                    if "data" in entry:
+                        data.append(entry["data"])
+                    if "format" in entry:
+                        formats.extend(entry["format"])
+
+    return {"topic": list(agent.get("topic", [])), "operation": operations, "format": formats, "data": data}
 
 
 def _get_inputs_outputs_info(agent: dict, term_type: str) -> list:
@@ -217,7 +476,7 @@ def _get_inputs_outputs_info(agent: dict, term_type: str) -> list:
     """
     terms: list = []
 
-    for function in agent["function"]:
+    for function in agent.get("function", []):
         if "input" in function:
             for i in function["input"]:
                 if term_type in i:
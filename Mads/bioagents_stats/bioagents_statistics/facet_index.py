@@ -0,0 +1,233 @@
+"""
+Inverted facet indexes for slicing the agents, e.g. into collections and communities.
+
+The FacetIndex maps the values of the facets (the EDAM topics and operations, the collections, communities, nodes,
+agent types and credit names) to the set of rows of the agents having the value, in the order of an AgentIndex.
+A slice of the agents is a boolean combination of these row sets, and the AgentSlice viewing the agents of a slice
+can be given to the statistics functions without copying the agents. The facet indexes can be saved and loaded, so
+they are only built once for a dump; the rows of each value are saved as delta-encoded varints or as a bitmap,
+whichever is smaller, so rare values (e.g. most credit names) take a few bytes.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Union
+
+from ._row_sets import RowSet, decode_rows, encode_rows
+from .agent_index import AgentIndex, AgentSlice
+from .edam_index import EDAM_PREFIX, EdamTermIndex, get_edam_term_index
+from .edam_stats import _extract_edam_operation, _extract_edam_topics
+from .json_backend import load_json
+
+# The facets of the index
+FACETS: List[str] = ["topic", "operation", "collectionID", "iechorCommunity", "iechorNode", "agentType", "credit"]
+
+_FILE_VERSION: int = 2
+
+
+class FacetIndex:
+    """
+    Inverted indexes from the facet values to the rows of the agents.
+
+    The topics and operations are indexed with all their ancestors, when the EDAM index lists are given, so the slice
+    for a term holds the agents annotated with the term or any of its descendants.
+    """
+
+    def __init__(self, agents: Union[AgentIndex, Iterable[dict]],
+                 index_lists: Optional[Dict[str, Union[dict, EdamTermIndex]]] = None,
+                 facets: Optional[Dict[str, Dict[str, RowSet]]] = None):
+        """
+        Create the facet indexes.
+
+        :param agents: The agents. An AgentIndex, or any iterable of raw agents, which is indexed first.
+        :param index_lists: The EDAM index lists for the topics and operations, e.g. {"topic": topic_index_list}.
+            Default: None, the terms are indexed without their ancestors.
+        :param facets: The already built facet indexes, as used by load(). Default: None, build the indexes.
+        """
+        self.agents: AgentIndex = agents if isinstance(agents, AgentIndex) else AgentIndex(agents)
+        self.facets: Dict[str, Dict[str, RowSet]] = facets if facets is not None else self._build(index_lists or {})
+
+        # The rows of the lower case bio.agents IDs
+        self._id_rows: Dict[str, List[int]] = {}
+        for row, agent in enumerate(self.agents):
+            self._id_rows.setdefault(agent.get("bioagentsID", "").lower(), []).append(row)
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def _build(self, index_lists: Dict[str, Union[dict, EdamTermIndex]]) -> Dict[str, Dict[str, RowSet]]:
+        """
+        Build the facet indexes in a single pass over the agents.
+
+        :param index_lists: The EDAM index lists for the topics and operations.
+        :return: The rows for each value of each facet.
+        """
+        term_indexes: Dict[str, EdamTermIndex] = {term_type.lower(): get_edam_term_index(index_list=index_list)
+                                                  for term_type, index_list in index_lists.items()}
+        facets: Dict[str, Dict[str, RowSet]] = {facet: {} for facet in FACETS}
+
+        def add(facet: Dict[str, RowSet], value: str, row: int):
+            rows: Optional[RowSet] = facet.get(value)
+            if rows is None:
+                rows = facet[value] = RowSet()
+            rows.add(row)
+
+        for row, agent in enumerate(self.agents):
+            for term_type, extract_terms in (("topic", _extract_edam_topics), ("operation", _extract_edam_operation)):
+                term_index: Optional[EdamTermIndex] = term_indexes.get(term_type)
+                for term in extract_terms(agent):
+                    if "uri" not in term:
+                        continue
+                    term_id: str = term["uri"].replace(EDAM_PREFIX, "")
+                    if term_index is None:
+                        add(facets[term_type], term_id, row)
+                    else:
+                        for ancestor in term_index.ancestors[term_index.number(term_id)]:
+                            add(facets[term_type], term_index.term_ids[ancestor], row)
+            for facet in ("collectionID", "iechorCommunity", "iechorNode", "agentType"):
+                if facet in agent:
+                    for value in agent[facet]:
+                        add(facets[facet], value, row)
+            for credit in agent.get("credit", ()):
+                if "name" in credit:
+                    add(facets["credit"], credit["name"], row)
+
+        return facets
+
+    def all(self) -> RowSet:
+        """
+        Get the rows of all the agents.
+
+        :return: The row set.
+        """
+        return RowSet.range(len(self.agents))
+
+    def rows(self, facet: str, *values: str) -> RowSet:
+        """
+        Get the rows of the agents having any of the values of a facet.
+
+        :param facet: The facet, one of FACETS.
+        :param values: The values, e.g. the EDAM term IDs for the topics.
+        :return: The (new) row set.
+        """
+        if facet not in self.facets:
+            raise ValueError(f"The facet '{facet}' is not valid. Must be one of {', '.join(FACETS)}.")
+        result: RowSet = RowSet()
+        for value in values:
+            rows: Optional[RowSet] = self.facets[facet].get(value)
+            if rows is not None:
+                # The row sets of the index are never handed out, so changing the result leaves the index intact
+                result = result | rows if result else rows.copy()
+        return result
+
+    def ids(self, agent_ids: Iterable[str]) -> RowSet:
+        """
+        Get the rows of the agents with the bio.agents IDs (case-insensitive).
+
+        :param agent_ids: The bio.agents IDs.
+        :return: The row set.
+        """
+        rows: set = set()
+        for agent_id in agent_ids:
+            rows.update(self._id_rows.get(agent_id.strip().lower(), ()))
+        return RowSet.from_sorted_rows(sorted(rows))
+
+    def query(self, **facet_values: Union[str, Iterable[str]]) -> RowSet:
+        """
+        Get the rows of the agents matching all the facets, e.g. query(collectionID="Proteomics", topic=[...]).
+
+        A list of values matches the agents having any of the values.
+
+        :param facet_values: The value, or list of values, for each facet.
+        :return: The row set.
+        """
+        result: RowSet = self.all()
+        for facet, values in facet_values.items():
+            result = result & self.rows(facet, *([values] if isinstance(values, str) else values))
+        return result
+
+    def select(self, rows: RowSet) -> AgentSlice:
+        """
+        Get the agents at the rows, without copying them.
+
+        :param rows: The row set, e.g. from query().
+        :return: The slice, which can be given to the statistics functions.
+        """
+        return self.agents.select(rows=rows)
+
+    def save(self, path: str) -> None:
+        """
+        Save the facet indexes to a (gzip compressed JSON) file.
+
+        :param path: The path to the file.
+        """
+        content: dict = {
+            "version": _FILE_VERSION,
+            "agents": _hash_agent_ids(self.agents),
+            "facets": {facet: {value: _encode_rows(rows=rows) for value, rows in values.items()}
+                       for facet, values in self.facets.items()}}
+        temp_path: str = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf8") as f:
+            json.dump(content, f, separators=(",", ":"))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str, agents: Union[AgentIndex, Iterable[dict]]) -> "FacetIndex":
+        """
+        Load the facet indexes saved for the same agents.
+
+        :param path: The path to the file.
+        :param agents: The agents the indexes were built for. An AgentIndex, or any iterable of raw agents.
+        :return: The facet index.
+        :raise ValueError: If the file has another version, or the indexes were built for other agents.
+        """
+        agents = agents if isinstance(agents, AgentIndex) else AgentIndex(agents)
+        content: dict = load_json(path=path)
+        if content.get("version") != _FILE_VERSION:
+            raise ValueError(f"The facet indexes in '{path}' have another file version, build them again.")
+        if content.get("agents") != _hash_agent_ids(agents):
+            raise ValueError(f"The facet indexes in '{path}' were not built for these agents.")
+
+        facets: Dict[str, Dict[str, RowSet]] = {}
+        for facet, values in content["facets"].items():
+            facets[facet] = {}
+            for value, encoded_rows in values.items():
+                facets[facet][value] = _decode_rows(content=encoded_rows)
+        return cls(agents=agents, facets=facets)
+
+
+def _hash_agent_ids(agents: AgentIndex) -> str:
+    """
+    Hash the bio.agents IDs and addition dates of the agents, in the order of the index.
+
+    :param agents: The agent index.
+    :return: The hex digest.
+    """
+    sha256 = hashlib.sha256()
+    for agent, addition_epoch in zip(agents, agents.addition_epochs):
+        sha256.update(f"{agent.get('bioagentsID', '')}\t{addition_epoch!r}\n".encode("utf8"))
+    return sha256.hexdigest()
+
+
+def _encode_rows(rows: RowSet) -> str:
+    """
+    Encode the rows of a facet value for the file.
+
+    :param rows: The rows.
+    :return: The base64 of the kind byte (1 for a bitmap, 0 for delta-encoded varints) and the content.
+    """
+    bitmap, content, _ = encode_rows(rows=rows)
+    return base64.b64encode(bytes([bitmap]) + content).decode("ascii")
+
+
+def _decode_rows(content: str) -> RowSet:
+    """
+    Decode the rows of a facet value from the file.
+
+    :param content: The encoded rows.
+    :return: The rows.
+    """
+    data: bytes = base64.b64decode(content)
+    return decode_rows(content=data[1:], bitmap=data[0] == 1)
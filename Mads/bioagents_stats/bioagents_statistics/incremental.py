@@ -0,0 +1,176 @@
+"""
+Statistics maintained under changes of the agents, without recalculating them from all the agents.
+
+The IncrementalStatistics is seeded with the agents of a snapshot, and then applies the additions, updates and
+deletions of agents (e.g. the change log of sync_registry) to the accumulators of the general statistics and the EDAM
+term statistics. Each change only costs the work for the changed agent. The agents must have unique bio.agents IDs,
+as in a snapshot of the registry.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+from ._accumulators import Accumulator, collect_results
+from ._dates import parse_timestamp, time_limit_epoch
+from ._utilities import iter_clean_and_filtered_agents
+from .agent_view import as_agent_view
+from .edam_index import EdamTermIndex
+from .edam_stats import EdamTermsAccumulator, calculate_all_edam_term_statistics
+from .stats import calculate_general_statistics, create_general_accumulators
+
+
+class IncrementalStatistics:
+    """
+    The general statistics, and optionally the EDAM term statistics, maintained under changes of the agents.
+
+    All the registered accumulators of the general statistics must support removing agents.
+    """
+
+    def __init__(self, agents: Iterable[dict] = (),
+                 index_lists: Optional[Dict[str, Union[dict, EdamTermIndex]]] = None,
+                 upper_time_limit: Optional[datetime] = None, output_ids: bool = False):
+        """
+        Create the statistics, seeded with the agents of a snapshot.
+
+        :param agents: The agents of the snapshot. Any iterable of agents is accepted, e.g. a SnapshotStore or the
+            streaming reader. Default: No agents.
+        :param index_lists: The index lists for the term types to calculate EDAM term statistics for, e.g.
+            {"topic": topic_index_list}. Default: None, only the general statistics.
+        :param upper_time_limit: Only count the agents added up to the time limit. Default: None, the time of the
+            creation.
+        :param output_ids: Indicate whether the ids should be in the EDAM term statistics. Default: False.
+        """
+        upper_time_limit = upper_time_limit or datetime.today()
+        self.upper_time_limit: datetime = upper_time_limit
+        self.index_lists: Optional[Dict[str, Union[dict, EdamTermIndex]]] = index_lists
+        self.output_ids: bool = output_ids
+        self._time_limit: float = time_limit_epoch(upper_time_limit)
+
+        self.accumulators: List[Accumulator] = create_general_accumulators()
+        self.edam_accumulator: Optional[EdamTermsAccumulator] = (
+            EdamTermsAccumulator(index_lists=index_lists, output_ids=output_ids) if index_lists else None)
+        self._all_accumulators: List[Accumulator] = self.accumulators + (
+            [self.edam_accumulator] if self.edam_accumulator is not None else [])
+
+        for agent in iter_clean_and_filtered_agents(raw_agents=agents, upper_time_limit=upper_time_limit):
+            for accumulator in self._all_accumulators:
+                accumulator.add(agent)
+
+    def add(self, agent: dict) -> None:
+        """
+        Add a new agent.
+
+        :param agent: The raw agent.
+        """
+        view: Optional[dict] = self._clean(agent)
+        if view is not None:
+            for accumulator in self._all_accumulators:
+                accumulator.add(view)
+
+    def remove(self, agent: dict) -> None:
+        """
+        Remove a deleted agent.
+
+        :param agent: The raw agent, as it was added.
+        """
+        view: Optional[dict] = self._clean(agent)
+        if view is not None:
+            for accumulator in self._all_accumulators:
+                accumulator.remove(view)
+
+    def update(self, old_agent: dict, new_agent: dict) -> None:
+        """
+        Replace an updated agent.
+
+        :param old_agent: The raw agent, as it was added.
+        :param new_agent: The updated raw agent.
+        """
+        old_view: Optional[dict] = self._clean(old_agent)
+        new_view: Optional[dict] = self._clean(new_agent)
+        if old_view is None or new_view is None or old_view["bioagentsID"] != new_view["bioagentsID"]:
+            if old_view is not None:
+                self.remove(old_agent)
+            if new_view is not None:
+                self.add(new_agent)
+            return
+
+        for accumulator in self.accumulators:
+            accumulator.remove(old_view)
+            accumulator.add(new_view)
+        if self.edam_accumulator is not None:
+            # The updated agent keeps its position in the IDs
+            self.edam_accumulator.update(old_agent=old_view, new_agent=new_view)
+
+    def apply_changes(self, changes: Iterable[dict]) -> None:
+        """
+        Apply the changes of a change log, as written by sync_registry.
+
+        :param changes: The changes, e.g. from iter_changes.
+        """
+        for change in changes:
+            if change["change"] == "added":
+                self.add(change["agent"])
+            elif change["change"] == "updated":
+                self.update(old_agent=change["previous"], new_agent=change["agent"])
+            elif change["change"] == "deleted":
+                self.remove(change["previous"])
+            else:
+                raise ValueError(f"The change '{change['change']}' is not valid. Must be 'added', 'updated' or "
+                                 f"'deleted'.")
+
+    def general_statistics(self) -> dict:
+        """
+        Get the general statistics.
+
+        :return: The dictionary with the statistics, as calculate_general_statistics.
+        """
+        stats: dict = {}
+        stats["date"] = self.upper_time_limit.isoformat(timespec="seconds")
+        return collect_results(accumulators=self.accumulators, stats=stats)
+
+    def edam_term_statistics(self) -> dict:
+        """
+        Get the EDAM term statistics.
+
+        :return: The dictionary with the date and the statistics of each term type, as
+            calculate_all_edam_term_statistics.
+        """
+        if self.edam_accumulator is None:
+            raise ValueError("The statistics were created without the EDAM index lists.")
+        statistics: dict = {}
+        statistics["date"] = self.upper_time_limit.isoformat(timespec="seconds")
+        return collect_results(accumulators=[self.edam_accumulator], stats=statistics)
+
+    def verify(self, agents: Iterable[dict]) -> List[str]:
+        """
+        Check the statistics against the statistics recalculated from all the agents, e.g. in tests.
+
+        :param agents: All the current agents, in the order of the snapshot.
+        :return: The keys of the statistics which differ (the term types for the EDAM term statistics), empty if the
+            statistics are consistent.
+        """
+        agents = list(agents)
+        differences: List[str] = []
+        expected: dict = calculate_general_statistics(agents=agents, upper_time_limit=self.upper_time_limit)
+        actual: dict = self.general_statistics()
+        differences.extend(key for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key))
+
+        if self.edam_accumulator is not None:
+            expected = calculate_all_edam_term_statistics(agents=agents, index_lists=self.index_lists,
+                                                          upper_time_limit=self.upper_time_limit,
+                                                          output_ids=self.output_ids)
+            actual = self.edam_term_statistics()
+            differences.extend(key for key in expected.keys() | actual.keys()
+                               if key != "date" and expected.get(key) != actual.get(key))
+        return sorted(differences)
+
+    def _clean(self, agent: dict) -> Optional[dict]:
+        """
+        Clean an agent, and filter it according to the upper time limit.
+
+        :param agent: The raw agent.
+        :return: The cleaned agent, or None if it is not counted.
+        """
+        view = as_agent_view(agent)
+        if view and parse_timestamp(view["additionDate"]) < self._time_limit:
+            return view
+        return None
@@ -0,0 +1,280 @@
+"""
+Opt-in instrumentation of the statistics pipeline: the wall time, CPU time, allocated memory and processed items of
+each stage (e.g. the cleaning, the date filtering, the SPDX license list, the EDAM index) and of each facet.
+
+The instrumentation is enabled for the calls made in a with block:
+
+    with Instrumentation(track_memory=True, callbacks=[logging_callback()]) as instrumentation:
+        stats = calculate_general_statistics(agents)
+    report = instrumentation.report()
+
+Without an active instrumentation, the functions only check once per call that it is disabled, so the per-agent
+loops are unchanged. The cleaning of the agents is lazy (an AgentView), so most of its cost is in the facets
+accessing the fields. The instrumentation is active in the context (thread or asyncio task) entering the with
+block, and not in other threads. The statistics calculated in worker processes (see the parallel module) are not
+instrumented.
+"""
+import logging
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# The instrumentation of the current with block in the current context, None when disabled
+_active: ContextVar[Optional["Instrumentation"]] = ContextVar("bioagents_statistics_instrumentation", default=None)
+
+# The callback receiving the kind ('stage' or 'facet'), the name and the metrics of a measurement
+MetricsCallback = Callable[[str, str, Dict[str, Any]], None]
+
+
+class Instrumentation:
+    """
+    The metrics of the stages and the facets, collected while the instrumentation is active.
+    """
+
+    def __init__(self, track_memory: bool = False, callbacks: Iterable[MetricsCallback] = ()):
+        """
+        Create the instrumentation.
+
+        :param track_memory: Measure the allocated memory with tracemalloc, which slows the calculation down.
+            Default: False.
+        :param callbacks: The functions called with the metrics of each measurement, e.g. logging_callback() or a
+            function forwarding the metrics to a metrics system. Default: None.
+        """
+        self.track_memory: bool = track_memory
+        self.callbacks: List[MetricsCallback] = list(callbacks)
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.facets: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # The tokens restoring the previous instrumentation, one for each (nested) with block
+        self._tokens: List[Token] = []
+        self._started_tracing: bool = False
+
+    def __enter__(self) -> "Instrumentation":
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._tokens.append(_active.set(self))
+        return self
+
+    def __exit__(self, *args):
+        _active.reset(self._tokens.pop())
+        if self._started_tracing and not self._tokens:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def stage(self, name: str, items: int = 0) -> "_Stage":
+        """
+        Measure a stage in a with block. The number of items can be set on the stage in the block.
+
+        :param name: The name of the stage.
+        :param items: The number of processed items. Default: 0.
+        :return: The stage context manager.
+        """
+        return _Stage(instrumentation=self, name=name, items=items)
+
+    def record(self, kind: str, name: str, wall_seconds: float, cpu_seconds: float, allocated_bytes: int,
+               items: int, calls: int = 1) -> None:
+        """
+        Add a measurement to the metrics, and pass it to the callbacks.
+
+        :param kind: The kind of the measurement, 'stage' or 'facet'.
+        :param name: The name of the stage or facet.
+        :param wall_seconds: The wall time in seconds.
+        :param cpu_seconds: The CPU time of the process in seconds.
+        :param allocated_bytes: The (net) allocated memory in bytes, 0 without memory tracking.
+        :param items: The number of processed items.
+        :param calls: The number of calls measured. Default: 1.
+        """
+        metrics: Dict[str, Any] = {"calls": calls, "items": items, "wall_seconds": wall_seconds,
+                                   "cpu_seconds": cpu_seconds, "allocated_bytes": allocated_bytes}
+        with self._lock:
+            totals: Dict[str, Any] = (self.stages if kind == "stage" else self.facets).setdefault(
+                name, {key: 0 for key in metrics})
+            for key, value in metrics.items():
+                totals[key] += value
+        for callback in self.callbacks:
+            callback(kind, name, metrics)
+
+    def report(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Get the structured report of the metrics.
+
+        :return: The dictionary with the metrics of each stage ("stages") and each facet ("facets"): the number of
+            calls and processed items, the wall and CPU time in seconds and the allocated bytes.
+        """
+        with self._lock:
+            return {"stages": {name: dict(metrics) for name, metrics in self.stages.items()},
+                    "facets": {name: dict(metrics) for name, metrics in self.facets.items()}}
+
+    def _allocated(self) -> int:
+        """
+        Get the currently traced memory.
+
+        :return: The traced bytes, or 0 without memory tracking.
+        """
+        return tracemalloc.get_traced_memory()[0] if self.track_memory and tracemalloc.is_tracing() else 0
+
+
+class _Stage:
+    """
+    Context manager measuring a stage.
+    """
+
+    def __init__(self, instrumentation: Instrumentation, name: str, items: int):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.items = items
+
+    def __enter__(self) -> "_Stage":
+        self._allocated: int = self.instrumentation._allocated()
+        self._cpu: float = time.process_time()
+        self._wall: float = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        wall_seconds: float = time.perf_counter() - self._wall
+        cpu_seconds: float = time.process_time() - self._cpu
+        self.instrumentation.record(kind="stage", name=self.name, wall_seconds=wall_seconds, cpu_seconds=cpu_seconds,
+                                    allocated_bytes=self.instrumentation._allocated() - self._allocated,
+                                    items=self.items)
+
+
+class _NullStage:
+    """
+    Context manager doing nothing, for the stages without an active instrumentation.
+    """
+    items: int = 0
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def get_active_instrumentation() -> Optional[Instrumentation]:
+    """
+    Get the active instrumentation.
+
+    :return: The instrumentation, or None if the instrumentation is disabled.
+    """
+    return _active.get()
+
+
+def stage(name: str, items: int = 0):
+    """
+    Measure a stage in a with block, if the instrumentation is active.
+
+    :param name: The name of the stage.
+    :param items: The number of processed items. Default: 0.
+    :return: The stage context manager, on which the number of items can be set.
+    """
+    instrumentation: Optional[Instrumentation] = _active.get()
+    return instrumentation.stage(name=name, items=items) if instrumentation is not None else _NULL_STAGE
+
+
+def logging_callback(logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> MetricsCallback:
+    """
+    Create a callback logging the metrics.
+
+    :param logger: The logger. Default: None, the logger of the package.
+    :param level: The log level. Default: logging.INFO.
+    :return: The callback.
+    """
+    logger = logger or logging.getLogger("bioagents_statistics")
+
+    def log(kind: str, name: str, metrics: Dict[str, Any]) -> None:
+        logger.log(level, "%s %s: %d items in %.3f s (CPU %.3f s), %d bytes allocated", kind, name,
+                   metrics["items"], metrics["wall_seconds"], metrics["cpu_seconds"], metrics["allocated_bytes"])
+
+    return log
+
+
+def accumulate_instrumented(instrumentation: Instrumentation, agents: Iterable, accumulators: list) -> list:
+    """
+    Feed each of the agents to all the accumulators, measuring each accumulator (facet).
+
+    :param instrumentation: The active instrumentation.
+    :param agents: The (cleaned) agents.
+    :param accumulators: The accumulators.
+    :return: The accumulators.
+    """
+    names: List[str] = [_get_facet_name(accumulator) for accumulator in accumulators]
+    adders: list = [accumulator.add for accumulator in accumulators]
+    wall: List[float] = [0.0] * len(accumulators)
+    cpu: List[float] = [0.0] * len(accumulators)
+    allocated: List[int] = [0] * len(accumulators)
+    items: int = 0
+    perf_counter, process_time, get_allocated = time.perf_counter, time.process_time, instrumentation._allocated
+    for agent in agents:
+        items += 1
+        for position, add in enumerate(adders):
+            allocated_start, cpu_start, wall_start = get_allocated(), process_time(), perf_counter()
+            add(agent)
+            wall[position] += perf_counter() - wall_start
+            cpu[position] += process_time() - cpu_start
+            allocated[position] += get_allocated() - allocated_start
+
+    for position, name in enumerate(names):
+        instrumentation.record(kind="facet", name=name, wall_seconds=wall[position], cpu_seconds=cpu[position],
+                               allocated_bytes=allocated[position], items=items)
+    return accumulators
+
+
+def iter_instrumented(instrumentation: Instrumentation, items: Iterable,
+                      steps: Dict[str, Callable[[Any], Any]]) -> Iterator:
+    """
+    Pass the items through the steps, measuring each step as a stage.
+
+    :param instrumentation: The active instrumentation.
+    :param items: The items, e.g. the raw agents.
+    :param steps: The name and function of each step, applied to the result of the previous step. A step returning
+        None drops the item.
+    :return: The generator yielding the results of the last step.
+    """
+    names: List[str] = list(steps)
+    functions: list = list(steps.values())
+    wall: List[float] = [0.0] * len(names)
+    cpu: List[float] = [0.0] * len(names)
+    allocated: List[int] = [0] * len(names)
+    counts: List[int] = [0] * len(names)
+    perf_counter, process_time, get_allocated = time.perf_counter, time.process_time, instrumentation._allocated
+    try:
+        for item in items:
+            for position, function in enumerate(functions):
+                allocated_start, cpu_start, wall_start = get_allocated(), process_time(), perf_counter()
+                item = function(item)
+                wall[position] += perf_counter() - wall_start
+                cpu[position] += process_time() - cpu_start
+                allocated[position] += get_allocated() - allocated_start
+                counts[position] += 1
+                if item is None:
+                    break
+            else:
+                yield item
+    finally:
+        for position, name in enumerate(names):
+            instrumentation.record(kind="stage", name=name, wall_seconds=wall[position], cpu_seconds=cpu[position],
+                                   allocated_bytes=allocated[position], items=counts[position])
+
+
+def _get_facet_name(accumulator: Any) -> str:
+    """
+    Get the name of the facet of an accumulator.
+
+    :param accumulator: The accumulator.
+    :return: The field (or the key) of the accumulator, or the name of its class.
+    """
+    if hasattr(accumulator, "accumulators") and hasattr(accumulator, "agent_rows"):
+        # The EDAM terms of several term types
+        return "edam:" + ",".join(accumulator.accumulators)
+    for attribute in ("field", "term_type", "key"):
+        value: Any = getattr(accumulator, attribute, None)
+        if isinstance(value, str):
+            return f"edam:{value}" if attribute == "term_type" else value
+    return type(accumulator).__name__
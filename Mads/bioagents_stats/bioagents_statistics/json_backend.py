@@ -0,0 +1,190 @@
+"""
+Pluggable JSON decoding for the dumps, the caches and the stores of the package.
+
+The fastest installed backend is used: orjson, then simdjson (pysimdjson), then the standard library json module.
+The backend can be chosen with set_json_backend, or with the BIOAGENTS_STATISTICS_JSON_BACKEND environment variable
+(an unknown or missing backend in the variable is logged, and the json module is used instead).
+Whole files are read through a memory map, which orjson decodes without an intermediate bytes or str copy.
+
+Decoding a dump creates no reference cycles, but the many new containers trigger repeated garbage collections (about
+half of the decoding time of a dump). A top-level script can pause the garbage collector while it loads the dump with
+pause_gc; the package itself does not, as the garbage collector is paused for the whole process.
+"""
+import gc
+import gzip
+import json
+import logging
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+
+# The backends, from the fastest
+JSON_BACKENDS: Tuple[str, ...] = ("orjson", "simdjson", "json")
+# The environment variable choosing the backend
+JSON_BACKEND_VARIABLE: str = "BIOAGENTS_STATISTICS_JSON_BACKEND"
+
+# The decoding functions of the current backend: for bytes or str, and for a buffer (a memoryview)
+_loads: Callable[[Union[bytes, str]], Any] = json.loads
+_loads_buffer: Callable[[memoryview], Any] = lambda view: json.loads(bytes(view))
+_backend: str = "json"
+
+# The number of the paused blocks, and whether the garbage collector was enabled before the first one
+_gc_pauses: int = 0
+_gc_enabled: bool = True
+_gc_lock = threading.Lock()
+
+
+def _import_backend(name: str) -> Tuple[Callable[[Union[bytes, str]], Any], Callable[[memoryview], Any]]:
+    """
+    Import a backend.
+
+    :param name: The name of the backend.
+    :return: The decoding functions for bytes or str, and for a buffer.
+    :raise ImportError: If the backend is not installed.
+    """
+    if name == "orjson":
+        import orjson
+        return orjson.loads, orjson.loads
+    if name == "simdjson":
+        import simdjson
+        return simdjson.loads, lambda view: simdjson.loads(bytes(view))
+    if name == "json":
+        return json.loads, lambda view: json.loads(bytes(view))
+    raise ValueError(f"Unknown JSON backend '{name}', expected one of {', '.join(JSON_BACKENDS)}.")
+
+
+def available_json_backends() -> List[str]:
+    """
+    Get the installed backends.
+
+    :return: The names of the installed backends, from the fastest.
+    """
+    available: List[str] = []
+    for name in JSON_BACKENDS:
+        try:
+            _import_backend(name=name)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def get_json_backend() -> str:
+    """
+    Get the current backend.
+
+    :return: The name of the backend.
+    """
+    return _backend
+
+
+def set_json_backend(name: Optional[str] = None) -> str:
+    """
+    Choose the backend for all the JSON decoding of the package.
+
+    :param name: The name of the backend (see JSON_BACKENDS). Default: None, the fastest installed backend.
+    :return: The name of the chosen backend.
+    :raise ImportError: If the backend is not installed.
+    :raise ValueError: If the backend is unknown.
+    """
+    global _loads, _loads_buffer, _backend
+    if name is None:
+        name = available_json_backends()[0]
+    _loads, _loads_buffer = _import_backend(name=name)
+    _backend = name
+    return name
+
+
+def get_json_loads() -> Callable[[Union[bytes, str]], Any]:
+    """
+    Get the decoding function of the current backend, e.g. to decode many NDJSON lines.
+
+    :return: The function decoding a JSON document from bytes or str.
+    """
+    return _loads
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON document with the current backend.
+
+    :param data: The JSON document.
+    :return: The decoded value.
+    """
+    return _loads(data)
+
+
+def load_json(path: str, encoding: str = "utf8") -> Any:
+    """
+    Decode a JSON file with the current backend, through a memory map.
+
+    :param path: The path to the file. Files ending with '.gz' are read as gzip compressed.
+    :param encoding: The encoding of the file. Default: utf8. Other encodings are decoded with the json module.
+    :return: The decoded value.
+    """
+    if not is_utf8(encoding):
+        with (gzip.open if path.endswith(".gz") else open)(path, "rt", encoding=encoding) as f:
+            return json.load(f)
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            return _loads(f.read())
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # An empty file cannot be mapped; the backend reports the error
+            return _loads(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            return _loads_buffer(view)
+
+
+def is_utf8(encoding: str) -> bool:
+    """
+    Check whether an encoding is UTF-8, the only encoding decoded by all the backends.
+
+    :param encoding: The name of the encoding.
+    :return: True for UTF-8.
+    """
+    return encoding.lower().replace("-", "").replace("_", "") == "utf8"
+
+
+@contextmanager
+def pause_gc() -> Iterator[None]:
+    """
+    Pause the garbage collector in a with block, e.g. while a script loads a dump with load_agents. The garbage
+    collector is enabled again when the last paused block exits, if it was enabled before.
+
+    The garbage collector is paused for the whole process, including the other threads (e.g. a running sync or
+    download), so the functions of the package never pause it: only a top-level script which knows what else runs in
+    the process should.
+    """
+    global _gc_pauses, _gc_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_enabled:
+                gc.enable()
+
+
+def _set_default_json_backend() -> None:
+    """
+    Choose the backend of the environment variable, or the fastest installed backend. A bad backend in the variable
+    must not break importing the package, so the json module is used instead.
+    """
+    name: Optional[str] = os.environ.get(JSON_BACKEND_VARIABLE) or None
+    try:
+        set_json_backend(name=name)
+    except (ImportError, ValueError) as e:
+        logging.getLogger("bioagents_statistics").warning(
+            "Cannot use the JSON backend '%s' of %s, using json instead: %s", name, JSON_BACKEND_VARIABLE, e)
+        set_json_backend(name="json")
+
+
+_set_default_json_backend()
@@ -0,0 +1,181 @@
+"""
+Parallel calculation of the statistics in worker processes.
+
+The agents are split into shards of consecutive agents, and the accumulators for each shard are filled in a worker
+process. The shared data (the term indexes and the SPDX license data) is sent to each worker process once, when it is
+started, and only the partial results of the accumulators (the counts, row sets and IDs) are sent back. The partial
+results of the shards are merged in the order of the shards, so the statistics are identical to the statistics
+calculated in a single process.
+"""
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Union
+
+from ._accumulators import Accumulator, accumulate, collect_results, merge_partials
+from ._spdx_license_parser import LicensesData, parse_license_list, share_license_data
+from ._utilities import iter_clean_and_filtered_agents
+from .edam_index import EdamTermIndex, get_edam_term_index
+from .edam_stats import EdamTermsAccumulator
+from .stats import create_general_accumulators
+
+# The default number of agents in a shard
+SHARD_SIZE: int = 2000
+
+# The factory for the accumulators of the worker process
+_worker_factory: Optional[Callable[[], List[Accumulator]]] = None
+
+
+def calculate_general_statistics_parallel(agents: Iterable[dict], upper_time_limit: Optional[datetime] = None,
+                                          workers: Optional[int] = None, shard_size: int = SHARD_SIZE) -> dict:
+    """
+    Calculate the general statistics in worker processes.
+
+    The accumulators registered for the general statistics must also be registered in the worker processes, which
+    is the case for the accumulators registered at import time.
+
+    :param agents: The list of agents. Any iterable of agents is accepted, e.g. the streaming reader.
+    :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+        Default: None, the time of the call.
+    :param workers: The number of worker processes. Default: None, the number of CPUs. With 1 worker the statistics
+        are calculated in the calling process.
+    :param shard_size: The number of agents in a shard. Default: SHARD_SIZE.
+    :return: The dictionary with the statistics, identical to calculate_general_statistics.
+    """
+    upper_time_limit = upper_time_limit or datetime.today()
+    # The license list is parsed once, and sent to each worker process once
+    accumulators: List[Accumulator] = _run_sharded(agents=agents, factory=create_general_accumulators,
+                                                   upper_time_limit=upper_time_limit, workers=workers,
+                                                   shard_size=shard_size, license_info=parse_license_list())
+
+    stats: dict = {}
+    stats["date"] = upper_time_limit.isoformat(timespec="seconds")
+    return collect_results(accumulators=accumulators, stats=stats)
+
+
+def calculate_all_edam_term_statistics_parallel(agents: Iterable[dict],
+                                                index_lists: Dict[str, Union[dict, EdamTermIndex]],
+                                                upper_time_limit: Optional[datetime] = None,
+                                                output_ids: bool = False, workers: Optional[int] = None,
+                                                shard_size: int = SHARD_SIZE) -> dict:
+    """
+    Calculate the statistics for the EDAM terms of several term types in worker processes.
+
+    :param agents: The agent list. Any iterable of agents is accepted, e.g. the streaming reader.
+    :param index_lists: The index lists for the term types to calculate statistics for, e.g.
+        {"topic": topic_index_list}.
+    :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+        Default: None, the time of the call.
+    :param output_ids: Indicate whether the ids should be in the output. Default: False.
+    :param workers: The number of worker processes. Default: None, the number of CPUs. With 1 worker the statistics
+        are calculated in the calling process.
+    :param shard_size: The number of agents in a shard. Default: SHARD_SIZE.
+    :return: The dictionary with the date and the statistics of each term type, identical to
+        calculate_all_edam_term_statistics.
+    """
+    upper_time_limit = upper_time_limit or datetime.today()
+    # The term indexes are built once, and sent to each worker process once
+    term_indexes: Dict[str, EdamTermIndex] = {term_type: get_edam_term_index(index_list=index_list)
+                                              for term_type, index_list in index_lists.items()}
+    accumulators: List[Accumulator] = _run_sharded(agents=agents, factory=_EdamFactory(term_indexes, output_ids),
+                                                   upper_time_limit=upper_time_limit, workers=workers,
+                                                   shard_size=shard_size)
+
+    statistics: dict = {}
+    statistics["date"] = upper_time_limit.isoformat(timespec="seconds")
+    return collect_results(accumulators=accumulators, stats=statistics)
+
+
+class _EdamFactory:
+    """
+    Picklable factory for the EDAM terms accumulator.
+    """
+
+    def __init__(self, term_indexes: Dict[str, EdamTermIndex], output_ids: bool):
+        self.term_indexes = term_indexes
+        self.output_ids = output_ids
+
+    def __call__(self) -> List[Accumulator]:
+        return [EdamTermsAccumulator(index_lists=self.term_indexes, output_ids=self.output_ids)]
+
+
+def _run_sharded(agents: Iterable[dict], factory: Callable[[], List[Accumulator]], upper_time_limit: datetime,
+                 workers: Optional[int], shard_size: int,
+                 license_info: Optional[LicensesData] = None) -> List[Accumulator]:
+    """
+    Fill the accumulators shard by shard in worker processes, and merge their partial results in the order of the
+    shards.
+
+    Only a limited number of shards is read ahead, so the agents can be streamed.
+
+    :param agents: The agents.
+    :param factory: The function creating the accumulators. Must be picklable.
+    :param upper_time_limit: Only add the agents added up to the time limit.
+    :param workers: The number of worker processes. Default: None, the number of CPUs.
+    :param shard_size: The number of agents in a shard.
+    :param license_info: The SPDX license data to share with the worker processes. Default: None, not shared.
+    :return: The merged accumulators.
+    """
+    workers = workers if workers is not None else os.cpu_count() or 1
+    if workers < 1 or shard_size < 1:
+        raise ValueError("The number of workers and the shard size must be positive.")
+
+    if workers == 1:
+        agents = iter_clean_and_filtered_agents(raw_agents=agents, upper_time_limit=upper_time_limit)
+        return accumulate(agents=agents, accumulators=factory())
+
+    accumulators: List[Accumulator] = factory()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(factory, license_info)) as executor:
+        pending: Deque[Future] = deque()
+        for shard in _iter_shards(agents=agents, shard_size=shard_size):
+            pending.append(executor.submit(_accumulate_shard, shard, upper_time_limit))
+            if len(pending) >= 2 * workers:
+                merge_partials(accumulators=accumulators, partials=pending.popleft().result())
+        while pending:
+            merge_partials(accumulators=accumulators, partials=pending.popleft().result())
+    return accumulators
+
+
+def _iter_shards(agents: Iterable[dict], shard_size: int) -> Iterator[list]:
+    """
+    Split the agents into shards of consecutive agents.
+
+    :param agents: The agents.
+    :param shard_size: The number of agents in a shard.
+    :return: The generator yielding the shards.
+    """
+    iterator: Iterator[dict] = iter(agents)
+    while True:
+        # The raw agents are sent to the workers, instead of the views
+        shard: list = [getattr(agent, "raw", agent) for agent in islice(iterator, shard_size)]
+        if not shard:
+            return
+        yield shard
+
+
+def _init_worker(factory: Callable[[], List[Accumulator]], license_info: Optional[LicensesData]):
+    """
+    Initialise a worker process with the shared data.
+
+    :param factory: The function creating the accumulators, e.g. with the term indexes.
+    :param license_info: The SPDX license data parsed in the parent process, or None.
+    """
+    global _worker_factory
+    _worker_factory = factory
+    if license_info is not None:
+        share_license_data(license_info=license_info)
+
+
+def _accumulate_shard(shard: list, upper_time_limit: datetime) -> List[Any]:
+    """
+    Fill new accumulators with a shard of the agents, in a worker process.
+
+    :param shard: The agents of the shard.
+    :param upper_time_limit: Only add the agents added up to the time limit.
+    :return: The partial results of the accumulators.
+    """
+    agents = iter_clean_and_filtered_agents(raw_agents=shard, upper_time_limit=upper_time_limit)
+    return [accumulator.partial() for accumulator in accumulate(agents=agents, accumulators=_worker_factory())]
@@ -0,0 +1,152 @@
+"""
+Streaming reader for bio.agents dumps.
+
+The dump is a (possibly gzip compressed) JSON array of agents, or an NDJSON file with one agent per line (as written
+by the downloader). The reader yields the agents one at a time, so the full list never has to be held in memory. The
+NDJSON lines are decoded with the JSON backend (see the json_backend module); the JSON array is decoded incrementally
+with the json module. When the full list is needed anyway, load_agents decodes the whole dump with the backend,
+which is several times faster.
+"""
+import gzip
+import json
+from typing import IO, Iterator, List, Union
+
+from .json_backend import get_json_loads, is_utf8, load_json
+
+_CHUNK_SIZE: int = 1 << 16
+_WHITESPACE: str = " \t\n\r"
+_DELIMITERS: str = _WHITESPACE + ",]"
+_NDJSON_EXTENSIONS: tuple = (".ndjson", ".jsonl")
+
+
+def iter_agents(path: str, encoding: str = "utf8") -> Iterator[dict]:
+    """
+    Read the agents from a bio.agents dump one at a time.
+
+    :param path: The path to the dump. Files ending with '.gz' are read as gzip compressed, and files ending with
+        '.ndjson' or '.jsonl' (before '.gz') are read as NDJSON.
+    :param encoding: The encoding of the dump. Default: utf8.
+    :return: The generator yielding the agents.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    ndjson: bool = _is_ndjson(path)
+    # The NDJSON lines are decoded from bytes, without an intermediate str
+    with opener(path, "rb") if ndjson and is_utf8(encoding) else opener(path, "rt", encoding=encoding) as f:
+        yield from iter_ndjson(f) if ndjson else iter_json_array(f)
+
+
+def load_agents(path: str, encoding: str = "utf8") -> List[dict]:
+    """
+    Read all the agents from a bio.agents dump at once, with the JSON backend (see the json_backend module).
+
+    The JSON array is read through a memory map. Unlike iter_agents, the full list of agents is held in memory. A
+    script can load the dump faster by pausing the garbage collector (see json_backend.pause_gc).
+
+    :param path: The path to the dump, as for iter_agents.
+    :param encoding: The encoding of the dump. Default: utf8.
+    :return: The list of the raw agents.
+    """
+    if _is_ndjson(path):
+        return list(iter_agents(path=path, encoding=encoding))
+    agents = load_json(path=path, encoding=encoding)
+    if not isinstance(agents, list):
+        raise ValueError("The bio.agents dump must be a JSON array.")
+    return agents
+
+
+def iter_ndjson(stream: Union[IO[str], IO[bytes]]) -> Iterator[dict]:
+    """
+    Decode the JSON values of an NDJSON text or binary (UTF-8) stream, one per line. Empty lines are skipped.
+
+    :param stream: The text or binary stream.
+    :return: The generator yielding the values.
+    """
+    loads = get_json_loads()
+    for line in stream:
+        if line.strip():
+            yield loads(line)
+
+
+def iter_json_array(stream: IO[str]) -> Iterator[dict]:
+    """
+    Incrementally decode the elements of a JSON array from a text stream.
+
+    :param stream: The text stream positioned at the start of the JSON array.
+    :return: The generator yielding the elements of the array.
+    """
+    decoder = json.JSONDecoder()
+    buffer: str = ""
+    position: int = 0
+    eof: bool = False
+
+    def fill() -> bool:
+        """
+        Read the next chunk into the buffer, dropping the already decoded part.
+
+        :return: False if the end of the stream was reached.
+        """
+        nonlocal buffer, position
+        chunk = stream.read(_CHUNK_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        return chunk != ""
+
+    def skip_whitespace():
+        """
+        Skip the whitespace, reading more data if needed.
+        """
+        nonlocal position, eof
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            eof = not fill()
+
+    skip_whitespace()
+    if position >= len(buffer) or buffer[position] != "[":
+        raise ValueError("The bio.agents dump must be a JSON array.")
+    position += 1
+
+    expect_separator: bool = False
+    while True:
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ValueError("Unexpected end of the bio.agents dump.")
+        if buffer[position] == "]":
+            return
+        if expect_separator:
+            if buffer[position] != ",":
+                raise ValueError(f"Expected ',' or ']' in the bio.agents dump, found {buffer[position]!r}.")
+            position += 1
+            skip_whitespace()
+
+        # Decode the next element, reading more data until the element is complete
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                eof = not fill()
+                continue
+            if not eof and (end == len(buffer) or
+                            (isinstance(element, (int, float)) and buffer[end] not in _DELIMITERS)):
+                # A number cut off by the end of the buffer may continue in the next chunk
+                eof = not fill()
+                continue
+            break
+
+        position = end
+        expect_separator = True
+        yield element
+
+
+def _is_ndjson(path: str) -> bool:
+    """
+    Check whether a dump is an NDJSON file, by its extension.
+
+    :param path: The path to the dump.
+    :return: True for NDJSON.
+    """
+    return path[:-3 if path.endswith(".gz") else None].endswith(_NDJSON_EXTENSIONS)
@@ -0,0 +1,319 @@
+"""
+Versioned archive of registry snapshots, e.g. the monthly dumps, with the differences of the statistics between them.
+
+The archive is a SQLite database. Each distinct agent (by the hash of its content) is stored once, compressed. The
+first snapshot is a base snapshot listing the content hash of every agent; the following snapshots only store a delta
+to the previous snapshot: the content hashes of the added and updated agents, and the deleted agents. A snapshot is
+reconstructed lazily: the list of the content hashes is replayed from the deltas, and the agents are only read while
+they are iterated.
+
+The statistics of the snapshots are sums over the agents, so the difference of the statistics between two snapshots
+is calculated from only the agents which differ between them.
+"""
+import hashlib
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .edam_index import EdamTermIndex
+from .edam_stats import calculate_all_edam_term_statistics
+from .json_backend import loads
+from .stats import calculate_general_statistics
+
+
+class SnapshotArchive:
+    """
+    Archive of registry snapshots, stored as a base snapshot and deltas keyed by the bio.agents ID and content hash.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the archive, creating it if it does not exist.
+
+        :param path: The path to the SQLite database.
+        """
+        self.path: str = path
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, content BLOB NOT NULL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS snapshots (number INTEGER PRIMARY KEY, "
+                                     "name TEXT UNIQUE NOT NULL, base INTEGER NOT NULL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS entries (snapshot INTEGER NOT NULL, "
+                                     "bioagentsID TEXT NOT NULL, hash TEXT)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS entries_snapshot ON entries (snapshot)")
+        # The reconstructed content hashes of the snapshots, by snapshot number
+        self._manifests: Dict[int, Dict[str, str]] = {}
+
+    def __enter__(self) -> "SnapshotArchive":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __contains__(self, name: object) -> bool:
+        return self._number(name) is not None
+
+    def close(self):
+        """
+        Close the archive.
+        """
+        self._connection.close()
+
+    def names(self) -> List[str]:
+        """
+        Get the names of the snapshots.
+
+        :return: The names, in the order the snapshots were added.
+        """
+        return [name for name, in self._connection.execute("SELECT name FROM snapshots ORDER BY number")]
+
+    def add_snapshot(self, name: str, agents: Iterable[dict], base: bool = False) -> dict:
+        """
+        Add a snapshot, stored as the delta to the last snapshot.
+
+        The agents are keyed by their bio.agents ID. An agent which is in the snapshot more than once keeps the first
+        position, and the content of the last occurrence.
+
+        :param name: The name of the snapshot, e.g. 'November_7'.
+        :param agents: The raw agents. Any iterable of agents is accepted, e.g. the streaming reader.
+        :param base: Store the full list of agents instead of a delta, which bounds the replay when reconstructing
+            the following snapshots. Default: False, a delta (the first snapshot is always a base snapshot).
+        :return: The numbers of agents added, updated and deleted relative to the last snapshot.
+        """
+        if name in self:
+            raise ValueError(f"The archive already has a snapshot '{name}'.")
+
+        number: int = self._connection.execute("SELECT COALESCE(MAX(number), 0) + 1 FROM snapshots").fetchone()[0]
+        previous: Dict[str, str] = self._manifest(number - 1) if number > 1 else {}
+        base = base or number == 1
+
+        manifest: Dict[str, str] = {}
+        with self._connection:
+            for agent in agents:
+                agent = getattr(agent, "raw", agent)
+                content: str = json.dumps(agent, ensure_ascii=False)
+                # The hash is of the canonical JSON, so the order of the keys does not matter
+                content_hash: str = hashlib.sha256(json.dumps(agent, ensure_ascii=False, sort_keys=True,
+                                                              separators=(",", ":")).encode("utf8")).hexdigest()
+                self._connection.execute("INSERT OR IGNORE INTO blobs (hash, content) VALUES (?, ?)",
+                                         (content_hash, zlib.compress(content.encode("utf8"))))
+                manifest[agent["bioagentsID"]] = content_hash
+
+            if base:
+                entries: List[Tuple[str, Optional[str]]] = list(manifest.items())
+            else:
+                entries = [(agent_id, content_hash) for agent_id, content_hash in manifest.items()
+                           if previous.get(agent_id) != content_hash]
+                entries.extend((agent_id, None) for agent_id in previous if agent_id not in manifest)
+            self._connection.execute("INSERT INTO snapshots (number, name, base) VALUES (?, ?, ?)",
+                                     (number, name, int(base)))
+            self._connection.executemany("INSERT INTO entries (snapshot, bioagentsID, hash) VALUES (?, ?, ?)",
+                                         [(number, agent_id, content_hash) for agent_id, content_hash in entries])
+
+        # A delta keeps the positions of the previous snapshot and appends the added agents
+        if not base:
+            manifest = self._apply_delta(manifest=dict(previous), number=number)
+        self._manifests[number] = manifest
+        return _count_changes(old=previous, new=manifest)
+
+    def snapshot(self, name: str) -> "ArchivedSnapshot":
+        """
+        Get a snapshot. The agents are only read while they are iterated.
+
+        :param name: The name of the snapshot.
+        :return: The snapshot, which can be given to the statistics functions.
+        """
+        number: Optional[int] = self._number(name)
+        if number is None:
+            raise KeyError(name)
+        return ArchivedSnapshot(archive=self, name=name, manifest=self._manifest(number))
+
+    def diff_statistics(self, old_name: str, new_name: str,
+                        index_lists: Optional[Dict[str, Union[dict, EdamTermIndex]]] = None,
+                        upper_time_limit: Optional[datetime] = None) -> dict:
+        """
+        Calculate how the statistics changed between two snapshots, from only the agents which differ.
+
+        :param old_name: The name of the older snapshot.
+        :param new_name: The name of the newer snapshot.
+        :param index_lists: The index lists for the term types to compare the EDAM term statistics for, e.g.
+            {"topic": topic_index_list}. Default: None, only the general statistics.
+        :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+            Default: None, the time of the call.
+        :return: The dictionary with the numbers of added, updated and deleted agents, the difference of each
+            general statistic ("general", with the structure of calculate_general_statistics) and, for each term
+            type, the difference of the counts of the terms whose counts changed ("edam").
+        """
+        upper_time_limit = upper_time_limit or datetime.today()
+        old: ArchivedSnapshot = self.snapshot(old_name)
+        new: ArchivedSnapshot = self.snapshot(new_name)
+        changed_ids: List[str] = [agent_id for agent_id, content_hash in old.manifest.items()
+                                  if new.manifest.get(agent_id) != content_hash]
+        changed_ids.extend(agent_id for agent_id in new.manifest if agent_id not in old.manifest)
+        old_agents: List[dict] = [old.get(agent_id) for agent_id in changed_ids if agent_id in old.manifest]
+        new_agents: List[dict] = [new.get(agent_id) for agent_id in changed_ids if agent_id in new.manifest]
+
+        diff: dict = {"from": old_name, "to": new_name}
+        diff.update(_count_changes(old=old.manifest, new=new.manifest))
+        diff["date"] = upper_time_limit.isoformat(timespec="seconds")
+        old_stats: dict = calculate_general_statistics(agents=old_agents, upper_time_limit=upper_time_limit)
+        new_stats: dict = calculate_general_statistics(agents=new_agents, upper_time_limit=upper_time_limit)
+        del old_stats["date"], new_stats["date"]
+        diff["general"] = _subtract(new=new_stats, old=old_stats)
+
+        if index_lists:
+            old_terms: dict = calculate_all_edam_term_statistics(agents=old_agents, index_lists=index_lists,
+                                                                 upper_time_limit=upper_time_limit)
+            new_terms: dict = calculate_all_edam_term_statistics(agents=new_agents, index_lists=index_lists,
+                                                                 upper_time_limit=upper_time_limit)
+            diff["edam"] = {term_type: _diff_term_statistics(old=old_terms[term_type], new=new_terms[term_type])
+                            for term_type in new_terms if term_type != "date"}
+        return diff
+
+    def _get_content(self, content_hash: str) -> dict:
+        """
+        Read a stored agent.
+
+        :param content_hash: The content hash of the agent.
+        :return: The raw agent.
+        """
+        content: bytes = self._connection.execute("SELECT content FROM blobs WHERE hash = ?",
+                                                  (content_hash,)).fetchone()[0]
+        return loads(zlib.decompress(content))
+
+    def _number(self, name: object) -> Optional[int]:
+        """
+        Get the number of a snapshot.
+
+        :param name: The name of the snapshot.
+        :return: The number, or None if there is no snapshot with the name.
+        """
+        row: Optional[tuple] = self._connection.execute("SELECT number FROM snapshots WHERE name = ?",
+                                                        (name,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _manifest(self, number: int) -> Dict[str, str]:
+        """
+        Reconstruct the content hashes of the agents of a snapshot, replaying the deltas since the last base snapshot.
+
+        :param number: The number of the snapshot.
+        :return: The content hash for each bio.agents ID, in the order of the snapshot.
+        """
+        if number in self._manifests:
+            return self._manifests[number]
+        base: int = self._connection.execute("SELECT MAX(number) FROM snapshots WHERE base = 1 AND number <= ?",
+                                             (number,)).fetchone()[0]
+        manifest: Dict[str, str] = {}
+        for snapshot in range(base, number + 1):
+            manifest = self._apply_delta(manifest=manifest, number=snapshot)
+        self._manifests[number] = manifest
+        return manifest
+
+    def _apply_delta(self, manifest: Dict[str, str], number: int) -> Dict[str, str]:
+        """
+        Apply the entries of a snapshot to the content hashes of the previous snapshot.
+
+        :param manifest: The content hashes of the previous snapshot, which are updated.
+        :param number: The number of the snapshot.
+        :return: The content hashes of the snapshot.
+        """
+        for agent_id, content_hash in self._connection.execute(
+                "SELECT bioagentsID, hash FROM entries WHERE snapshot = ? ORDER BY rowid", (number,)):
+            if content_hash is None:
+                manifest.pop(agent_id, None)
+            else:
+                manifest[agent_id] = content_hash
+        return manifest
+
+
+class ArchivedSnapshot:
+    """
+    A snapshot of the archive, reading the agents lazily.
+    """
+
+    def __init__(self, archive: SnapshotArchive, name: str, manifest: Dict[str, str]):
+        """
+        Create the snapshot.
+
+        :param archive: The archive.
+        :param name: The name of the snapshot.
+        :param manifest: The content hash for each bio.agents ID, in the order of the snapshot.
+        """
+        self.archive: SnapshotArchive = archive
+        self.name: str = name
+        self.manifest: Dict[str, str] = manifest
+
+    def __len__(self) -> int:
+        return len(self.manifest)
+
+    def __iter__(self) -> Iterator[dict]:
+        for content_hash in self.manifest.values():
+            yield self.archive._get_content(content_hash=content_hash)
+
+    def __repr__(self) -> str:
+        return f"ArchivedSnapshot({self.name!r}, {len(self)} agents)"
+
+    def get(self, agent_id: str) -> Optional[dict]:
+        """
+        Get an agent of the snapshot.
+
+        :param agent_id: The bio.agents ID.
+        :return: The raw agent, or None if it is not in the snapshot.
+        """
+        content_hash: Optional[str] = self.manifest.get(agent_id)
+        return self.archive._get_content(content_hash=content_hash) if content_hash is not None else None
+
+
+def _count_changes(old: Dict[str, str], new: Dict[str, str]) -> dict:
+    """
+    Count the changes of the agents between two snapshots.
+
+    :param old: The content hashes of the older snapshot.
+    :param new: The content hashes of the newer snapshot.
+    :return: The numbers of added, updated and deleted agents.
+    """
+    added: int = sum(1 for agent_id in new if agent_id not in old)
+    updated: int = sum(1 for agent_id, content_hash in new.items()
+                       if agent_id in old and old[agent_id] != content_hash)
+    deleted: int = sum(1 for agent_id in old if agent_id not in new)
+    return {"added": added, "updated": updated, "deleted": deleted}
+
+
+def _subtract(new: Union[int, dict], old: Union[int, dict]) -> Union[int, dict]:
+    """
+    Subtract a statistic of the older agents from the statistic of the newer agents.
+
+    The keys missing on one side (e.g. the unrecognised values of only one of the snapshots) count as 0.
+
+    :param new: The count, or the dictionary of counts, for the newer agents.
+    :param old: The count, or the dictionary of counts, for the older agents.
+    :return: The difference.
+    """
+    if isinstance(new, dict) or isinstance(old, dict):
+        new = new if isinstance(new, dict) else {}
+        old = old if isinstance(old, dict) else {}
+        return {key: _subtract(new=new.get(key, 0), old=old.get(key, 0))
+                for key in list(new) + [key for key in old if key not in new]}
+    return new - old
+
+
+def _diff_term_statistics(old: dict, new: dict) -> dict:
+    """
+    Get the difference of the counts of the EDAM terms.
+
+    :param old: The term statistics for the older agents.
+    :param new: The term statistics for the newer agents.
+    :return: The term name, depth and the difference of the strict and total counts for each term whose counts
+        changed.
+    """
+    diff: dict = {}
+    for term_id in list(old) + [term_id for term_id in new if term_id not in old]:
+        term: dict = new.get(term_id) or old[term_id]
+        strict_count: int = new.get(term_id, {}).get("strict_count", 0) - old.get(term_id, {}).get("strict_count", 0)
+        total_count: int = new.get(term_id, {}).get("total_count", 0) - old.get(term_id, {}).get("total_count", 0)
+        if strict_count or total_count:
+            diff[term_id] = {"name": term["name"], "depth": term["depth"], "strict_count": strict_count,
+                             "total_count": total_count}
+    return diff
@@ -1,424 +1,508 @@
 """
 The script for calculating the different statistics for a given agent list.
 """
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Dict, Union, List
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, Optional, Tuple, Union, List
 
-from ._utilities import clean_and_filter_agent_list
+from ._accumulators import (Accumulator, AgentCountAccumulator, FacetAccumulator, UNRECOGNISED_KEY, accumulate,
+                            collect_results, nested_single_values, nested_values, single_value)
+from ._utilities import is_agent_table, iter_clean_and_filtered_agents
 from ._spdx_license_parser import parse_license_list, LicensesData
+from .instrumentation import stage
+from .vocabularies import VocabularyRegistry, load_vocabularies
 
+# The controlled vocabularies of the biotoolsSchema fields, loaded once from the versioned vocabulary file
+VOCABULARIES: VocabularyRegistry = load_vocabularies()
+TOOL_TYPES: List[str] = VOCABULARIES["agentType"].terms
+OPERATING_SYSTEMS: List[str] = VOCABULARIES["operatingSystem"].terms
+LANGUAGES: List[str] = VOCABULARIES["language"].terms
+MATURITY: List[str] = VOCABULARIES["maturity"].terms
+COSTS: List[str] = VOCABULARIES["cost"].terms
+ACCESSIBILITY: List[str] = VOCABULARIES["accessibility"].terms
+PLATFORMS: List[str] = VOCABULARIES["iechorPlatform"].terms
+NODES: List[str] = VOCABULARIES["iechorNode"].terms
+COMMUNITY: List[str] = VOCABULARIES["iechorCommunity"].terms
+LINK_TYPES: List[str] = VOCABULARIES["linkType"].terms
+DOWNLOAD_TYPES: List[str] = VOCABULARIES["downloadType"].terms
+DOCUMENTATION_TYPES: List[str] = VOCABULARIES["documentationType"].terms
+PUBLICATION_TYPES: List[str] = VOCABULARIES["publicationType"].terms
+CREDIT_ROLE_TYPES: List[str] = VOCABULARIES["creditRoleType"].terms
+RELATION_TYPES: List[str] = VOCABULARIES["relationType"].terms
 
-def calculate_general_statistics(agents: list, upper_time_limit: datetime = datetime.today()):
-    """
-    Calculate the general statistics for a list of agents.
-
-    :param agents: The list of agents.
-    :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
-        Default: datetime.datetime.today()
-    :return: The dictionary with the statistics.
-    """
-    # Clean the list of agents
-    agents = clean_and_filter_agent_list(raw_agents=agents, upper_time_limit=upper_time_limit)
-
-    # Create the dictionary to hold the statistics and calculate the statistics
-    stats: Dict[str, Union[str, int, Dict[str, int]]] = {}
-    stats["date"] = upper_time_limit.isoformat(timespec="seconds")
-    stats["agentCount"] = len(agents)
-
-    stats["hasAgentType"] = len([agent for agent in agents if "agentType" in agent])
-    stats["agentTypeCount"] = sum([len(agent["agentType"]) for agent in agents if "agentType" in agent])
-    stats["agentTypes"] = _calculate_agent_type_statistics(agents=agents)
-
-    stats["hasTopic"] = len([agent for agent in agents if "topic" in agent])
-    stats["topicCount"] = sum([len(agent["topic"]) for agent in agents if "topic" in agent])
-
-    stats["hasOperatingSystem"] = len([agent for agent in agents if "operatingSystem" in agent])
-    stats["operatingSystemCount"] = sum([len(agent["operatingSystem"]) for agent in agents if "operatingSystem" in agent])
-    stats["operatingSystem"] = _calculate_os_statistics(agents=agents)
-
-    stats["hasLanguage"] = len([agent for agent in agents if "language" in agent])
-    stats["languageCount"] = sum([len(agent["language"]) for agent in agents if "language" in agent])
-    stats["languages"] = _calculate_language_statistics(agents=agents)
-
-    stats["hasLicense"] = len([agent for agent in agents if "license" in agent])
-    stats["licenses"] = _calculate_license_statistics(agents=agents)
-
-    stats["hasMaturity"] = len([agent for agent in agents if "maturity" in agent])
-    stats["maturity"] = _calculate_maturity_statistics(agents=agents)
-
-    stats["hasCost"] = len([agent for agent in agents if "cost" in agent])
-    stats["costs"] = _calculate_cost_statistics(agents=agents)
+# The factories for the accumulators of the general statistics, in the order of the statistics fields.
+_GENERAL_ACCUMULATORS: List[Callable[[], Accumulator]] = []
 
-    stats["hasCollection"] = len([agent for agent in agents if "collectionID" in agent])
-    stats["collectionCount"] = sum([len(agent["collectionID"]) for agent in agents if "collectionID" in agent])
 
-    stats["hasCodeAccessibility"] = len([agent for agent in agents if "accessibility" in agent])
-    stats["accessibility"] = _calculate_code_accessibility_statistics(agents=agents)
-
-    stats["hasiEchorPlatform"] = len([agent for agent in agents if "iechorPlatform" in agent])
-    stats["iechorPlatformCount"] = sum([len(agent["iechorPlatform"]) for agent in agents if "iechorPlatform" in agent])
-    stats["iechorPlatform"] = _calculate_iechor_platform_statistics(agents=agents)
-
-    stats["hasiEchorNode"] = len([agent for agent in agents if "iechorNode" in agent])
-    stats["iechorNodeCount"] = sum([len(agent["iechorNode"]) for agent in agents if "iechorNode" in agent])
-    stats["iechorNodes"] = _calculate_iechor_node_statistics(agents=agents)
-
-    stats["hasiEchorCommunity"] = len([agent for agent in agents if "iechorCommunity" in agent])
-    stats["iechorCommunityCount"] = sum([len(agent["iechorCommunity"]) for agent in agents if "iechorCommunity" in agent])
-    stats["iechorCommunity"] = _calculate_iechor_community_statistics(agents=agents)
-
-    stats["hasLinks"] = len([agent for agent in agents if "link" in agent])
-    stats["linkCount"] = sum([len(agent["link"]) for agent in agents if "link" in agent])
-    stats["linkTypes"] = _calculate_link_type_statistics(agents=agents)
-
-    stats["hasDownloads"] = len([agent for agent in agents if "download" in agent])
-    stats["downloadCount"] = sum([len(agent["download"]) for agent in agents if "download" in agent])
-    stats["downloadTypes"] = _calculate_download_type_statistics(agents=agents)
-
-    stats["hasDocumentation"] = len([agent for agent in agents if "documentation" in agent])
-    stats["documentationCount"] = sum([len(agent["documentation"]) for agent in agents if "documentation" in agent])
-    stats["documentationTypes"] = _calculate_documentation_type_statistics(agents=agents)
-
-    stats["hasPublications"] = len([agent for agent in agents if "publication" in agent])
-    stats["publicationCount"] = sum([len(agent["publication"]) for agent in agents if "publication" in agent])
-    stats["publicationTypes"] = _calculate_publication_type_statistics(agents=agents)
-
-    stats["hasCredit"] = len([agent for agent in agents if "credit" in agent])
-    stats["hasCreditRole"] = len([agent for agent in agents if ("credit" in agent and
-                                                             len([role for role in agent["credit"] if
-                                                                  "credit" in agent]) > 0)])
-    stats["creditCount"] = sum([len(agent["credit"]) for agent in agents if "credit" in agent])
-    stats["creditRoleTypes"] = _calculate_credit_role_type_statistics(agents=agents)
-
-    stats["hasRelation"] = len([agent for agent in agents if "relation" in agent])
-    stats["relationCount"] = sum([len(agent["relation"]) for agent in agents if "relation" in agent])
-    stats["relations"] = _calculate_relation_statistics(agents=agents)
-
-    stats["hasBiolib"] = len([agent for agent in agents if "community" in agent])
-    stats["BiolibCount"] = sum([len(agent["community"]) for agent in agents if "community" in agent])
-
-    return stats
-
-
-def _calculate_agent_type_statistics(agents: list) -> dict:
-    """
-    Calculate the agent type statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The agent type statistics.
+def register_general_accumulator(factory: Callable[[], Accumulator]) -> Callable[[], Accumulator]:
     """
-    # TODO: Consider non-hardcoded approach
-    TOOL_TYPES: List[str] = ["Bioinformatics portal", "Command-line agent", "Database portal", "Desktop application",
-                             "Library", "Ontology", "Plug-in", "Script", "SPARQL endpoint", "Suite", "Web application",
-                             "Web API", "Web service", "Workbench", "Workflow"]
-    agent_type_stats: Dict[str, int] = {key: 0 for key in TOOL_TYPES}
+    Register an accumulator for the general statistics.
 
-    for agent_types in [agent["agentType"] for agent in agents if "agentType" in agent]:
-        for agent_type in agent_types:
-            agent_type_stats[agent_type] += 1
+    The fields of the accumulator are added to the statistics after the fields of the already registered
+    accumulators. Can be used as a decorator on an accumulator class. The accumulator can only be left out of a
+    selection of sections or fields (see calculate_general_statistics) if the factory declares the statistics_keys
+    and the field, as the Accumulator classes do.
 
-    return agent_type_stats
+    :param factory: The function (or class) creating a new accumulator.
+    :return: The factory.
+    """
+    _GENERAL_ACCUMULATORS.append(factory)
+    return factory
 
 
-def _calculate_os_statistics(agents: list) -> dict:
+def calculate_general_statistics(agents: Iterable[dict], upper_time_limit: datetime = datetime.today(),
+                                 sections: Optional[Iterable[str]] = None, fields: Optional[Iterable[str]] = None):
     """
-    Calculate the Operating system statistics for the agents.
+    Calculate the general statistics for a list of agents.
 
-    :param agents: The list of agents.
-    :return: The OS statistics.
+    :param agents: The list of agents. Any iterable of agents is accepted, e.g. the streaming reader, or an Arrow
+        agent table (see the columnar module).
+    :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+        Default: datetime.datetime.today()
+    :param sections: Only calculate these statistics keys, e.g. ["licenses", "languages"]. Default: None, all.
+    :param fields: Only calculate the statistics of these agent fields, e.g. ["license", "language"]. Default: None,
+        all. With both sections and fields, the statistics of either are calculated.
+    :return: The dictionary with the statistics.
+    :raise ValueError: If a section or field is unknown.
     """
-    # TODO: Consider non-hardcoded approach
-    OPERATING_SYSTEMS: List[str] = ["Mac", "Linux", "Windows"]
-    os_stats: Dict[str, int] = {key: 0 for key in OPERATING_SYSTEMS}
+    with stage("calculate_general_statistics") as measured:
+        accumulators: List[Accumulator] = create_general_accumulators(sections=sections, fields=fields)
+        stats: Dict[str, Union[str, int, Dict[str, int]]] = _calculate_general_statistics(
+            agents=agents, upper_time_limit=upper_time_limit, accumulators=accumulators)
+        measured.items = stats.get("agentCount", 0)
+        if sections is not None and fields is None:
+            stats = _select_sections(stats=stats, sections=sections)
+        return stats
 
-    for systems in [agent["operatingSystem"] for agent in agents if "operatingSystem" in agent]:
-        for system in systems:
-            os_stats[system] += 1
 
-    return os_stats
-
-
-def _calculate_language_statistics(agents: list) -> dict:
+def _calculate_general_statistics(agents: Iterable[dict], upper_time_limit: datetime,
+                                  accumulators: List[Accumulator]) -> dict:
     """
-    Calculate the language statistics for the agents.
+    Calculate the general statistics of the accumulators.
 
-    :param agents: The list of agents.
-    :return: The language statistics.
+    :param agents: The list of agents, or an Arrow agent table.
+    :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+    :param accumulators: The new accumulators.
+    :return: The dictionary with the date and the statistics of the accumulators.
     """
-    # TODO: Consider non-hardcoded approach
-    LANGUAGES: List[str] = ["ActionScript", "Ada", "AppleScript", "Assembly language", "AWK", "Bash", "C", "C#", "C++",
-                            "COBOL", "ColdFusion", "CWL", "D", "Delphi", "Dylan", "Eiffel", "Elm", "Forth", "Fortran",
-                            "Groovy", "Haskell", "Icarus", "Java", "JavaScript", "JSP", "Julia", "LabVIEW", "Lisp",
-                            "Lua", "Maple", "Mathematica", "MATLAB", "MLXTRAN", "NMTRAN", "OCaml", "Pascal", "Perl",
-                            "PHP", "Prolog", "PyMOL", "Python", "R", "Racket", "REXX", "Ruby", "SAS", "Scala", "Scheme",
-                            "Shell", "Smalltalk", "SQL", "Turing", "Verilog", "VHDL", "Visual Basic", "XAML", "Other"]
-    language_stats: Dict[str, int] = {key: 0 for key in LANGUAGES}
-
-    for languages in [agent["language"] for agent in agents if "language" in agent]:
-        for language in languages:
-            language_stats[language] += 1
+    if is_agent_table(agents):
+        # Imported here, as the columnar module depends on this module
+        from .columnar import calculate_general_statistics_columnar
+        return calculate_general_statistics_columnar(table=agents, upper_time_limit=upper_time_limit,
+                                                     accumulators=accumulators)
 
-    return language_stats
+    # Clean the agents while they are consumed
+    agents = iter_clean_and_filtered_agents(raw_agents=agents, upper_time_limit=upper_time_limit)
 
+    # Create the dictionary to hold the statistics and calculate the statistics in a single pass
+    stats: dict = {}
+    stats["date"] = upper_time_limit.isoformat(timespec="seconds")
 
-def _calculate_license_statistics(agents: list) -> dict:
-    """
-    Calculate the license statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The license statistics.
-    """
-    license_info: LicensesData = parse_license_list()
-
-    LICENSE_TYPES: List[str] = ["OSIApproved", "FSFApproved", "Freeware", "Proprietary", "Other", "NoLicense",
-                                "DeprecatedIdentifier"] + license_info.licenses_list
-    OSI_APPROVED_LICENSES: List[str] = license_info.osi_approved_licenses
-    FSF_APPROVED_LICENSES: List[str] = license_info.fsf_approved_licenses
-    DEPRECATED_LICENSE_IDENTIFIERS: List[str] = license_info.deprecated_licenses
+    accumulate(agents=agents, accumulators=accumulators)
+    return collect_results(accumulators=accumulators, stats=stats)
+
+
+class LazyGeneralStatistics(Mapping):
+    """
+    The general statistics as a read-only dictionary, calculating each section on first access and caching it.
+
+    Only the accumulators of the sections which are accessed are computed, e.g. the SPDX license list is only loaded
+    if the license statistics are accessed. Each access to sections which are not calculated yet is a pass over the
+    agents, so the agents must be iterable several times (e.g. a list, an AgentIndex or an Arrow agent table, not
+    the streaming reader); calculate() computes several sections in a single pass. Iterating over the statistics
+    calculates all of them, as does accessing the unrecognised values (UNRECOGNISED_KEY), which any facet may report.
+    The sections of the accumulators registered without declaring their statistics keys are calculated on the first
+    access to a section which no declared accumulator reports.
+    """
+
+    def __init__(self, agents: Iterable[dict], upper_time_limit: Optional[datetime] = None):
+        """
+        Create the lazy statistics, without calculating anything.
+
+        :param agents: The list of agents, or an Arrow agent table.
+        :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+            Default: None, the time of the creation.
+        """
+        upper_time_limit = upper_time_limit or datetime.today()
+        self.agents: Iterable[dict] = agents
+        self.upper_time_limit: datetime = upper_time_limit
+        self.stats: dict = {"date": upper_time_limit.isoformat(timespec="seconds")}
+        # The factories of the accumulators which are not computed yet
+        self._factories: List[Callable[[], Accumulator]] = list(_GENERAL_ACCUMULATORS)
+
+    def __getitem__(self, section: str) -> Any:
+        self._calculate_section(section=section)
+        return self.stats[section]
+
+    def __contains__(self, section: object) -> bool:
+        if any(section in (getattr(factory, "statistics_keys", None) or ()) for factory in self._factories):
+            return True
+        self._calculate_section(section=section)
+        return section in self.stats
+
+    def __iter__(self) -> Iterator[str]:
+        self.calculate()
+        return iter(self.stats)
+
+    def __len__(self) -> int:
+        self.calculate()
+        return len(self.stats)
+
+    def calculate(self, *sections: str) -> None:
+        """
+        Calculate the sections which are not calculated yet, in a single pass over the agents.
+
+        :param sections: The statistics keys, e.g. "licenses" and "languages". Default: All the sections.
+        :raise ValueError: If a section is unknown.
+        """
+        factories: List[Callable[[], Accumulator]] = self._factories
+        # Any of the facets may report unrecognised values, so all the sections are calculated for them
+        if sections and UNRECOGNISED_KEY not in sections:
+            sections = tuple(section for section in sections if section not in self.stats)
+            if not sections:
+                return
+            factories = _select_factories(factories=self._factories, sections=sections)
+        self._calculate_factories(factories=factories)
+
+    def _calculate_section(self, section: object) -> None:
+        """
+        Calculate a section on its first access. The unrecognised values are complete once all the sections are
+        calculated, and the sections of the undeclared accumulators are only known once they are calculated.
+
+        :param section: The statistics key.
+        """
+        if section == UNRECOGNISED_KEY:
+            self.calculate()
+        elif section not in self.stats:
+            if any(section in (getattr(factory, "statistics_keys", None) or ()) for factory in self._factories):
+                self.calculate(section)
+            else:
+                self._calculate_factories(factories=[factory for factory in self._factories
+                                                     if getattr(factory, "statistics_keys", None) is None])
+
+    def _calculate_factories(self, factories: List[Callable[[], Accumulator]]) -> None:
+        """
+        Calculate the sections of accumulators which are not calculated yet, in a single pass over the agents.
+
+        :param factories: The factories of the accumulators.
+        """
+        if not factories:
+            return
+
+        stats: dict = _calculate_general_statistics(agents=self.agents, upper_time_limit=self.upper_time_limit,
+                                                    accumulators=[factory() for factory in factories])
+        self._factories = [factory for factory in self._factories if factory not in factories]
+        unrecognised: Dict[str, Dict[str, int]] = self.stats.pop(UNRECOGNISED_KEY, {})
+        unrecognised.update(stats.pop(UNRECOGNISED_KEY, {}))
+        # Keep the statistics in the order of the registered accumulators
+        self.stats.update(stats)
+        order: List[str] = ["date"] + [key for factory in _GENERAL_ACCUMULATORS
+                                       for key in (getattr(factory, "statistics_keys", None) or ())]
+        self.stats = {key: self.stats[key] for key in sorted(self.stats, key=lambda key: (
+            order.index(key) if key in order else len(order)))}
+        if unrecognised:
+            self.stats[UNRECOGNISED_KEY] = unrecognised
+
+    def to_dict(self) -> dict:
+        """
+        Calculate all the statistics.
+
+        :return: The dictionary with the statistics, as calculate_general_statistics.
+        """
+        self.calculate()
+        return dict(self.stats)
+
+
+def calculate_grouped_general_statistics(agents: Iterable[dict], group_by: str,
+                                         upper_time_limit: Optional[datetime] = None) -> dict:
+    """
+    Calculate the general statistics for every value of a grouping field, e.g. for every collection, in a single pass.
+
+    An agent is in the group of each of the values of the field, e.g. of each of its collections.
+
+    :param agents: The list of agents. Any iterable of agents is accepted, e.g. the streaming reader, or an Arrow
+        agent table.
+    :param group_by: The grouping field, e.g. 'collectionID', 'iechorCommunity' or 'iechorNode'. Both fields
+        holding a list of values and fields holding a single value are accepted.
+    :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+        Default: None, the time of the call.
+    :return: The dictionary with the statistics for all the agents ("total") and the dictionary with the statistics
+        for each group value, sorted by the value ("groups").
+    """
+    upper_time_limit = upper_time_limit or datetime.today()
+    if is_agent_table(agents):
+        # Imported here, as the columnar module depends on this module
+        from .columnar import iter_table_agents
+        agents = iter_table_agents(table=agents, upper_time_limit=upper_time_limit)
+    else:
+        agents = iter_clean_and_filtered_agents(raw_agents=agents, upper_time_limit=upper_time_limit)
+
+    total_accumulators: List[Accumulator] = create_general_accumulators()
+    total_adders: list = [accumulator.add for accumulator in total_accumulators]
+    group_accumulators: Dict[str, List[Accumulator]] = {}
+    group_adders: Dict[str, list] = {}
+    for agent in agents:
+        for add in total_adders:
+            add(agent)
+        if group_by not in agent:
+            continue
+        values = agent[group_by]
+        # Each agent is only added once to a group
+        for value in dict.fromkeys(values) if isinstance(values, tuple) else (values,):
+            adders: Optional[list] = group_adders.get(value)
+            if adders is None:
+                group_accumulators[value] = create_general_accumulators()
+                adders = group_adders[value] = [accumulator.add for accumulator in group_accumulators[value]]
+            for add in adders:
+                add(agent)
+
+    date: str = upper_time_limit.isoformat(timespec="seconds")
+    return {"total": collect_results(accumulators=total_accumulators, stats={"date": date}),
+            "groups": {value: collect_results(accumulators=group_accumulators[value], stats={"date": date})
+                       for value in sorted(group_accumulators)}}
+
+
+def create_general_accumulators(sections: Optional[Iterable[str]] = None,
+                                fields: Optional[Iterable[str]] = None) -> List[Accumulator]:
+    """
+    Create new instances of the registered accumulators for the general statistics.
+
+    :param sections: Only create the accumulators of these statistics keys. Default: None, all.
+    :param fields: Only create the accumulators of these agent fields. Default: None, all.
+    :return: The accumulators, in the order of the statistics fields.
+    :raise ValueError: If a section or field is unknown.
+    """
+    factories: List[Callable[[], Accumulator]] = _GENERAL_ACCUMULATORS
+    if sections is not None or fields is not None:
+        factories = _select_factories(factories=factories, sections=sections, fields=fields)
+    return [factory() for factory in factories]
+
+
+def _select_factories(factories: List[Callable[[], Accumulator]], sections: Optional[Iterable[str]] = None,
+                      fields: Optional[Iterable[str]] = None) -> List[Callable[[], Accumulator]]:
+    """
+    Select the accumulator factories of sections or fields. The factories which do not declare their statistics keys
+    and field are always selected, but the sections and fields must be declared by one of the factories.
+
+    :param factories: The accumulator factories.
+    :param sections: The statistics keys. Default: None.
+    :param fields: The agent fields. Default: None.
+    :return: The selected factories.
+    :raise ValueError: If a section or field is unknown.
+    """
+    sections = set(sections or ())
+    fields = set(fields or ())
+    unknown: List[str] = [section for section in sections if section != "date" and not any(
+        section in (getattr(factory, "statistics_keys", None) or ()) for factory in _GENERAL_ACCUMULATORS)]
+    unknown += [field for field in fields
+                if not any(getattr(factory, "field", None) == field for factory in _GENERAL_ACCUMULATORS)]
+    if unknown:
+        raise ValueError(f"Unknown statistics sections or fields: {', '.join(sorted(unknown))}.")
+
+    return [factory for factory in factories if getattr(factory, "statistics_keys", None) is None or
+            sections.intersection(factory.statistics_keys) or getattr(factory, "field", None) in fields]
+
+
+def _select_sections(stats: dict, sections: Iterable[str]) -> dict:
+    """
+    Select sections of the statistics.
+
+    :param stats: The statistics.
+    :param sections: The statistics keys.
+    :return: The date and the sections, with the unrecognised values of the sections.
+    """
+    sections = set(sections) | {"date"}
+    selected: dict = {key: value for key, value in stats.items() if key in sections}
+    unrecognised: Dict[str, Dict[str, int]] = {key: values for key, values in stats.get(UNRECOGNISED_KEY, {}).items()
+                                               if key in sections}
+    if unrecognised:
+        selected[UNRECOGNISED_KEY] = unrecognised
+    return selected
+
+
+class LicenseAccumulator(Accumulator):
+    """
+    Accumulate the license statistics for the agents.
+    """
+    statistics_keys: Tuple[str, ...] = ("hasLicense", "licenses")
+    field: str = "license"
+
+    def __init__(self, license_info: LicensesData = None):
+        """
+        Create the license accumulator.
+
+        :param license_info: The SPDX license data. Default: The parsed SPDX license list.
+        """
+        license_info = parse_license_list() if license_info is None else license_info
+
+        self.license_types: List[str] = ["OSIApproved", "FSFApproved", "Freeware", "Proprietary", "Other",
+                                         "NoLicense", "DeprecatedIdentifier"] + license_info.licenses_list
+        self.osi_approved_licenses: FrozenSet[str] = license_info.osi_approved_set
+        self.fsf_approved_licenses: FrozenSet[str] = license_info.fsf_approved_set
+        self.deprecated_license_identifiers: FrozenSet[str] = license_info.deprecated_set
+
+        self.has_count = 0
+        self.license_stats: Dict[str, int] = {key: 0 for key in self.license_types}
 
-    license_stats: Dict[str, int] = {key: 0 for key in LICENSE_TYPES}
+    def add(self, agent: dict) -> None:
+        if "license" not in agent:
+            return
+        licens = agent["license"]
+        license_stats = self.license_stats
 
-    for licens in [agent["license"] for agent in agents if "license" in agent]:
-        if licens in LICENSE_TYPES:
+        self.has_count += 1
+        if licens in license_stats:
             license_stats[licens] += 1
         elif licens == "Not licensed":
             license_stats["NoLicense"] += 1
-        if licens in OSI_APPROVED_LICENSES:
+        if licens in self.osi_approved_licenses:
             # Check if it is an OSI approved license
             license_stats["OSIApproved"] += 1
-        if licens in FSF_APPROVED_LICENSES:
+        if licens in self.fsf_approved_licenses:
             # Check if it is an FSF approved license
             license_stats["FSFApproved"] += 1
-        if licens in DEPRECATED_LICENSE_IDENTIFIERS:
+        if licens in self.deprecated_license_identifiers:
             # Check if the license has a deprecated license identifier
             license_stats["DeprecatedIdentifier"] += 1
-    return license_stats
-
-
-def _calculate_maturity_statistics(agents: list) -> dict:
-    """
-    Calculate the code accessibility statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The code accessibility language statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    MATURITY: List[str] = ["Emerging", "Mature", "Legacy"]
-    maturity_stats: Dict[str, int] = {key: 0 for key in MATURITY}
-
-    for maturity in [agent["maturity"] for agent in agents if "maturity" in agent]:
-        maturity_stats[maturity] += 1
-
-    return maturity_stats
-
-
-def _calculate_cost_statistics(agents: list) -> dict:
-    """
-    Calculate the cost statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The cost statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    COSTS: List[str] = ["Free of charge", "Free of charge (with restrictions)", "Commercial"]
-    cost_stats: Dict[str, int] = {key: 0 for key in COSTS}
-
-    for cost in [agent["cost"] for agent in agents if "cost" in agent]:
-        cost_stats[cost] += 1
-
-    return cost_stats
-
-
-def _calculate_code_accessibility_statistics(agents: list) -> dict:
-    """
-    Calculate the code accessibility statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The code accessibility language statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    ACCESSIBILITY: List[str] = ["Restricted access", "Open access", "Open access (with restrictions)"]
-    accessibility_stats: Dict[str, int] = {key: 0 for key in ACCESSIBILITY}
-
-    for accessibility in [agent["accessibility"] for agent in agents if "accessibility" in agent]:
-        accessibility_stats[accessibility] += 1
-
-    return accessibility_stats
-
-
-def _calculate_iechor_platform_statistics(agents: list) -> dict:
-    """
-    Calculate the IECHOR platform statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The IECHOR platform statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    PLATFORMS: List[str] = ["Data", "Agents", "Compute", "Interoperability", "Training"]
-    platform_stats: Dict[str, int] = {key: 0 for key in PLATFORMS}
-
-    for platforms in [agent["iechorPlatform"] for agent in agents if "iechorPlatform" in agent]:
-        for platform in platforms:
-            platform_stats[platform] += 1
-
-    return platform_stats
-
-
-def _calculate_iechor_node_statistics(agents: list) -> dict:
-    """
-    Calculate the IECHOR node statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The IECHOR node statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    NODES: List[str] = ["Belgium", "Czech Republic", "Denmark", "EMBL", "Estonia", "Finland", "France", "Germany",
-                        "Greece", "Hungary", "Ireland", "Israel", "Italy", "Luxembourg", "Netherlands", "Norway",
-                        "Portugal", "Slovenia", "Spain", "Sweden", "Switzerland", "UK"]
-    node_stats: Dict[str, int] = {key: 0 for key in NODES}
-
-    for nodes in [agent["iechorNode"] for agent in agents if "iechorNode" in agent]:
-        for node in nodes:
-            node_stats[node] += 1
-
-    return node_stats
-
-
-def _calculate_iechor_community_statistics(agents: list) -> dict:
-    """
-    Calculate the IECHOR community statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The IECHOR community statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    COMMUNITY: List[str] = ["3D-BioInfo", "Federated Human Data", "Galaxy", "Human Copy Number Variation",
-                            "Intrinsically Disordered Proteins", "Marine Metagenomics", "Metabolomics",
-                            "Microbial Biotechnology", "Plant Sciences", "Proteomics", "Rare Diseases"]
-    community_stats: Dict[str, int] = {key: 0 for key in COMMUNITY}
-
-    for communities in [agent["iechorCommunity"] for agent in agents if "iechorCommunity" in agent]:
-        for community in communities:
-            community_stats[community] += 1
-
-    return community_stats
-
-
-def _calculate_link_type_statistics(agents: list) -> dict:
-    """
-    Calculate the link type statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The link type statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    LINK_TYPES: List[str] = ["Discussion forum", "Galaxy service", "Helpdesk", "Issue tracker", "Mailing list",
-                             "Mirror", "Software catalogue", "Repository", "Social media", "Service",
-                             "Technical monitoring", "Other"]
-    link_type_stats: Dict[str, int] = {key: 0 for key in LINK_TYPES}
-
-    for links in [agent["link"] for agent in agents if "link" in agent]:
-        for link in links:
-            for link_type in [t for t in link["type"]]:
-                link_type_stats[link_type] += 1
-
-    return link_type_stats
 
+    def remove(self, agent: dict) -> None:
+        if "license" not in agent:
+            return
+        licens = agent["license"]
+        license_stats = self.license_stats
 
-def _calculate_download_type_statistics(agents: list) -> dict:
-    """
-    Calculate the download type statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The download type statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    DOWNLOAD_TYPES: List[str] = ["API specification", "Biological data", "Binaries", "Command-line specification",
-                                 "Container file", "Icon", "Screenshot", "Source code", "Software package", "Test data",
-                                 "Test script", "Agent wrapper (CWL)", "Agent wrapper (Galaxy)", "Agent wrapper (Taverna)",
-                                 "Agent wrapper (Other)", "VM image", "Downloads page", "Other"]
-    download_type_stats: Dict[str, int] = {key: 0 for key in DOWNLOAD_TYPES}
-
-    for downloads in [agent["download"] for agent in agents if "download" in agent]:
-        for download in downloads:
-            download_type_stats[download["type"]] += 1
-
-    return download_type_stats
-
-
-def _calculate_documentation_type_statistics(agents: list) -> dict:
-    """
-    Calculate the documentation type statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The documentation type statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    DOCUMENTATION_TYPES: List[str] = ["API documentation", "Citation instructions", "Code of conduct",
-                                      "Command-line options", "Contributions policy", "FAQ", "General",
-                                      "Governance", "Installation instructions", "Quick start guide", "Release notes",
-                                      "Terms of use", "Training material", "User manual", "Other"]
-    documentation_type_stats: Dict[str, int] = {key: 0 for key in DOCUMENTATION_TYPES}
-
-    for documentations in [agent["documentation"] for agent in agents if "documentation" in agent]:
-        for documentation in documentations:
-            for link_type in [t for t in documentation["type"]]:
-                documentation_type_stats[link_type] += 1
-
-    return documentation_type_stats
-
-
-def _calculate_publication_type_statistics(agents: list) -> dict:
-    """
-    Calculate the publication type statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The publication type statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    PUBLICATION_TYPES: List[str] = ["Primary", "Method", "Usage", "Benchmarking study", "Review", "Other"]
-    publication_type_stats: Dict[str, int] = {key: 0 for key in PUBLICATION_TYPES}
-
-    for publications in [agent["publication"] for agent in agents if "publication" in agent]:
-        for publication in [pub for pub in publications if "type" in pub]:
-            for pub_type in [t for t in publication["type"]]:
-                publication_type_stats[pub_type] += 1
-
-    return publication_type_stats
-
-
-def _calculate_credit_role_type_statistics(agents: list) -> dict:
-    """
-    Calculate the credit role type statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The credit role type statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    CREDIT_ROLE_TYPES: List[str] = ["Developer", "Maintainer", "Provider", "Documentor", "Contributor", "Support",
-                                    "Primary contact"]
-    credit_role_type_stats: Dict[str, int] = {key: 0 for key in CREDIT_ROLE_TYPES}
-
-    for creds in [agent["credit"] for agent in agents if "credit" in agent]:
-        for credit in creds:
-            for credit_type in [t for t in credit["typeRole"] if "typeRole" in credit]:
-                credit_role_type_stats[credit_type] += 1
-    return credit_role_type_stats
-
-
-def _calculate_relation_statistics(agents: list) -> dict:
-    """
-    Calculate the relation statistics for the agents.
-
-    :param agents: The list of agents.
-    :return: The relation statistics.
-    """
-    # TODO: Consider non-hardcoded approach
-    RELATION_TYPES: List[str] = ["isNewVersionOf", "hasNewVersion", "uses", "usedBy", "includes", "includedIn"]
-    relation_stats: Dict[str, int] = {key: 0 for key in RELATION_TYPES}
+        self.has_count -= 1
+        if licens in license_stats:
+            license_stats[licens] -= 1
+        elif licens == "Not licensed":
+            license_stats["NoLicense"] -= 1
+        if licens in self.osi_approved_licenses:
+            license_stats["OSIApproved"] -= 1
+        if licens in self.fsf_approved_licenses:
+            license_stats["FSFApproved"] -= 1
+        if licens in self.deprecated_license_identifiers:
+            license_stats["DeprecatedIdentifier"] -= 1
 
-    for relations in [agent["relation"] for agent in agents if "relation" in agent]:
-        for relation in relations:
-            relation_stats[relation["type"]] += 1
+    def result(self) -> Dict[str, Any]:
+        return {"hasLicense": self.has_count, "licenses": dict(self.license_stats)}
 
-    return relation_stats
+    def merge(self, other: "LicenseAccumulator") -> None:
+        self.merge_partial(other.partial())
+
+    def partial(self) -> Tuple[int, Dict[str, int]]:
+        # Only the counts, without the license data
+        return self.has_count, {license_type: count for license_type, count in self.license_stats.items() if count}
+
+    def merge_partial(self, partial: Tuple[int, Dict[str, int]]) -> None:
+        has_count, license_stats = partial
+        self.has_count += has_count
+        for license_type, count in license_stats.items():
+            self.license_stats[license_type] += count
+
+
+class CreditAccumulator(FacetAccumulator):
+    """
+    Accumulate the credit statistics for the agents.
+    """
+    statistics_keys: Tuple[str, ...] = ("hasCredit", "hasCreditRole", "creditCount", "creditRoleTypes")
+    field: str = "credit"
+
+    def __init__(self):
+        super().__init__(field="credit", has_key="hasCredit", count_key="creditCount", types_key="creditRoleTypes",
+                         vocabulary=VOCABULARIES["creditRoleType"], values=nested_values("typeRole"))
+        self.has_role_count = 0
+
+    def add(self, agent: dict) -> None:
+        super().add(agent)
+        if "credit" in agent and len(agent["credit"]) > 0:
+            self.has_role_count += 1
+
+    def remove(self, agent: dict) -> None:
+        super().remove(agent)
+        if "credit" in agent and len(agent["credit"]) > 0:
+            self.has_role_count -= 1
+
+    def result(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = super().result()
+        result: Dict[str, Any] = {"hasCredit": stats["hasCredit"], "hasCreditRole": self.has_role_count,
+                                  "creditCount": stats["creditCount"], "creditRoleTypes": stats["creditRoleTypes"]}
+        if UNRECOGNISED_KEY in stats:
+            result[UNRECOGNISED_KEY] = stats[UNRECOGNISED_KEY]
+        return result
+
+    def partial(self) -> Tuple[Any, int]:
+        return super().partial(), self.has_role_count
+
+    def merge_partial(self, partial: Tuple[Any, int]) -> None:
+        facet_partial, has_role_count = partial
+        super().merge_partial(facet_partial)
+        self.has_role_count += has_role_count
+
+
+class _FacetFactory:
+    """
+    The factory for a facet accumulator, declaring the field and the statistics keys of the accumulator.
+    """
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.field: str = kwargs["field"]
+        self.statistics_keys: Tuple[str, ...] = tuple(kwargs[key] for key in ("has_key", "count_key", "types_key")
+                                                      if kwargs.get(key) is not None)
+
+    def __call__(self) -> FacetAccumulator:
+        return FacetAccumulator(**self.kwargs)
+
+
+def _facet(**kwargs) -> Callable[[], Accumulator]:
+    """
+    Create the factory for a facet accumulator.
+
+    :param kwargs: The arguments for the facet accumulator.
+    :return: The factory.
+    """
+    return _FacetFactory(**kwargs)
+
+
+register_general_accumulator(AgentCountAccumulator)
+register_general_accumulator(_facet(field="agentType", has_key="hasAgentType", count_key="agentTypeCount",
+                                    types_key="agentTypes", vocabulary=VOCABULARIES["agentType"]))
+register_general_accumulator(_facet(field="topic", has_key="hasTopic", count_key="topicCount"))
+register_general_accumulator(_facet(field="operatingSystem", has_key="hasOperatingSystem",
+                                    count_key="operatingSystemCount", types_key="operatingSystem",
+                                    vocabulary=VOCABULARIES["operatingSystem"]))
+register_general_accumulator(_facet(field="language", has_key="hasLanguage", count_key="languageCount",
+                                    types_key="languages", vocabulary=VOCABULARIES["language"]))
+register_general_accumulator(LicenseAccumulator)
+register_general_accumulator(_facet(field="maturity", has_key="hasMaturity", types_key="maturity",
+                                    vocabulary=VOCABULARIES["maturity"], values=single_value))
+register_general_accumulator(_facet(field="cost", has_key="hasCost", types_key="costs",
+                                    vocabulary=VOCABULARIES["cost"], values=single_value))
+register_general_accumulator(_facet(field="collectionID", has_key="hasCollection", count_key="collectionCount"))
+register_general_accumulator(_facet(field="accessibility", has_key="hasCodeAccessibility",
+                                    types_key="accessibility", vocabulary=VOCABULARIES["accessibility"],
+                                    values=single_value))
+register_general_accumulator(_facet(field="iechorPlatform", has_key="hasiEchorPlatform",
+                                    count_key="iechorPlatformCount", types_key="iechorPlatform",
+                                    vocabulary=VOCABULARIES["iechorPlatform"]))
+register_general_accumulator(_facet(field="iechorNode", has_key="hasiEchorNode", count_key="iechorNodeCount",
+                                    types_key="iechorNodes", vocabulary=VOCABULARIES["iechorNode"]))
+register_general_accumulator(_facet(field="iechorCommunity", has_key="hasiEchorCommunity",
+                                    count_key="iechorCommunityCount", types_key="iechorCommunity",
+                                    vocabulary=VOCABULARIES["iechorCommunity"]))
+register_general_accumulator(_facet(field="link", has_key="hasLinks", count_key="linkCount", types_key="linkTypes",
+                                    vocabulary=VOCABULARIES["linkType"], values=nested_values("type")))
+register_general_accumulator(_facet(field="download", has_key="hasDownloads", count_key="downloadCount",
+                                    types_key="downloadTypes", vocabulary=VOCABULARIES["downloadType"],
+                                    values=nested_single_values("type")))
+register_general_accumulator(_facet(field="documentation", has_key="hasDocumentation",
+                                    count_key="documentationCount", types_key="documentationTypes",
+                                    vocabulary=VOCABULARIES["documentationType"], values=nested_values("type")))
+register_general_accumulator(_facet(field="publication", has_key="hasPublications", count_key="publicationCount",
+                                    types_key="publicationTypes", vocabulary=VOCABULARIES["publicationType"],
+                                    values=nested_values("type")))
+register_general_accumulator(CreditAccumulator)
+register_general_accumulator(_facet(field="relation", has_key="hasRelation", count_key="relationCount",
+                                    types_key="relations", vocabulary=VOCABULARIES["relationType"],
+                                    values=nested_single_values("type")))
+register_general_accumulator(_facet(field="community", has_key="hasBiolib", count_key="BiolibCount"))
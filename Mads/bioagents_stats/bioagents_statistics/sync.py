@@ -0,0 +1,417 @@
+"""
+Incremental synchronisation of a local snapshot of the bio.agents registry.
+
+The snapshot is kept in a SQLite store keyed by the bio.agents ID. A sync fetches the agent list sorted by lastUpdate
+(newest first) only down to the newest lastUpdate in the store, and applies the additions and updates. Deleted agents
+do not appear in the list, so they are found by a reconciliation, which lists the whole registry and compares its IDs
+with the IDs of the store. A reconciliation is done when the size of the registry is not the size of the store with
+the new agents (i.e. agents were deleted, or additions were missed), and periodically (see sync_registry), for the
+changes the sizes do not show. A listing without agents (e.g. of a wrong URL) is not taken as the deletion of the
+whole snapshot: the sync raises a ValueError, and the snapshot is not changed. The changes are appended to an NDJSON
+change log, one change per line:
+
+    {"date": ..., "change": "added" | "updated" | "deleted", "bioagentsID": ..., "agent": ..., "previous": ...}
+
+with the new agent (None for a deletion) and the previous agent (None for an addition), so the statistics can be
+updated from the change log alone. The changes are written to the change log before the snapshot is committed, so
+the log holds every change of the snapshot (a change is logged again if the commit fails and the sync is repeated).
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import requests
+
+from ._dates import parse_timestamp
+from .downloader import BIOAGENTS_API_URL, _get_page, download_registry
+from .json_backend import get_json_loads, loads
+from .reader import iter_agents, iter_ndjson
+
+# The query parameters sorting the agent list by lastUpdate, newest first
+_SORT_PARAMS: Dict[str, str] = {"sort": "lastUpdate", "ord": "desc"}
+# The default time between the reconciliations of the snapshot with the registry in seconds (one week)
+RECONCILE_INTERVAL: float = 7 * 24 * 60 * 60
+
+
+class SnapshotStore:
+    """
+    Local snapshot of the registry in a SQLite database, keyed by the bio.agents ID.
+
+    The agents are iterated in the order they were added to the store; an update keeps the position of the agent.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the store, creating it if it does not exist.
+
+        :param path: The path to the SQLite database.
+        """
+        self.path: str = path
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS agents (bioagentsID TEXT PRIMARY KEY, "
+                                     "lastUpdate REAL, content TEXT NOT NULL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def __enter__(self) -> "SnapshotStore":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM agents").fetchone()[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        loads = get_json_loads()
+        for content, in self._connection.execute("SELECT content FROM agents ORDER BY rowid"):
+            yield loads(content)
+
+    def __contains__(self, agent_id: object) -> bool:
+        row: Optional[tuple] = self._connection.execute("SELECT 1 FROM agents WHERE bioagentsID = ?",
+                                                        (agent_id,)).fetchone()
+        return row is not None
+
+    def close(self):
+        """
+        Close the store.
+        """
+        self._connection.close()
+
+    def get(self, agent_id: str) -> Optional[dict]:
+        """
+        Get an agent of the snapshot.
+
+        :param agent_id: The bio.agents ID.
+        :return: The agent, or None if it is not in the snapshot.
+        """
+        row: Optional[tuple] = self._connection.execute("SELECT content FROM agents WHERE bioagentsID = ?",
+                                                        (agent_id,)).fetchone()
+        return loads(row[0]) if row is not None else None
+
+    def ids(self) -> List[str]:
+        """
+        Get the bio.agents IDs of the snapshot.
+
+        :return: The IDs, in the order of the snapshot.
+        """
+        return [agent_id for agent_id, in self._connection.execute("SELECT bioagentsID FROM agents ORDER BY rowid")]
+
+    @property
+    def last_update(self) -> Optional[float]:
+        """
+        The newest lastUpdate of the agents in the snapshot, in seconds since the epoch, or None if it is empty.
+        """
+        return self._connection.execute("SELECT MAX(lastUpdate) FROM agents").fetchone()[0]
+
+    @property
+    def last_sync(self) -> Optional[str]:
+        """
+        The time of the last sync (ISO 8601), or None if the snapshot was never synced.
+        """
+        return self._get_meta("last_sync")
+
+    @property
+    def last_reconciliation(self) -> Optional[str]:
+        """
+        The time of the last sync which compared the IDs of the snapshot with the registry (ISO 8601), or None.
+        """
+        return self._get_meta("last_reconciliation")
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        """
+        Get a value of the metadata of the snapshot.
+
+        :param key: The key.
+        :return: The value, or None if it is not set.
+        """
+        row: Optional[tuple] = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def apply(self, agents: Iterable[dict], deleted_ids: Iterable[str] = (), date: Optional[str] = None,
+              change_log_path: Optional[str] = None, reconciled: bool = False) -> List[dict]:
+        """
+        Apply the fetched agents and the deletions to the snapshot in one transaction.
+
+        Agents which are equal to the agent in the snapshot are not changes. The changes are appended to the change
+        log before the transaction is committed; if writing the log fails, the snapshot is not changed.
+
+        :param agents: The new or updated agents.
+        :param deleted_ids: The bio.agents IDs of the deleted agents.
+        :param date: The time of the sync (ISO 8601). Default: None, now.
+        :param change_log_path: The path to the NDJSON change log. Default: None, no log.
+        :param reconciled: The IDs of the snapshot were compared with the registry. Default: False.
+        :return: The changes, as written to the change log.
+        """
+        date = date or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        changes: List[dict] = []
+        with self._connection:
+            for agent in agents:
+                agent_id: str = agent["bioagentsID"]
+                previous: Optional[dict] = self.get(agent_id)
+                if previous == agent:
+                    continue
+                self._connection.execute(
+                    "INSERT INTO agents (bioagentsID, lastUpdate, content) VALUES (?, ?, ?) "
+                    "ON CONFLICT (bioagentsID) DO UPDATE SET lastUpdate = excluded.lastUpdate, "
+                    "content = excluded.content",
+                    (agent_id, _last_update_epoch(agent), json.dumps(agent, ensure_ascii=False)))
+                changes.append({"date": date, "change": "added" if previous is None else "updated",
+                                "bioagentsID": agent_id, "agent": agent, "previous": previous})
+            for agent_id in deleted_ids:
+                previous = self.get(agent_id)
+                if previous is None:
+                    continue
+                self._connection.execute("DELETE FROM agents WHERE bioagentsID = ?", (agent_id,))
+                changes.append({"date": date, "change": "deleted", "bioagentsID": agent_id, "agent": None,
+                                "previous": previous})
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_sync', ?)", (date,))
+            if reconciled:
+                self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_reconciliation', ?)",
+                                         (date,))
+            if change_log_path is not None and changes:
+                _append_changes(change_log_path=change_log_path, changes=changes)
+        return changes
+
+
+def sync_registry(store_path: str, change_log_path: Optional[str] = None, base_url: str = BIOAGENTS_API_URL,
+                  full: bool = False, reconcile_interval: Optional[float] = RECONCILE_INTERVAL, retries: int = 5,
+                  backoff: float = 1.0, timeout: float = 30.0) -> dict:
+    """
+    Sync the local snapshot with the registry, fetching only the agents updated since the last sync.
+
+    The first sync (or a full sync) downloads the whole registry with download_registry. The deleted agents are found
+    by a reconciliation, which lists the whole registry and compares the IDs (see the module documentation).
+
+    :param store_path: The path to the SQLite snapshot store.
+    :param change_log_path: The path to the NDJSON change log the changes are appended to. Default: None, no log.
+    :param base_url: The URL of the agent list endpoint of the API. Default: BIOAGENTS_API_URL.
+    :param full: Fetch the full registry, e.g. to repair the snapshot. Default: False.
+    :param reconcile_interval: Reconcile the snapshot with the registry if the last reconciliation is older than this
+        many seconds, even if the sizes match. Default: RECONCILE_INTERVAL. None: Only if the sizes do not match.
+    :param retries: The number of retries of a failed request. Default: 5.
+    :param backoff: The delay before the first retry in seconds, doubled for every retry. Default: 1.0.
+    :param timeout: The timeout of a request in seconds. Default: 30.0.
+    :return: The summary of the sync: the number of agents in the snapshot, the number of fetched pages (-1 for a
+        full download or a reconciliation), and the number of added, updated and deleted agents.
+    :raise requests.HTTPError: If a request fails, e.g. the first page is not found.
+    :raise ValueError: If the registry lists no agents, but the snapshot is not empty.
+    """
+    now: datetime = datetime.now(timezone.utc)
+    date: str = now.isoformat(timespec="seconds")
+    with SnapshotStore(store_path) as store:
+        since: Optional[float] = store.last_update
+        pages: int = -1
+        if full or since is None:
+            changes: List[dict] = _full_sync(store=store, base_url=base_url, retries=retries, backoff=backoff,
+                                             timeout=timeout, date=date, change_log_path=change_log_path)
+        else:
+            with requests.Session() as session:
+                agents, count, pages = _fetch_updated(session=session, base_url=base_url, since=since,
+                                                      retries=retries, backoff=backoff, timeout=timeout)
+            _check_listing(store=store, count=count, base_url=base_url)
+            snapshot_ids: List[str] = store.ids()
+            store_ids: Set[str] = set(snapshot_ids)
+            new_count: int = sum(agent["bioagentsID"] not in store_ids for agent in agents)
+            last_reconciliation: Optional[str] = store.last_reconciliation or store.last_sync
+            reconcile: bool = count != len(store_ids) + new_count or (
+                reconcile_interval is not None and (last_reconciliation is None or (
+                    now - datetime.fromisoformat(last_reconciliation)).total_seconds() >= reconcile_interval))
+            deleted_ids: List[str] = []
+            if reconcile:
+                # Agents were deleted from the registry, or additions were missed
+                remote_ids, missed_agents = _reconcile(store=store, store_ids=store_ids, fetched=agents,
+                                                       base_url=base_url, retries=retries, backoff=backoff,
+                                                       timeout=timeout)
+                agents += missed_agents
+                deleted_ids = [agent_id for agent_id in snapshot_ids if agent_id not in remote_ids]
+                pages = -1
+            changes = store.apply(agents=agents, deleted_ids=deleted_ids, date=date, change_log_path=change_log_path,
+                                  reconciled=reconcile)
+        size: int = len(store)
+
+    summary: dict = {"date": date, "agents": size, "pages": pages, "added": 0, "updated": 0, "deleted": 0}
+    for change in changes:
+        summary[change["change"]] += 1
+    return summary
+
+
+def iter_changes(change_log_path: str) -> Iterator[dict]:
+    """
+    Read the changes of a change log.
+
+    :param change_log_path: The path to the NDJSON change log.
+    :return: The generator yielding the changes in the order they were applied.
+    """
+    with open(change_log_path, "rb") as f:
+        yield from iter_ndjson(f)
+
+
+def _fetch_updated(session: requests.Session, base_url: str, since: float, retries: int, backoff: float,
+                   timeout: float) -> tuple:
+    """
+    Fetch the agents updated since a time, from the agent list sorted by lastUpdate.
+
+    The agents updated at exactly the time are fetched as well, since several agents can share a lastUpdate.
+
+    :param session: The HTTP session.
+    :param base_url: The URL of the agent list endpoint.
+    :param since: The time in seconds since the epoch.
+    :param retries: The number of retries of a failed request.
+    :param backoff: The delay before the first retry in seconds.
+    :param timeout: The timeout of a request in seconds.
+    :return: The updated agents, the number of agents in the registry and the number of fetched pages.
+    """
+    agents: Dict[str, dict] = {}
+    count: int = 0
+    page: int = 0
+    while True:
+        page += 1
+        response: dict = _get_page(session, base_url, page, retries, backoff, timeout, _SORT_PARAMS)
+        if page == 1:
+            count = response["count"]
+        # A page after the last page has no agents
+        done: bool = not response["list"]
+        for agent in response["list"]:
+            if _last_update_epoch(agent) < since:
+                done = True
+                break
+            # An agent updated during the sync moves to the first page, and can be seen twice
+            agents.setdefault(agent["bioagentsID"], agent)
+        if done:
+            return list(agents.values()), count, page
+
+
+def _full_sync(store: SnapshotStore, base_url: str, retries: int, backoff: float, timeout: float, date: str,
+               change_log_path: Optional[str]) -> List[dict]:
+    """
+    Download the full registry, and apply the additions, updates and deletions to the snapshot.
+
+    :param store: The snapshot store.
+    :param base_url: The URL of the agent list endpoint.
+    :param retries: The number of retries of a failed request.
+    :param backoff: The delay before the first retry in seconds.
+    :param timeout: The timeout of a request in seconds.
+    :param date: The time of the sync.
+    :param change_log_path: The path to the change log, or None.
+    :return: The changes.
+    """
+    download_path: str = _download(store=store, base_url=base_url, retries=retries, backoff=backoff,
+                                   timeout=timeout)
+
+    remote_ids: set = set()
+
+    def iter_downloaded() -> Iterator[dict]:
+        for agent in iter_agents(path=download_path):
+            remote_ids.add(agent["bioagentsID"])
+            yield agent
+
+    # The IDs of the snapshot are read now, and checked against the downloaded IDs after the agents are applied
+    deleted_ids: Iterator[str] = (agent_id for agent_id in store.ids() if agent_id not in remote_ids)
+    changes: List[dict] = store.apply(agents=iter_downloaded(), deleted_ids=deleted_ids, date=date,
+                                      change_log_path=change_log_path, reconciled=True)
+    _remove_download(download_path=download_path)
+    return changes
+
+
+def _reconcile(store: SnapshotStore, store_ids: Set[str], fetched: List[dict], base_url: str, retries: int,
+               backoff: float, timeout: float) -> Tuple[Set[str], List[dict]]:
+    """
+    List the whole registry, to compare its IDs with the IDs of the snapshot.
+
+    :param store: The snapshot store.
+    :param store_ids: The IDs of the snapshot.
+    :param fetched: The agents fetched by the incremental sync.
+    :param base_url: The URL of the agent list endpoint.
+    :param retries: The number of retries of a failed request.
+    :param backoff: The delay before the first retry in seconds.
+    :param timeout: The timeout of a request in seconds.
+    :return: The IDs of the registry, and the agents which are neither in the snapshot nor fetched (missed additions).
+    """
+    download_path: str = _download(store=store, base_url=base_url, retries=retries, backoff=backoff,
+                                   timeout=timeout)
+    fetched_ids: Set[str] = {agent["bioagentsID"] for agent in fetched}
+    remote_ids: Set[str] = set()
+    missed_agents: List[dict] = []
+    for agent in iter_agents(path=download_path):
+        agent_id: str = agent["bioagentsID"]
+        remote_ids.add(agent_id)
+        if agent_id not in store_ids and agent_id not in fetched_ids:
+            missed_agents.append(agent)
+    _remove_download(download_path=download_path)
+    return remote_ids, missed_agents
+
+
+def _download(store: SnapshotStore, base_url: str, retries: int, backoff: float, timeout: float) -> str:
+    """
+    Download the full registry next to the store, so an interrupted download resumes.
+
+    :param store: The snapshot store.
+    :param base_url: The URL of the agent list endpoint.
+    :param retries: The number of retries of a failed request.
+    :param backoff: The delay before the first retry in seconds.
+    :param timeout: The timeout of a request in seconds.
+    :return: The path to the NDJSON download.
+    :raise ValueError: If the registry lists no agents, but the snapshot is not empty.
+    """
+    download_path: str = f"{store.path}.download.ndjson"
+    count: int = download_registry(output_path=download_path, base_url=base_url, retries=retries, backoff=backoff,
+                                   timeout=timeout)
+    try:
+        _check_listing(store=store, count=count, base_url=base_url)
+    except ValueError:
+        _remove_download(download_path=download_path)
+        raise
+    return download_path
+
+
+def _check_listing(store: SnapshotStore, count: int, base_url: str) -> None:
+    """
+    Check that the registry lists agents if the snapshot has agents, so an outage or a wrong URL does not delete the
+    whole snapshot.
+
+    :param store: The snapshot store.
+    :param count: The number of agents listed by the registry.
+    :param base_url: The URL of the agent list endpoint.
+    :raise ValueError: If the registry lists no agents, but the snapshot is not empty.
+    """
+    if not count and len(store):
+        raise ValueError(f"The registry at {base_url} lists no agents, but the snapshot '{store.path}' has "
+                         f"{len(store)} agents. The snapshot is not changed.")
+
+
+def _remove_download(download_path: str) -> None:
+    """
+    Remove a download and its checkpoint.
+
+    :param download_path: The path to the NDJSON download.
+    """
+    for path in (download_path, f"{download_path}.checkpoint.json"):
+        os.remove(path)
+
+
+def _append_changes(change_log_path: str, changes: List[dict]) -> None:
+    """
+    Append changes to the change log, and flush them to the disk.
+
+    :param change_log_path: The path to the NDJSON change log.
+    :param changes: The changes.
+    """
+    with open(change_log_path, "a", encoding="utf8") as f:
+        for change in changes:
+            f.write(json.dumps(change, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _last_update_epoch(agent: dict) -> float:
+    """
+    Get the lastUpdate of an agent in seconds since the epoch.
+
+    :param agent: The raw agent.
+    :return: The seconds since the epoch, or the additionDate if there is no lastUpdate, or 0.
+    """
+    timestamp: Optional[str] = agent.get("lastUpdate") or agent.get("additionDate")
+    return parse_timestamp(timestamp) if timestamp else 0.0
@@ -0,0 +1,209 @@
+"""
+Deterministic generator of synthetic bio.agents agents, for benchmarks and tests without the real dump.
+
+The agents follow the biotoolsSchema vocabularies used by the statistics, with the field presence and the number of
+entries of each field roughly as in the registry, and some empty values as in the dump, which are removed by the
+cleaning. The EDAM terms are drawn from the index lists of the ontology (or a small set of common terms) with a
+Zipf distribution, so a few terms are very common and most terms are rare, as for the real annotations. The same
+count and seed always give the same agents.
+"""
+import gzip
+import json
+import random
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .edam_index import EDAM_PREFIX, EdamTermIndex, get_edam_term_index
+from .stats import (ACCESSIBILITY, COMMUNITY, COSTS, CREDIT_ROLE_TYPES, DOCUMENTATION_TYPES, DOWNLOAD_TYPES,
+                    LANGUAGES, LINK_TYPES, MATURITY, NODES, OPERATING_SYSTEMS, PLATFORMS, PUBLICATION_TYPES,
+                    RELATION_TYPES, TOOL_TYPES)
+
+# The common EDAM terms used without the index lists, by term type
+COMMON_EDAM_TERMS: Dict[str, List[Tuple[str, str]]] = {
+    "topic": [("topic_0080", "Sequence analysis"), ("topic_0121", "Proteomics"), ("topic_0622", "Genomics"),
+              ("topic_3172", "Metabolomics"), ("topic_3308", "Transcriptomics"), ("topic_3168", "Sequencing"),
+              ("topic_0081", "Structure analysis"), ("topic_0203", "Gene expression"),
+              ("topic_0602", "Molecular interactions, pathways and networks"), ("topic_0091", "Bioinformatics")],
+    "operation": [("operation_2945", "Analysis"), ("operation_0292", "Sequence alignment"),
+                  ("operation_0337", "Visualisation"), ("operation_2422", "Data retrieval"),
+                  ("operation_0224", "Query and retrieval"), ("operation_0346", "Sequence similarity search"),
+                  ("operation_3192", "Sequence trimming"), ("operation_3695", "Filtering")],
+    "data": [("data_2044", "Sequence"), ("data_0863", "Sequence alignment"), ("data_0872", "Phylogenetic tree"),
+             ("data_0883", "Structure"), ("data_3494", "DNA sequence"), ("data_2976", "Protein sequence")],
+    "format": [("format_1929", "FASTA"), ("format_1930", "FASTQ"), ("format_2572", "BAM"), ("format_2573", "SAM"),
+               ("format_3475", "TSV"), ("format_3752", "CSV"), ("format_3016", "VCF"), ("format_3464", "JSON")],
+}
+# The common licenses, in the order of their frequency
+COMMON_LICENSES: List[str] = ["GPL-3.0", "MIT", "Apache-2.0", "GPL-2.0", "Not licensed", "Other", "BSD-3-Clause",
+                              "Proprietary", "LGPL-3.0", "Freeware", "AGPL-3.0", "GPL-3.0-or-later", "BSD-2-Clause",
+                              "CC-BY-4.0", "Artistic-2.0", "EPL-1.0", "MPL-2.0", "LGPL-2.1"]
+
+# The exponent of the Zipf distribution of the values
+_ZIPF_EXPONENT: float = 1.1
+_FIRST_ADDITION: datetime = datetime(2015, 1, 1, tzinfo=timezone.utc)
+_LAST_ADDITION: datetime = datetime(2024, 12, 31, tzinfo=timezone.utc)
+
+
+class _Zipf:
+    """
+    Draw values with a Zipf distribution over their rank.
+    """
+
+    def __init__(self, values: Sequence, exponent: float = _ZIPF_EXPONENT):
+        self.values = values
+        self.cum_weights: List[float] = list(accumulate(1 / (rank + 1) ** exponent for rank in range(len(values))))
+
+    def draw(self, rng: random.Random):
+        return self.values[bisect(self.cum_weights, rng.random() * self.cum_weights[-1])]
+
+    def sample(self, rng: random.Random, count: int) -> list:
+        """
+        Draw distinct values.
+
+        :param rng: The random number generator.
+        :param count: The number of values, at most the number of values.
+        :return: The distinct values.
+        """
+        values: dict = {}
+        while len(values) < min(count, len(self.values)):
+            values[self.draw(rng)] = None
+        return list(values)
+
+
+def generate_agents(count: int, seed: int = 0,
+                    index_lists: Optional[Dict[str, Union[dict, EdamTermIndex]]] = None) -> Iterator[dict]:
+    """
+    Generate synthetic agents.
+
+    :param count: The number of agents, e.g. 20000, 200000 or 2000000.
+    :param seed: The seed of the random number generator. Default: 0.
+    :param index_lists: The index lists of the term types (see load_edam_index) to draw the EDAM terms from. Default:
+        None, the common terms in COMMON_EDAM_TERMS.
+    :return: The generator yielding the raw agents, one at a time.
+    """
+    rng = random.Random(seed)
+    terms: Dict[str, _Zipf] = _get_term_distributions(rng=random.Random(seed), index_lists=index_lists)
+    vocabularies: Dict[str, _Zipf] = {name: _Zipf(values) for name, values in (
+        ("agentType", TOOL_TYPES), ("operatingSystem", OPERATING_SYSTEMS), ("language", LANGUAGES),
+        ("license", COMMON_LICENSES), ("maturity", MATURITY), ("cost", COSTS), ("accessibility", ACCESSIBILITY),
+        ("iechorPlatform", PLATFORMS), ("iechorNode", NODES), ("iechorCommunity", COMMUNITY), ("link", LINK_TYPES),
+        ("download", DOWNLOAD_TYPES), ("documentation", DOCUMENTATION_TYPES), ("publication", PUBLICATION_TYPES),
+        ("credit", CREDIT_ROLE_TYPES), ("relation", RELATION_TYPES))}
+    collections: _Zipf = _Zipf([f"Collection {number}" for number in range(1, 201)])
+    time_span: float = (_LAST_ADDITION - _FIRST_ADDITION).total_seconds()
+
+    for number in range(count):
+        # The agents are added over time, in the order of their number
+        addition: datetime = _FIRST_ADDITION + timedelta(seconds=int(time_span * (number + rng.random()) / count))
+        update: datetime = addition + timedelta(seconds=int(rng.random() * (_LAST_ADDITION - addition).total_seconds()))
+        agent: dict = {"bioagentsID": f"synthetic_agent_{number}", "name": f"Synthetic agent {number}",
+                       "description": f"A synthetic agent generated with seed {seed}.",
+                       "homepage": f"https://example.org/agents/{number}",
+                       "additionDate": addition.isoformat().replace("+00:00", "Z"),
+                       "lastUpdate": update.isoformat().replace("+00:00", "Z")}
+
+        def field(name: str, probability: float, value: Callable[[], object], empty: object = None):
+            # The absent fields are sometimes empty values in the dump
+            if rng.random() < probability:
+                agent[name] = value()
+            elif rng.random() < 0.3:
+                agent[name] = empty
+
+        def values(name: str, high: int) -> list:
+            return vocabularies[name].sample(rng, rng.randint(1, high))
+
+        def edam_terms(term_type: str, high: int) -> List[dict]:
+            return [{"uri": EDAM_PREFIX + term_id, "term": name}
+                    for term_id, name in terms[term_type].sample(rng, rng.randint(1, high))]
+
+        field("agentType", 0.97, lambda: values("agentType", 2), [])
+        field("topic", 0.95, lambda: edam_terms("topic", 4), [])
+        field("function", 0.85, lambda: [
+            {"operation": edam_terms("operation", 3),
+             "input": [{"data": edam_terms("data", 1)[0], "format": edam_terms("format", 2)}
+                       for _ in range(rng.randint(0, 2))],
+             "output": [{"data": edam_terms("data", 1)[0], "format": edam_terms("format", 2)}
+                        for _ in range(rng.randint(0, 2))],
+             "note": None, "cmd": None}
+            for _ in range(rng.randint(1, 2))], [])
+        field("operatingSystem", 0.6, lambda: values("operatingSystem", 3), [])
+        field("language", 0.55, lambda: values("language", 3), [])
+        field("license", 0.6, lambda: vocabularies["license"].draw(rng), "")
+        field("maturity", 0.15, lambda: vocabularies["maturity"].draw(rng))
+        field("cost", 0.4, lambda: vocabularies["cost"].draw(rng))
+        field("accessibility", 0.2, lambda: vocabularies["accessibility"].draw(rng))
+        field("collectionID", 0.3, lambda: collections.sample(rng, rng.randint(1, 3)), [])
+        field("iechorPlatform", 0.05, lambda: values("iechorPlatform", 2), [])
+        field("iechorNode", 0.05, lambda: values("iechorNode", 2), [])
+        field("iechorCommunity", 0.03, lambda: values("iechorCommunity", 2), [])
+        field("link", 0.7, lambda: [{"url": f"https://example.org/{number}/link/{entry}",
+                                     "type": values("link", 2), "note": None}
+                                    for entry in range(rng.randint(1, 3))], [])
+        field("download", 0.3, lambda: [{"url": f"https://example.org/{number}/download/{entry}",
+                                         "type": vocabularies["download"].draw(rng), "note": None, "version": None}
+                                        for entry in range(rng.randint(1, 2))], [])
+        field("documentation", 0.8, lambda: [{"url": f"https://example.org/{number}/docs/{entry}",
+                                              "type": values("documentation", 2), "note": None}
+                                             for entry in range(rng.randint(1, 2))], [])
+        field("publication", 0.85, lambda: [{"doi": f"10.0000/synthetic.{number}.{entry}", "pmid": None,
+                                             "pmcid": None, "type": values("publication", 1), "note": None}
+                                            for entry in range(rng.randint(1, 3))], [])
+        field("credit", 0.7, lambda: [{"name": f"Person {rng.randint(1, count // 3 + 1)}", "email": None,
+                                       "typeEntity": "Person", "typeRole": values("credit", 2), "note": None}
+                                      for _ in range(rng.randint(1, 3))], [])
+        field("relation", 0.05, lambda: [{"bioagentsID": f"synthetic_agent_{rng.randrange(count)}",
+                                          "type": vocabularies["relation"].draw(rng)}], [])
+        field("community", 0.1, lambda: {"biolib": {"app_name": f"app{number}", "author_name": "synthetic",
+                                                     "author_username": "synthetic"}})
+        yield agent
+
+
+def write_synthetic_dump(path: str, count: int, seed: int = 0,
+                         index_lists: Optional[Dict[str, Union[dict, EdamTermIndex]]] = None) -> int:
+    """
+    Write synthetic agents to an NDJSON dump, which can be read with iter_agents.
+
+    :param path: The path to the dump. Files ending with '.gz' are gzip compressed.
+    :param count: The number of agents.
+    :param seed: The seed of the random number generator. Default: 0.
+    :param index_lists: The index lists of the term types to draw the EDAM terms from. Default: None, the common
+        terms.
+    :return: The number of agents written.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf8") as f:
+        for agent in generate_agents(count=count, seed=seed, index_lists=index_lists):
+            f.write(json.dumps(agent, ensure_ascii=False) + "\n")
+    return count
+
+
+def _get_term_distributions(rng: random.Random,
+                            index_lists: Optional[Dict[str, Union[dict, EdamTermIndex]]]) -> Dict[str, _Zipf]:
+    """
+    Get the distributions of the EDAM terms of each term type.
+
+    The popularity of the terms is a random order of the terms, so the common terms are spread over the ontology.
+
+    :param rng: The random number generator for the order of the terms.
+    :param index_lists: The index lists of the term types, or None for the common terms.
+    :return: The distribution of the term IDs and names for each term type.
+    """
+    distributions: Dict[str, _Zipf] = {}
+    for term_type, common_terms in COMMON_EDAM_TERMS.items():
+        index_list = None
+        for given_term_type, given_index_list in (index_lists or {}).items():
+            if given_term_type.lower() == term_type:
+                index_list = given_index_list
+        if index_list is None:
+            terms: List[Tuple[str, str]] = list(common_terms)
+        else:
+            term_index: EdamTermIndex = get_edam_term_index(index_list=index_list)
+            # The roots (and the unknown terms) are not used for annotations
+            terms = [(term_id, name) for term_id, name, depth in zip(term_index.term_ids, term_index.names,
+                                                                     term_index.depths) if depth > 0]
+            terms.sort()
+            rng.shuffle(terms)
+        distributions[term_type] = _Zipf(terms)
+    return distributions
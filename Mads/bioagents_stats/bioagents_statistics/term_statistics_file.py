@@ -0,0 +1,428 @@
+"""
+Compact file format for the EDAM term statistics with the agent IDs.
+
+With output_ids, the term statistics hold the lists of the bio.agents IDs of each term, and the ancestor terms repeat
+the IDs of their descendants, so the JSON output is very large. The file holds the IDs once, in a shared agent table,
+and for each term the sorted rows of its agents in the table: as delta-encoded varints or as a bitmap, whichever is
+smaller, zlib compressed if that is smaller still. The terms are written one at a time by the TermStatisticsWriter,
+and the TermStatisticsReader reads the term statistics from the index at the end of the file and only decodes the
+IDs of a term when they are asked for.
+
+The layout of the file is: the magic bytes, the agent table (a block of the newline-separated IDs), the blocks of
+the strict and total rows of each term, the index (a block of JSON with the date, the number of agents and the name,
+depth, counts and block offset of each term by term type), and the offset of the index and the magic bytes. Each
+block is a kind byte, the varint length of the content and the content.
+"""
+import heapq
+import json
+import os
+import struct
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import IO, Dict, Iterable, List, Optional, Tuple, Union
+
+from ._accumulators import accumulate
+from ._row_sets import RowSet, decode_rows, encode_rows
+from ._utilities import is_agent_table, iter_clean_and_filtered_agents
+from .edam_index import EdamTermIndex
+from .edam_stats import EdamTermsAccumulator, calculate_all_edam_term_statistics
+from .json_backend import loads
+
+MAGIC: bytes = b"BATERMS1"
+
+# The kinds of the blocks: the content is delta-encoded varints, a bitmap, or UTF-8 text (the agent table and the
+# index), optionally zlib compressed
+_DELTAS: int = 0
+_BITMAP: int = 1
+_TEXT: int = 2
+_COMPRESSED: int = 0x80
+# The minimum size of the content before compressing it
+_MIN_COMPRESSED_SIZE: int = 64
+_TRAILER = struct.Struct("<Q8s")
+
+
+class TermStatisticsWriter:
+    """
+    Write the term statistics to a file, one term at a time.
+    """
+
+    def __init__(self, path: str, agent_ids: List[str], date: Optional[str] = None, term_types: Iterable[str] = ()):
+        """
+        Create the writer, writing the agent table. The file is only complete once the writer is closed.
+
+        :param path: The path to the file.
+        :param agent_ids: The bio.agents IDs of the agents, by row.
+        :param date: The date of the statistics. Default: None.
+        :param term_types: The term types of the statistics, which are kept even without terms. Default: None.
+        """
+        self.path: str = path
+        self.date: Optional[str] = date
+        self.agent_count: int = len(agent_ids)
+        self.terms: Dict[str, Dict[str, list]] = {term_type: {} for term_type in term_types}
+        self._temp_path: str = f"{path}.{os.getpid()}.tmp"
+        self._file: IO[bytes] = open(self._temp_path, "wb")
+        self._file.write(MAGIC)
+        _write_block(stream=self._file, kind=_TEXT, content="\n".join(agent_ids).encode("utf8"))
+
+    def __enter__(self) -> "TermStatisticsWriter":
+        return self
+
+    def __exit__(self, exception_type, *args):
+        if exception_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._temp_path)
+
+    def write_term(self, term_type: str, term_id: str, name: str, depth: int, strict_rows: Iterable[int],
+                   total_rows: Iterable[int]) -> None:
+        """
+        Write the statistics of a term.
+
+        :param term_type: The term type, e.g. 'topic'.
+        :param term_id: The term ID, e.g. 'topic_0091'.
+        :param name: The name of the term.
+        :param depth: The depth of the term.
+        :param strict_rows: The rows of the agents annotated with the term, in increasing order, e.g. a RowSet.
+        :param total_rows: The rows of the agents annotated with the term or its descendants, in increasing order.
+        """
+        offset: int = self._file.tell()
+        strict_count: int = _write_rows(stream=self._file, rows=strict_rows)
+        total_count: int = _write_rows(stream=self._file, rows=total_rows)
+        self.terms.setdefault(term_type, {})[term_id] = [name, depth, strict_count, total_count, offset]
+
+    def close(self) -> None:
+        """
+        Write the index and complete the file.
+        """
+        if self._file.closed:
+            return
+        index_offset: int = self._file.tell()
+        index: dict = {"date": self.date, "agents": self.agent_count, "terms": self.terms}
+        _write_block(stream=self._file, kind=_TEXT, content=json.dumps(index, separators=(",", ":")).encode("utf8"))
+        self._file.write(_TRAILER.pack(index_offset, MAGIC))
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+
+class TermStatisticsReader:
+    """
+    Read a term statistics file lazily: the IDs of a term are only decoded when they are asked for.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open the file and read its index.
+
+        :param path: The path to the file.
+        :raise ValueError: If the file is not a term statistics file.
+        """
+        self.path: str = path
+        self._file: IO[bytes] = open(path, "rb")
+        try:
+            if self._file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{path}' is not a term statistics file.")
+            self._file.seek(-_TRAILER.size, os.SEEK_END)
+            index_offset, magic = _TRAILER.unpack(self._file.read(_TRAILER.size))
+            if magic != MAGIC:
+                raise ValueError(f"The term statistics file '{path}' is incomplete.")
+            self._file.seek(index_offset)
+            index: dict = loads(_read_block(stream=self._file))
+        except (ValueError, struct.error, OSError):
+            self._file.close()
+            raise
+        self.date: Optional[str] = index["date"]
+        self.agent_count: int = index["agents"]
+        self._terms: Dict[str, Dict[str, list]] = index["terms"]
+        self._agent_ids: Optional[List[str]] = None
+
+    def __enter__(self) -> "TermStatisticsReader":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the file.
+        """
+        self._file.close()
+
+    @property
+    def term_types(self) -> List[str]:
+        """
+        The term types of the statistics.
+        """
+        return list(self._terms)
+
+    @property
+    def agent_ids(self) -> List[str]:
+        """
+        The bio.agents IDs of the agent table, by row. Read on first access.
+        """
+        if self._agent_ids is None:
+            self._file.seek(len(MAGIC))
+            content: bytes = _read_block(stream=self._file)
+            self._agent_ids = content.decode("utf8").split("\n") if self.agent_count else []
+        return self._agent_ids
+
+    def terms(self, term_type: str) -> Dict[str, dict]:
+        """
+        Get the statistics of the terms of a term type, without the IDs.
+
+        :param term_type: The term type.
+        :return: The name, depth and strict and total count of each term, as the term statistics without output_ids.
+        """
+        return {term_id: {"name": name, "depth": depth, "strict_count": strict_count, "total_count": total_count}
+                for term_id, (name, depth, strict_count, total_count, _) in self._terms[term_type].items()}
+
+    def rows(self, term_type: str, term_id: str) -> Tuple[RowSet, RowSet]:
+        """
+        Decode the rows of the agents of a term.
+
+        :param term_type: The term type.
+        :param term_id: The term ID.
+        :return: The strict and the total rows.
+        :raise KeyError: If the term has no agents.
+        """
+        self._file.seek(self._terms[term_type][term_id][4])
+        return _read_rows(stream=self._file), _read_rows(stream=self._file)
+
+    def ids(self, term_type: str, term_id: str, strict: bool = False) -> List[str]:
+        """
+        Decode the IDs of the agents of a term.
+
+        :param term_type: The term type.
+        :param term_id: The term ID.
+        :param strict: Get the agents annotated with the term only, instead of with the term or its descendants.
+            Default: False.
+        :return: The bio.agents IDs, in the order of the agent table.
+        :raise KeyError: If the term has no agents.
+        """
+        strict_rows, total_rows = self.rows(term_type=term_type, term_id=term_id)
+        agent_ids: List[str] = self.agent_ids
+        return [agent_ids[row] for row in (strict_rows if strict else total_rows)]
+
+    def to_dict(self) -> dict:
+        """
+        Decode all the statistics.
+
+        :return: The statistics with the IDs, as calculate_all_edam_term_statistics with output_ids.
+        """
+        statistics: dict = {"date": self.date}
+        for term_type in self.term_types:
+            term_statistics: Dict[str, dict] = {}
+            for term_id, term in self.terms(term_type).items():
+                term_statistics[term_id] = {"name": term["name"], "depth": term["depth"],
+                                            "strict_ids": self.ids(term_type, term_id, strict=True),
+                                            "total_ids": self.ids(term_type, term_id),
+                                            "strict_count": term["strict_count"], "total_count": term["total_count"]}
+            statistics[term_type] = term_statistics
+        return statistics
+
+
+def write_edam_term_statistics(path: str, agents: Iterable[dict], index_lists: Dict[str, Union[dict, EdamTermIndex]],
+                               upper_time_limit: Optional[datetime] = None) -> dict:
+    """
+    Calculate the EDAM term statistics of several term types and write them with the IDs to a term statistics file,
+    without building the lists of IDs.
+
+    :param path: The path to the file.
+    :param agents: The agent list. Any iterable of agents is accepted, or an Arrow agent table.
+    :param index_lists: The index lists for the term types, as for calculate_all_edam_term_statistics.
+    :param upper_time_limit: Calculate the statistics for agents added up to the time limit.
+        Default: None, the time of the call.
+    :return: The statistics without the IDs, as calculate_all_edam_term_statistics.
+    """
+    upper_time_limit = upper_time_limit or datetime.today()
+    date: str = upper_time_limit.isoformat(timespec="seconds")
+    if is_agent_table(agents):
+        statistics: dict = calculate_all_edam_term_statistics(agents=agents, index_lists=index_lists,
+                                                              upper_time_limit=upper_time_limit, output_ids=True)
+        write_term_statistics(path=path, statistics=statistics)
+        return _without_ids(statistics)
+
+    accumulator = EdamTermsAccumulator(index_lists=index_lists)
+    accumulate(agents=iter_clean_and_filtered_agents(raw_agents=agents, upper_time_limit=upper_time_limit),
+               accumulators=[accumulator])
+    with TermStatisticsWriter(path=path, agent_ids=accumulator.agent_ids, date=date,
+                              term_types=accumulator.accumulators) as writer:
+        empty: RowSet = RowSet()
+        for term_type, term_accumulator in accumulator.accumulators.items():
+            term_index: EdamTermIndex = term_accumulator.term_index
+            for term_number, total_rows in term_accumulator.total_rows.items():
+                writer.write_term(term_type=term_type, term_id=term_index.term_ids[term_number],
+                                  name=term_index.names[term_number], depth=term_index.depths[term_number],
+                                  strict_rows=term_accumulator.strict_rows.get(term_number, empty),
+                                  total_rows=total_rows)
+    statistics = {"date": date}
+    statistics.update(accumulator.result())
+    return statistics
+
+
+def write_term_statistics(path: str, statistics: dict) -> None:
+    """
+    Write term statistics calculated with output_ids to a term statistics file. The IDs of each term are written in
+    the order of the agents in the calculation, if the lists of IDs are in that order.
+
+    :param path: The path to the file.
+    :param statistics: The statistics, as calculate_edam_term_statistics or calculate_all_edam_term_statistics with
+        output_ids.
+    """
+    term_types: List[str] = [term_type for term_type in statistics if term_type != "date"]
+    agent_ids: List[str] = _merge_orders(id_lists=[ids for term_type in term_types
+                                                   for term in statistics[term_type].values()
+                                                   for ids in (term["strict_ids"], term["total_ids"])])
+    agent_rows: Dict[str, int] = {agent_id: row for row, agent_id in enumerate(agent_ids)}
+
+    with TermStatisticsWriter(path=path, agent_ids=agent_ids, date=statistics.get("date"),
+                              term_types=term_types) as writer:
+        for term_type in term_types:
+            for term_id, term in statistics[term_type].items():
+                writer.write_term(term_type=term_type, term_id=term_id, name=term["name"], depth=term["depth"],
+                                  strict_rows=sorted(agent_rows[agent_id] for agent_id in term["strict_ids"]),
+                                  total_rows=sorted(agent_rows[agent_id] for agent_id in term["total_ids"]))
+
+
+def _merge_orders(id_lists: List[List[str]]) -> List[str]:
+    """
+    Get the order of the agents from the lists of IDs of the terms, which are each in the order of the agent rows of
+    the calculation.
+
+    :param id_lists: The lists of IDs.
+    :return: The IDs in an order consistent with all the lists, the first seen agents first when the lists do not
+        determine the order. If the lists are not in a consistent order (as for the columnar statistics, whose IDs
+        are in no particular order), the IDs in the order they are first seen.
+    """
+    first_seen: Dict[str, int] = {}
+    successors: Dict[str, List[str]] = defaultdict(list)
+    predecessor_counts: Dict[str, int] = defaultdict(int)
+    for ids in id_lists:
+        for agent_id in ids:
+            first_seen.setdefault(agent_id, len(first_seen))
+        for previous_id, agent_id in zip(ids, ids[1:]):
+            successors[previous_id].append(agent_id)
+            predecessor_counts[agent_id] += 1
+
+    # Topological sort of the agents
+    ready: List[Tuple[int, str]] = [(position, agent_id) for agent_id, position in first_seen.items()
+                                    if predecessor_counts[agent_id] == 0]
+    heapq.heapify(ready)
+    order: List[str] = []
+    while ready:
+        agent_id: str = heapq.heappop(ready)[1]
+        order.append(agent_id)
+        for successor in successors[agent_id]:
+            predecessor_counts[successor] -= 1
+            if predecessor_counts[successor] == 0:
+                heapq.heappush(ready, (first_seen[successor], successor))
+    return order if len(order) == len(first_seen) else list(first_seen)
+
+
+def _without_ids(statistics: dict) -> dict:
+    """
+    Remove the IDs from term statistics.
+
+    :param statistics: The statistics with the IDs.
+    :return: The statistics with empty lists of IDs, as calculated without output_ids.
+    """
+    for term_type, term_statistics in statistics.items():
+        if term_type != "date":
+            for term in term_statistics.values():
+                term["strict_ids"], term["total_ids"] = [], []
+    return statistics
+
+
+def _write_rows(stream: IO[bytes], rows: Iterable[int]) -> int:
+    """
+    Write the rows as a block of delta-encoded varints or a bitmap, whichever is smaller.
+
+    :param stream: The binary stream.
+    :param rows: The rows, in increasing order.
+    :return: The number of rows.
+    """
+    bitmap, content, count = encode_rows(rows=rows)
+    _write_block(stream=stream, kind=_BITMAP if bitmap else _DELTAS, content=content)
+    return count
+
+
+def _read_rows(stream: IO[bytes]) -> RowSet:
+    """
+    Read a block of rows.
+
+    :param stream: The binary stream, at the block.
+    :return: The rows.
+    """
+    kind, content = _read_kind_block(stream=stream)
+    return decode_rows(content=content, bitmap=kind == _BITMAP)
+
+
+def _write_block(stream: IO[bytes], kind: int, content: bytes) -> None:
+    """
+    Write a block, compressing the content if that makes it smaller.
+
+    :param stream: The binary stream.
+    :param kind: The kind of the content.
+    :param content: The content.
+    """
+    if len(content) >= _MIN_COMPRESSED_SIZE:
+        compressed: bytes = zlib.compress(content)
+        if len(compressed) < len(content):
+            kind, content = kind | _COMPRESSED, compressed
+    stream.write(bytes([kind]) + _encode_varint(len(content)) + content)
+
+
+def _read_block(stream: IO[bytes]) -> bytes:
+    """
+    Read the content of a block.
+
+    :param stream: The binary stream, at the block.
+    :return: The (decompressed) content.
+    """
+    return _read_kind_block(stream=stream)[1]
+
+
+def _read_kind_block(stream: IO[bytes]) -> Tuple[int, bytes]:
+    """
+    Read a block.
+
+    :param stream: The binary stream, at the block.
+    :return: The kind and the (decompressed) content of the block.
+    :raise ValueError: If the block is truncated.
+    """
+    header: bytes = stream.read(1)
+    if not header:
+        raise ValueError("Unexpected end of the term statistics file.")
+    kind: int = header[0]
+    length: int = 0
+    shift: int = 0
+    while True:
+        byte: bytes = stream.read(1)
+        if not byte:
+            raise ValueError("Unexpected end of the term statistics file.")
+        length |= (byte[0] & 0x7F) << shift
+        if not byte[0] & 0x80:
+            break
+        shift += 7
+    content: bytes = stream.read(length)
+    if len(content) != length:
+        raise ValueError("Unexpected end of the term statistics file.")
+    if kind & _COMPRESSED:
+        return kind & ~_COMPRESSED, zlib.decompress(content)
+    return kind, content
+
+
+def _encode_varint(value: int) -> bytes:
+    """
+    Encode a non-negative integer as a varint (LEB128).
+
+    :param value: The integer.
+    :return: The varint.
+    """
+    varint: bytearray = bytearray()
+    while value >= 0x80:
+        varint.append(value & 0x7F | 0x80)
+        value >>= 7
+    varint.append(value)
+    return bytes(varint)
@@ -0,0 +1,127 @@
+"""
+The scripts for calculating statistics for many cut-off dates in one run.
+
+The agents are sorted by their addition date once, and the general and EDAM term statistics are accumulated
+incrementally: for each cut-off date only the agents added since the previous cut-off date are processed.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from dateutil.relativedelta import relativedelta
+
+from ._accumulators import Accumulator, collect_results
+from .agent_index import AgentIndex
+from .edam_stats import EdamTermsAccumulator
+from .stats import create_general_accumulators
+
+FREQUENCIES: Dict[str, relativedelta] = {"daily": relativedelta(days=1), "weekly": relativedelta(weeks=1),
+                                         "monthly": relativedelta(months=1), "yearly": relativedelta(years=1)}
+
+
+def calculate_statistics_over_time(agents: Iterable[dict], dates: Optional[List[datetime]] = None,
+                                   frequency: Optional[str] = None, index_lists: Optional[Dict[str, dict]] = None,
+                                   general: bool = True, output_ids: bool = False) -> List[dict]:
+    """
+    Calculate the cumulative general and EDAM term statistics for many cut-off dates.
+
+    :param agents: The agents. Any iterable of agents, or an AgentIndex.
+    :param dates: The cut-off dates. The statistics for a date include the agents added before it.
+    :param frequency: Instead of the dates, the frequency of the cut-off dates: 'daily', 'weekly', 'monthly' or
+        'yearly'. The cut-off dates cover the period from the first to the last addition of an agent.
+    :param index_lists: The index lists for the EDAM term types to calculate statistics for, e.g.
+        {"topic": topic_index_list}. Default: No EDAM term statistics.
+    :param general: Indicate whether the general statistics should be calculated. Default: True.
+    :param output_ids: Indicate whether the ids should be in the EDAM term statistics. Default: False.
+    :return: The list with the statistics for each cut-off date, sorted by the date.
+    """
+    return list(iter_statistics_over_time(agents=agents, dates=dates, frequency=frequency, index_lists=index_lists,
+                                          general=general, output_ids=output_ids))
+
+
+def iter_statistics_over_time(agents: Iterable[dict], dates: Optional[List[datetime]] = None,
+                              frequency: Optional[str] = None, index_lists: Optional[Dict[str, dict]] = None,
+                              general: bool = True, output_ids: bool = False) -> Iterator[dict]:
+    """
+    Calculate the cumulative general and EDAM term statistics for many cut-off dates, one date at a time.
+
+    Each item has the fields "date", "general" (as calculate_general_statistics) and "edam" (a dictionary with the
+    statistics of each term type, as calculate_edam_term_statistics).
+
+    :param agents: The agents. Any iterable of agents, or an AgentIndex.
+    :param dates: The cut-off dates. The statistics for a date include the agents added before it.
+    :param frequency: Instead of the dates, the frequency of the cut-off dates: 'daily', 'weekly', 'monthly' or
+        'yearly'. The cut-off dates cover the period from the first to the last addition of an agent.
+    :param index_lists: The index lists for the EDAM term types to calculate statistics for, e.g.
+        {"topic": topic_index_list}. Default: No EDAM term statistics.
+    :param general: Indicate whether the general statistics should be calculated. Default: True.
+    :param output_ids: Indicate whether the ids should be in the EDAM term statistics. Default: False.
+    :return: The generator yielding the statistics for each cut-off date, sorted by the date.
+    """
+    index: AgentIndex = agents if isinstance(agents, AgentIndex) else AgentIndex(agents)
+
+    if (dates is None) == (frequency is None):
+        raise ValueError("Either the dates or the frequency must be given.")
+    if dates is None:
+        dates = get_cut_off_dates(index=index, frequency=frequency)
+    dates = sorted(dates)
+
+    general_accumulators: List[Accumulator] = create_general_accumulators() if general else []
+    edam_accumulator = EdamTermsAccumulator(index_lists=index_lists or {}, output_ids=output_ids)
+    adders = [accumulator.add for accumulator in general_accumulators]
+    if edam_accumulator.accumulators:
+        adders.append(edam_accumulator.add)
+
+    position: int = 0
+    for date in dates:
+        # Only add the agents added since the previous cut-off date
+        end: int = index.count_added_before(date)
+        for agent_position in range(position, end):
+            agent = index[agent_position]
+            for add in adders:
+                add(agent)
+        position = max(position, end)
+
+        date_string: str = date.isoformat(timespec="seconds")
+        statistics: dict = {"date": date_string}
+        if general:
+            statistics["general"] = collect_results(accumulators=general_accumulators, stats={"date": date_string})
+        statistics["edam"] = {accumulator.term_type: collect_results(accumulators=[accumulator],
+                                                                      stats={"date": date_string})
+                              for accumulator in edam_accumulator.accumulators.values()}
+        yield statistics
+
+
+def get_cut_off_dates(index: AgentIndex, frequency: str) -> List[datetime]:
+    """
+    Get the cut-off dates covering the period from the first to the last addition of an agent.
+
+    The first cut-off date is the start of the period after the first addition, and the last cut-off date is the
+    first period start after the last addition, so it includes all the agents.
+
+    :param index: The agent index.
+    :param frequency: The frequency: 'daily', 'weekly', 'monthly' or 'yearly'.
+    :return: The cut-off dates.
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"The frequency '{frequency}' is not valid. Must be one of {', '.join(FREQUENCIES)}.")
+    if len(index) == 0:
+        return []
+
+    # The cut-off dates are naive UTC times, as the upper time limits of the statistics
+    first: datetime = datetime.fromtimestamp(index.addition_epochs[0], tz=timezone.utc).replace(tzinfo=None)
+    last: datetime = datetime.fromtimestamp(index.addition_epochs[-1], tz=timezone.utc).replace(tzinfo=None)
+
+    # Start of the period holding the first addition
+    date: datetime = first.replace(hour=0, minute=0, second=0, microsecond=0)
+    if frequency == "weekly":
+        date -= timedelta(days=date.weekday())
+    elif frequency == "monthly":
+        date = date.replace(day=1)
+    elif frequency == "yearly":
+        date = date.replace(month=1, day=1)
+
+    dates: List[datetime] = []
+    while date <= last:
+        date += FREQUENCIES[frequency]
+        dates.append(date)
+    return dates
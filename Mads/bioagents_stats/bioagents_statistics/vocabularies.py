@@ -0,0 +1,130 @@
+"""
+The registry of the controlled vocabularies of the biotoolsSchema fields, loaded once from a versioned TSV file.
+
+Each term of a vocabulary has a fixed integer code, so the values of the categorical fields can be encoded as flat
+arrays of codes and counted with a bincount. The file has the columns 'vocabulary', 'code' and 'term', preceded by
+comment lines, one of which gives the version of the file ('# version: 1'). The codes of a vocabulary are 0 to the
+number of terms - 1, and new terms are added with the next code.
+"""
+import os
+import threading
+from typing import Dict, Iterator, List, Optional
+
+VOCABULARIES_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "vocabularies.tsv")
+
+_registries: Dict[str, "VocabularyRegistry"] = {}
+_registries_lock = threading.Lock()
+
+
+class Vocabulary:
+    """
+    A controlled vocabulary: the terms in the order of their codes.
+    """
+
+    def __init__(self, name: str, terms: List[str]):
+        """
+        Create the vocabulary.
+
+        :param name: The name of the vocabulary, e.g. 'agentType'.
+        :param terms: The terms, in the order of their codes.
+        """
+        self.name: str = name
+        self.terms: List[str] = terms
+        self.codes: Dict[str, int] = {term: code for code, term in enumerate(terms)}
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __contains__(self, term: object) -> bool:
+        return term in self.codes
+
+    def __repr__(self) -> str:
+        return f"Vocabulary({self.name!r}, {len(self)} terms)"
+
+    def code(self, term: str) -> Optional[int]:
+        """
+        Get the code of a term.
+
+        :param term: The term.
+        :return: The code, or None if the term is not in the vocabulary.
+        """
+        return self.codes.get(term)
+
+
+class VocabularyRegistry:
+    """
+    The vocabularies of a vocabulary file.
+    """
+
+    def __init__(self, version: Optional[str], vocabularies: Dict[str, Vocabulary]):
+        """
+        Create the registry.
+
+        :param version: The version of the vocabulary file.
+        :param vocabularies: The vocabularies by name.
+        """
+        self.version: Optional[str] = version
+        self.vocabularies: Dict[str, Vocabulary] = vocabularies
+
+    def __getitem__(self, name: str) -> Vocabulary:
+        return self.vocabularies[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.vocabularies
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.vocabularies)
+
+
+def load_vocabularies(path: str = VOCABULARIES_PATH) -> VocabularyRegistry:
+    """
+    Load the vocabularies from a vocabulary file. The file is only read once per process.
+
+    :param path: The path to the TSV file. Default: VOCABULARIES_PATH, the file bundled with the package.
+    :return: The vocabulary registry.
+    """
+    path = os.path.abspath(path)
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = _read_vocabularies(path=path)
+        return _registries[path]
+
+
+def _read_vocabularies(path: str) -> VocabularyRegistry:
+    """
+    Read a vocabulary file.
+
+    :param path: The path to the TSV file.
+    :return: The vocabulary registry.
+    """
+    version: Optional[str] = None
+    terms: Dict[str, List[str]] = {}
+    header: bool = True
+    with open(path, "r", encoding="utf8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.rstrip("\n")
+            if line.startswith("#"):
+                key, _, value = line[1:].partition(":")
+                if key.strip() == "version":
+                    version = value.strip()
+                continue
+            if not line.strip():
+                continue
+            if header:
+                if line.split("\t") != ["vocabulary", "code", "term"]:
+                    raise ValueError(f"The vocabulary file '{path}' must have the columns vocabulary, code and term.")
+                header = False
+                continue
+
+            name, code, term = line.split("\t")
+            vocabulary_terms: List[str] = terms.setdefault(name, [])
+            if int(code) != len(vocabulary_terms) or term in vocabulary_terms:
+                raise ValueError(f"The code of the term '{term}' of the vocabulary '{name}' on line {line_number} "
+                                 f"of '{path}' is not the next code, or the term is repeated.")
+            vocabulary_terms.append(term)
+
+    return VocabularyRegistry(version=version, vocabularies={name: Vocabulary(name=name, terms=vocabulary_terms)
+                                                             for name, vocabulary_terms in terms.items()})
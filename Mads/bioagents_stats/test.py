@@ -4,58 +4,43 @@ Used for showing plots etc.
 
 If script is to run on other machines, please be aware of the file path.
 """
-import requests
 import json
 
-from requests import Response
-
 from bioagents_statistics import calculate_general_statistics
-from bioagents_statistics import calculate_edam_term_statistics
+from bioagents_statistics import calculate_all_edam_term_statistics
+from bioagents_statistics import load_agents
+from bioagents_statistics import load_edam_index
+from bioagents_statistics.json_backend import pause_gc
+
+EDAM_OWL_PATH: str = "../../JavaVedran/bioagentsAnnotations/res/edam.owl"
 
 
 def _get_index_list(term_type: str):
     """
-    Get the index list.
+    Get the index list, built from the EDAM ontology shipped in the repository.
 
     :param term_type: The EDAM term type.
     :return: The index list.
     """
-    if term_type.capitalize() not in ["Topic", "Operation", "Format", "Data"]:
-        raise ValueError(f"The term type '{term_type}' is not valid. Must be 'Topic', 'Operation', 'Format', or"
-                         f"'Data'.")
-
-    resp: Response = requests.get(f"https://bio.agents/api/o/index_EDAM_{term_type}?format=json")
-    resp.raise_for_status()
-    index_list: dict = resp.json()["data"]
-    return index_list
+    return load_edam_index(owl_path=EDAM_OWL_PATH, term_type=term_type)
 
 
 def main():
     """
     The main entry point of the script.
     """
-    with open("Agents.json", "r") as f:
-        agents = json.load(f)
+    agents_path: str = "Agents.json"
+    # Nothing else runs in the script, so the garbage collector can be paused while the dump is decoded
+    with pause_gc():
+        agents = load_agents(agents_path)
 
     stats = calculate_general_statistics(agents=agents)
 
     # print(json.dumps(stats, indent=4))
 
-    term_stats = calculate_edam_term_statistics(agents=agents, term_type="topic", index_list=_get_index_list("topic"))
-    print(json.dumps(term_stats, indent=4))
-    print("\n" * 2)
-
-    exit()
-    term_stats = calculate_edam_term_statistics(agents=agents, term_type="operation",
-                                                index_list=_get_index_list("operation"))
-    print(json.dumps(term_stats, indent=4))
-    print("\n" * 2)
-
-    term_stats = calculate_edam_term_statistics(agents=agents, term_type="format", index_list=_get_index_list("format"))
-    print(json.dumps(term_stats, indent=4))
-    print("\n" * 2)
-
-    term_stats = calculate_edam_term_statistics(agents=agents, term_type="data", index_list=_get_index_list("data"))
+    term_stats = calculate_all_edam_term_statistics(
+        agents=agents,
+        index_lists={term_type: _get_index_list(term_type) for term_type in ("topic", "operation", "format", "data")})
     print(json.dumps(term_stats, indent=4))
 
 
@@ -0,0 +1,176 @@
+"""
+The shared fixtures of the tests: synthetic agents, a small EDAM index, an offline SPDX license list and a local
+stand-in for the bio.agents API.
+"""
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Set
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bioagents_statistics import _spdx_license_parser  # noqa: E402
+from bioagents_statistics.synthetic import generate_agents  # noqa: E402
+
+# The upper time limit including all the synthetic agents, and one in the middle of the additions
+UPPER_TIME_LIMIT: datetime = datetime(2030, 1, 1)
+MIDDLE_TIME_LIMIT: datetime = datetime(2020, 1, 1)
+
+# The roots of the term types, as in EDAM
+_ROOTS: Dict[str, str] = {"topic": "topic_0003", "operation": "operation_0004", "data": "data_0006",
+                          "format": "format_1915"}
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch, tmp_path):
+    """
+    Keep the tests off the network and out of the user cache: the SPDX license list is the bundled snapshot.
+    """
+    monkeypatch.setenv("BIOAGENTS_STATISTICS_CACHE", str(tmp_path / "cache"))
+
+    def no_network(*args, **kwargs):
+        raise requests.ConnectionError("The tests do not access the network.")
+
+    monkeypatch.setattr(_spdx_license_parser.requests, "get", no_network)
+
+
+def _index_list(term_type: str, size: int) -> dict:
+    """
+    Create the index list of a term type: a ternary tree under the root, where every seventh term has a second path
+    directly under the root.
+
+    :param term_type: The term type.
+    :param size: The number of terms besides the root.
+    :return: The index list, as load_edam_index.
+    """
+    root: str = _ROOTS[term_type]
+    index_list: dict = {root: {"name": f"{term_type} root", "path": [{"key": root}]}}
+    for number in range(1, size + 1):
+        chain: List[str] = [f"{term_type}_{number:04d}"]
+        parent: int = number
+        while parent >= 3:
+            parent //= 3
+            chain.append(f"{term_type}_{parent:04d}")
+        chain.append(root)
+        paths: List[dict] = [{"key": "||".join(reversed(chain))}]
+        if number % 7 == 0:
+            paths.append({"key": f"{root}||{chain[0]}"})
+        index_list.setdefault(chain[0], {"name": f"{term_type} {number}", "path": []})["path"].extend(paths)
+    return index_list
+
+
+@pytest.fixture(scope="session")
+def index_lists() -> Dict[str, dict]:
+    """
+    The index lists of the four term types.
+    """
+    return {term_type: _index_list(term_type=term_type, size=size)
+            for term_type, size in (("topic", 60), ("operation", 40), ("data", 30), ("format", 30))}
+
+
+def _edge_case_agents() -> List[dict]:
+    """
+    Agents with the values the synthetic agents do not have: unrecognised vocabulary values, empty values, an empty
+    agent and an agent added after the time limits.
+    """
+    return [
+        {"bioagentsID": "edge_unrecognised", "additionDate": "2016-05-01T10:00:00Z",
+         "lastUpdate": "2016-05-01T10:00:00Z",
+         "agentType": ["Spreadsheet", "Library"], "language": ["Brainfuck", ""], "license": "Proprietary",
+         "operatingSystem": ["Plan 9"], "credit": [{"name": "Someone", "typeRole": ["Oracle", "Developer"]}],
+         "link": [{"url": "u", "type": ["Carrier pigeon"]}]},
+        {"bioagentsID": "edge_empty", "additionDate": "2017-02-03T10:00:00Z", "lastUpdate": "2017-02-03T10:00:00Z",
+         "agentType": [], "topic": [], "license": "", "maturity": None, "credit": [], "function": [],
+         "community": None},
+        {"bioagentsID": "edge_spdx_name", "additionDate": "2018-07-08T10:00:00.123456Z",
+         "lastUpdate": "2018-07-08T10:00:00Z", "license": "MIT License"},
+        {"bioagentsID": "edge_future", "additionDate": "2031-01-01T10:00:00Z", "lastUpdate": "2031-01-01T10:00:00Z",
+         "agentType": ["Library"]},
+    ]
+
+
+@pytest.fixture(scope="session")
+def agents(index_lists) -> List[dict]:
+    """
+    The synthetic agents drawing their EDAM terms from the index lists, followed by the edge cases.
+    """
+    return list(generate_agents(count=400, seed=1, index_lists=index_lists)) + _edge_case_agents()
+
+
+class MockRegistry:
+    """
+    The agent list endpoint of the bio.agents API on localhost, serving the agents in pages. The agents can be
+    changed between the requests, pages can fail with a status code once (to be retried) or permanently (to
+    interrupt a download), the endpoint can be missing, and the requests are counted.
+    """
+
+    def __init__(self, agents: List[dict], page_size: int = 10):
+        self.agents: List[dict] = list(agents)
+        self.page_size: int = page_size
+        # The number of times each page fails with 503 before it is served
+        self.flaky_pages: Dict[int, int] = {}
+        # The pages failing with 400
+        self.broken_pages: Set[int] = set()
+        # Whether all the pages fail with 404, as for a wrong URL
+        self.missing: bool = False
+        self.requests: int = 0
+        self._lock = threading.Lock()
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                query: dict = parse_qs(urlparse(self.path).query)
+                status, body = registry.respond(page=int(query["page"][0]),
+                                                sort=query.get("sort", [None])[0], order=query.get("ord", [None])[0])
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                if body is not None:
+                    self.wfile.write(json.dumps(body).encode("utf8"))
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url: str = f"http://127.0.0.1:{self._server.server_port}/api/t/"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def respond(self, page: int, sort: str, order: str) -> tuple:
+        with self._lock:
+            self.requests += 1
+            if self.missing:
+                return 404, None
+            if page in self.broken_pages:
+                return 400, None
+            if self.flaky_pages.get(page, 0) > 0:
+                self.flaky_pages[page] -= 1
+                return 503, None
+            agents: List[dict] = self.agents
+            if sort == "lastUpdate":
+                agents = sorted(agents, key=lambda agent: agent["lastUpdate"], reverse=order == "desc")
+            listed: List[dict] = agents[(page - 1) * self.page_size:page * self.page_size]
+            if not listed and page > 1:
+                return 404, None
+            return 200, {"count": len(agents), "next": None, "list": listed}
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def registry(agents):
+    """
+    The stand-in for the bio.agents API, serving the first hundred synthetic agents.
+    """
+    mock = MockRegistry(agents=agents[:100])
+    yield mock
+    mock.close()
@@ -0,0 +1,38 @@
+"""
+Tests for the addition-date agent index, against the statistics of the agent list.
+"""
+from datetime import datetime
+
+import pytest
+
+from bioagents_statistics import AgentIndex, calculate_all_edam_term_statistics, calculate_general_statistics
+
+from conftest import MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT
+
+
+@pytest.fixture(scope="module")
+def index(agents) -> AgentIndex:
+    return AgentIndex(agents)
+
+
+@pytest.mark.parametrize("upper_time_limit", [datetime(2000, 1, 1), MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT])
+def test_general_statistics_equal_list(agents, index, upper_time_limit):
+    assert calculate_general_statistics(index, upper_time_limit) == \
+        calculate_general_statistics(agents, upper_time_limit)
+
+
+def test_edam_term_statistics_equal_list(agents, index, index_lists):
+    assert calculate_all_edam_term_statistics(index, index_lists, MIDDLE_TIME_LIMIT) == \
+        calculate_all_edam_term_statistics(agents, index_lists, MIDDLE_TIME_LIMIT)
+
+
+def test_agents_are_sorted_by_addition(index):
+    assert list(index.addition_epochs) == sorted(index.addition_epochs)
+    assert index.count_added_before(MIDDLE_TIME_LIMIT) == len(index.added_before(MIDDLE_TIME_LIMIT))
+    assert all(agent["additionDate"] < "2020" for agent in index.added_before(MIDDLE_TIME_LIMIT))
+
+
+def test_updated_after(agents, index):
+    expected = {agent["bioagentsID"] for agent in agents if agent.get("lastUpdate", "") > "2023-01-01T00:00:00Z"}
+
+    assert {agent["bioagentsID"] for agent in index.updated_after(datetime(2023, 1, 1))} == expected
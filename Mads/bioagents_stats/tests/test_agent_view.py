@@ -0,0 +1,41 @@
+"""
+Tests for the zero-copy agent views, against the deep clean they replace.
+"""
+from typing import Any
+
+from boltons.iterutils import remap
+
+from bioagents_statistics.agent_view import AgentView, as_agent_view
+
+
+def _plain(value: Any) -> Any:
+    """
+    Convert a view to plain dicts and lists.
+    """
+    if isinstance(value, AgentView):
+        return {key: _plain(value[key]) for key in value}
+    if isinstance(value, tuple):
+        return [_plain(nested_value) for nested_value in value]
+    return value
+
+
+def _deep_clean(agent: dict) -> dict:
+    """
+    Drop the empty values, as the statistics did before the views.
+    """
+    return remap(agent, visit=lambda path, key, value: bool(value))
+
+
+def test_view_equals_deep_clean(agents):
+    for agent in agents:
+        assert _plain(as_agent_view(agent)) == _deep_clean(agent), agent["bioagentsID"]
+
+
+def test_view_hides_empty_values():
+    agent = AgentView({"bioagentsID": "a", "topic": [], "license": "", "maturity": None,
+                       "credit": [{"name": "A", "email": None, "typeRole": []}]}, precompute_fields=True)
+
+    assert set(agent) == {"bioagentsID", "credit"}
+    assert "topic" not in agent
+    assert _plain(agent["credit"]) == [{"name": "A"}]
+    assert agent.raw["topic"] == []
@@ -0,0 +1,62 @@
+"""
+Tests for the columnar agent tables, against the statistics of the agent list.
+"""
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from bioagents_statistics import (agents_to_table, calculate_all_edam_term_statistics,  # noqa: E402
+                                  calculate_edam_term_statistics, calculate_general_statistics,
+                                  calculate_grouped_general_statistics, read_agents_parquet, write_agents_parquet)
+
+from conftest import MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def table(agents):
+    return agents_to_table(agents)
+
+
+def _id_sets(term_statistics: dict) -> dict:
+    return {term_id: dict(term, strict_ids=set(term["strict_ids"]), total_ids=set(term["total_ids"]))
+            for term_id, term in term_statistics.items()}
+
+
+@pytest.mark.parametrize("upper_time_limit", [datetime(2000, 1, 1), MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT])
+def test_general_statistics_equal_list(agents, table, upper_time_limit):
+    columnar: dict = calculate_general_statistics(table, upper_time_limit)
+    expected: dict = calculate_general_statistics(agents, upper_time_limit)
+
+    assert columnar == expected
+    assert list(columnar) == list(expected)
+
+
+@pytest.mark.parametrize("group_by", ["collectionID", "license"])
+def test_grouped_statistics_equal_list(agents, table, group_by):
+    assert (calculate_grouped_general_statistics(table, group_by, MIDDLE_TIME_LIMIT)
+            == calculate_grouped_general_statistics(agents, group_by, MIDDLE_TIME_LIMIT))
+
+
+@pytest.mark.parametrize("output_ids", [False, True])
+def test_edam_term_statistics_equal_list(agents, table, index_lists, output_ids):
+    columnar: dict = calculate_all_edam_term_statistics(table, index_lists, MIDDLE_TIME_LIMIT, output_ids=output_ids)
+    expected: dict = calculate_all_edam_term_statistics(agents, index_lists, MIDDLE_TIME_LIMIT, output_ids=output_ids)
+
+    assert list(columnar) == list(expected)
+    for term_type in index_lists:
+        assert _id_sets(columnar[term_type]) == _id_sets(expected[term_type])
+
+
+def test_single_term_type(table, index_lists):
+    statistics: dict = calculate_edam_term_statistics(table, "topic", index_lists["topic"], UPPER_TIME_LIMIT)
+
+    assert list(statistics) == ["date", "topic"]
+
+
+def test_parquet_round_trip(tmp_path, agents, table):
+    path: str = str(tmp_path / "agents.parquet")
+    write_agents_parquet(agents, path)
+
+    assert read_agents_parquet(path).equals(table)
@@ -0,0 +1,61 @@
+"""
+Tests for the compact agent records, against the agents they replace.
+"""
+import pickle
+from collections.abc import Mapping
+from typing import Any
+
+import pytest
+
+from bioagents_statistics import calculate_all_edam_term_statistics, calculate_general_statistics, compact_agents
+from bioagents_statistics.agent_view import as_agent_view
+
+from conftest import MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT
+
+
+def _plain(value: Any) -> Any:
+    """
+    Convert a record or a view to plain dicts and lists.
+    """
+    if isinstance(value, Mapping):
+        return {key: _plain(value[key]) for key in value}
+    if isinstance(value, (tuple, list)):
+        return [_plain(nested_value) for nested_value in value]
+    return value
+
+
+def test_records_equal_cleaned_agents(agents):
+    records = compact_agents(agents)
+    views = [as_agent_view(agent) for agent in agents]
+    views = [view for view in views if view]
+
+    assert len(records) == len(views)
+    for record, view in zip(records, views):
+        assert _plain(record) == _plain(view)
+        assert set(record) == set(view)
+
+
+def test_statistics_equal_list(agents, index_lists):
+    records = compact_agents(agents)
+
+    for upper_time_limit in (MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT):
+        assert calculate_general_statistics(records, upper_time_limit) == \
+            calculate_general_statistics(agents, upper_time_limit)
+    assert calculate_all_edam_term_statistics(records, index_lists, UPPER_TIME_LIMIT, output_ids=True) == \
+        calculate_all_edam_term_statistics(agents, index_lists, UPPER_TIME_LIMIT, output_ids=True)
+
+
+def test_pickle_round_trip(agents):
+    records = compact_agents(agents)
+
+    assert [_plain(record) for record in pickle.loads(pickle.dumps(records))] == [_plain(record) for record in records]
+
+
+def test_shared_terms_are_read_only(agents):
+    records = [record for record in compact_agents(agents) if "topic" in record]
+    term = records[0]["topic"][0]
+
+    with pytest.raises(TypeError):
+        term["term"] = "changed"
+    assert any(record["topic"][0] is term for record in records[1:])
+    assert _plain(pickle.loads(pickle.dumps(records[0]))) == _plain(records[0])
@@ -0,0 +1,110 @@
+"""
+Tests for the resumable download of the registry, against a local stand-in for the bio.agents API.
+"""
+import json
+import os
+
+import pytest
+import requests
+
+from bioagents_statistics import download_registry, iter_agents
+
+
+def _download(registry, output_path: str, **kwargs) -> int:
+    return download_registry(output_path=output_path, base_url=registry.url, concurrency=3, backoff=0.001, **kwargs)
+
+
+def _interrupt(registry, output_path: str, page: int) -> dict:
+    """
+    Interrupt a download at a page, and get the checkpoint.
+    """
+    registry.broken_pages.add(page)
+    with pytest.raises(requests.HTTPError):
+        _download(registry, output_path)
+    registry.broken_pages.clear()
+    with open(f"{output_path}.checkpoint.json", encoding="utf8") as f:
+        return json.load(f)
+
+
+def test_download_pages_in_order_with_retries(registry, tmp_path):
+    output_path: str = str(tmp_path / "registry.ndjson")
+    registry.flaky_pages.update({1: 1, 4: 2, 10: 1})
+
+    assert _download(registry, output_path) == 100
+    assert list(iter_agents(output_path)) == registry.agents
+    # The 10 pages and the 4 retries
+    assert registry.requests == 14
+
+
+def test_resume_after_interruption(registry, tmp_path):
+    output_path: str = str(tmp_path / "registry.ndjson")
+    checkpoint: dict = _interrupt(registry, output_path, page=6)
+    assert checkpoint["pages"] == 5 and not checkpoint["complete"]
+
+    # A torn write after the checkpoint is dropped
+    with open(output_path, "ab") as f:
+        f.write(b'{"bioagentsID": "torn", "na')
+    requests_before: int = registry.requests
+
+    assert _download(registry, output_path) == 100
+    assert list(iter_agents(output_path)) == registry.agents
+    # Only the pages after the checkpoint are fetched
+    assert registry.requests - requests_before == 5
+    # A complete download is not fetched again
+    assert _download(registry, output_path) == 100
+    assert registry.requests - requests_before == 5
+
+
+@pytest.mark.parametrize("damage", ["missing", "short"])
+def test_restart_if_output_lost(registry, tmp_path, damage):
+    output_path: str = str(tmp_path / "registry.ndjson")
+    checkpoint: dict = _interrupt(registry, output_path, page=6)
+    if damage == "missing":
+        os.remove(output_path)
+    else:
+        with open(output_path, "r+b") as f:
+            f.truncate(checkpoint["offset"] // 2)
+    requests_before: int = registry.requests
+
+    assert _download(registry, output_path) == 100
+    # The download is started again, instead of padding the output up to the checkpoint
+    with open(output_path, "rb") as f:
+        assert b"\0" not in f.read()
+    assert list(iter_agents(output_path)) == registry.agents
+    assert registry.requests - requests_before == 10
+
+
+def test_restart_if_complete_output_lost(registry, tmp_path):
+    output_path: str = str(tmp_path / "registry.ndjson")
+    _download(registry, output_path)
+    os.remove(output_path)
+
+    assert _download(registry, output_path) == 100
+    assert list(iter_agents(output_path)) == registry.agents
+
+
+def test_checkpoint_of_other_registry(registry, tmp_path):
+    output_path: str = str(tmp_path / "registry.ndjson")
+    _interrupt(registry, output_path, page=3)
+
+    with pytest.raises(ValueError):
+        download_registry(output_path=output_path, base_url=registry.url + "other/")
+
+
+def test_missing_first_page_raises(registry, tmp_path):
+    output_path: str = str(tmp_path / "registry.ndjson")
+    registry.missing = True
+
+    with pytest.raises(requests.HTTPError):
+        _download(registry, output_path)
+    # No download of 0 agents is checkpointed as complete
+    assert not os.path.exists(f"{output_path}.checkpoint.json")
+
+
+def test_registry_shrunk_during_download(registry, tmp_path):
+    output_path: str = str(tmp_path / "registry.ndjson")
+    checkpoint: dict = _interrupt(registry, output_path, page=4)
+    del registry.agents[60:]
+
+    # The pages after the last page are not found, and have no agents
+    assert _download(registry, output_path) == checkpoint["agents"] + 30
@@ -0,0 +1,121 @@
+"""
+Tests for the EDAM term index built from the ontology.
+"""
+import copy
+import pickle
+
+from bioagents_statistics import EdamTermIndex, load_edam_index
+from bioagents_statistics.edam_index import build_edam_index, get_edam_term_index
+
+_OWL: str = """<?xml version="1.0"?>
+<rdf:RDF xmlns="http://edamontology.org/" xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#" xmlns:owl="http://www.w3.org/2002/07/owl#">
+    <owl:Ontology rdf:about="http://edamontology.org"/>
+    <owl:Class rdf:about="http://edamontology.org/topic_0003"><rdfs:label>Topic</rdfs:label></owl:Class>
+    <owl:Class rdf:about="http://edamontology.org/topic_0001">
+        <rdfs:label>Biology</rdfs:label>
+        <rdfs:subClassOf rdf:resource="http://edamontology.org/topic_0003"/>
+    </owl:Class>
+    <owl:Class rdf:about="http://edamontology.org/topic_0002">
+        <rdfs:label>Chemistry</rdfs:label>
+        <rdfs:subClassOf rdf:resource="http://edamontology.org/topic_0003"/>
+    </owl:Class>
+    <owl:Class rdf:about="http://edamontology.org/topic_0004">
+        <rdfs:label>Biochemistry</rdfs:label>
+        <rdfs:subClassOf rdf:resource="http://edamontology.org/topic_0001"/>
+        <rdfs:subClassOf rdf:resource="http://edamontology.org/topic_0002"/>
+        <rdfs:subClassOf><owl:Restriction/></rdfs:subClassOf>
+    </owl:Class>
+    <owl:Class rdf:about="http://edamontology.org/topic_0005">
+        <rdfs:label>Obsolete</rdfs:label>
+        <owl:deprecated rdf:datatype="http://www.w3.org/2001/XMLSchema#boolean">true</owl:deprecated>
+        <rdfs:subClassOf rdf:resource="http://edamontology.org/topic_0001"/>
+    </owl:Class>
+    <owl:Class rdf:about="http://edamontology.org/topic_0006">
+        <rdfs:label>Orphan</rdfs:label>
+        <rdfs:subClassOf rdf:resource="http://edamontology.org/topic_0005"/>
+    </owl:Class>
+    <owl:Class rdf:about="http://edamontology.org/operation_0004"><rdfs:label>Operation</rdfs:label></owl:Class>
+    <owl:Class rdf:about="http://edamontology.org/operation_0001">
+        <rdfs:label>Alignment</rdfs:label>
+        <rdfs:subClassOf rdf:resource="http://edamontology.org/operation_0004"/>
+    </owl:Class>
+</rdf:RDF>
+"""
+
+
+def _write_owl(tmp_path) -> str:
+    path = tmp_path / "EDAM.owl"
+    path.write_text(_OWL, encoding="utf8")
+    return str(path)
+
+
+def test_build_index(tmp_path):
+    indexes: dict = build_edam_index(_write_owl(tmp_path))
+
+    assert set(indexes) == {"topic", "operation", "data", "format"}
+    assert indexes["topic"]["topic_0003"] == {"name": "Topic", "path": [{"key": "topic_0003"}]}
+    assert indexes["topic"]["topic_0001"] == {"name": "Biology", "path": [{"key": "topic_0003||topic_0001"}]}
+    assert indexes["topic"]["topic_0004"]["path"] == [{"key": "topic_0003||topic_0001||topic_0004"},
+                                                      {"key": "topic_0003||topic_0002||topic_0004"}]
+    # The deprecated terms and the terms only reachable through them are left out
+    assert "topic_0005" not in indexes["topic"]
+    assert "topic_0006" not in indexes["topic"]
+    assert list(indexes["operation"]) == ["operation_0004", "operation_0001"]
+    assert indexes["data"] == {}
+
+
+def test_load_index_uses_cache(tmp_path):
+    owl_path: str = _write_owl(tmp_path)
+    indexes: dict = load_edam_index(owl_path)
+
+    assert load_edam_index(owl_path, term_type="Topic") is indexes["topic"]
+    assert load_edam_index(owl_path, use_cache=False) == indexes == build_edam_index(owl_path)
+
+
+def test_term_index_ancestors_and_depths(index_lists):
+    index_list: dict = index_lists["topic"]
+    term_index = EdamTermIndex(index_list)
+
+    for term_id, term in index_list.items():
+        term_number: int = term_index.number(term_id)
+        branches = [path["key"].split("||") for path in term["path"]]
+        assert term_index.names[term_number] == term["name"]
+        assert term_index.depths[term_number] == min(len(branch) for branch in branches) - 1
+        ancestors = [term_index.term_ids[ancestor] for ancestor in term_index.ancestors[term_number]]
+        assert ancestors[0] == term_id
+        assert set(ancestors) == {branch_term for branch in branches for branch_term in branch}
+        assert len(ancestors) == len(set(ancestors))
+
+
+def test_term_index_interns_unknown_terms(index_lists):
+    term_index = EdamTermIndex(index_lists["topic"])
+    term_number: int = term_index.number("topic_9999")
+
+    assert term_index.number("topic_9999") == term_number == len(term_index) - 1
+    assert (term_index.names[term_number], term_index.depths[term_number]) == ("", -1)
+    assert list(term_index.ancestors[term_number]) == [term_number]
+
+    unpickled: EdamTermIndex = pickle.loads(pickle.dumps(term_index))
+    assert unpickled.term_ids == term_index.term_ids
+    assert unpickled.number("topic_9998") == len(term_index)
+
+
+def test_term_index_is_rebuilt_for_changed_index_list(index_lists):
+    index_list: dict = copy.deepcopy(index_lists["topic"])
+    term_index: EdamTermIndex = get_edam_term_index(index_list)
+    term_id: str = next(iter(index_list))
+    index_list[term_id] = dict(index_list[term_id], name="renamed")
+
+    assert get_edam_term_index(index_list).names[term_index.term_numbers[term_id]] == "renamed"
+    assert term_index.names[term_index.term_numbers[term_id]] != "renamed"
+
+
+def test_interned_terms_are_not_shared(index_lists):
+    term_index: EdamTermIndex = get_edam_term_index(index_lists["topic"])
+    term_index.number("topic_9999")
+
+    assert "topic_9999" not in get_edam_term_index(index_lists["topic"]).term_numbers
+    # An explicit term index is not changed either
+    get_edam_term_index(term_index).number("topic_9998")
+    assert "topic_9998" not in term_index.term_numbers
@@ -0,0 +1,85 @@
+"""
+Tests for the EDAM term statistics, against a straightforward calculation with ID sets.
+"""
+from collections import defaultdict
+from typing import Dict
+
+import pytest
+
+from bioagents_statistics import calculate_all_edam_term_statistics, calculate_edam_term_statistics
+from bioagents_statistics._utilities import clean_and_filter_agent_list
+from bioagents_statistics.edam_stats import _extract_edam_terms
+
+from conftest import MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT
+
+
+def _reference(agents, term_type: str, index_list: dict, upper_time_limit) -> Dict[str, dict]:
+    """
+    Calculate the term statistics with the ID sets of each term and the paths of the index list.
+    """
+    strict_ids, total_ids = defaultdict(set), defaultdict(set)
+    for agent in clean_and_filter_agent_list(raw_agents=agents, upper_time_limit=upper_time_limit):
+        for term in _extract_edam_terms(agent)[term_type]:
+            term_id: str = term["uri"].replace("http://edamontology.org/", "")
+            strict_ids[term_id].add(agent["bioagentsID"])
+            total_ids[term_id].add(agent["bioagentsID"])
+            for path in index_list.get(term_id, {"path": []})["path"]:
+                for branch_term in path["key"].split("||"):
+                    total_ids[branch_term].add(agent["bioagentsID"])
+
+    statistics: Dict[str, dict] = {}
+    for term_id, ids in total_ids.items():
+        term: dict = index_list.get(term_id, {"name": "", "path": []})
+        statistics[term_id] = {
+            "name": term["name"],
+            "depth": min(len(path["key"].split("||")) for path in term["path"]) - 1 if term["path"] else -1,
+            "strict_ids": sorted(strict_ids[term_id]), "total_ids": sorted(ids),
+            "strict_count": len(strict_ids[term_id]), "total_count": len(ids)}
+    return statistics
+
+
+def _sorted_ids(term_statistics: dict) -> dict:
+    return {term_id: dict(term, strict_ids=sorted(term["strict_ids"]), total_ids=sorted(term["total_ids"]))
+            for term_id, term in term_statistics.items()}
+
+
+@pytest.mark.parametrize("term_type", ["topic", "operation", "format", "data"])
+@pytest.mark.parametrize("upper_time_limit", [MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT])
+def test_statistics_equal_reference(agents, index_lists, term_type, upper_time_limit):
+    statistics: dict = calculate_edam_term_statistics(agents, term_type, index_lists[term_type], upper_time_limit,
+                                                      output_ids=True)
+
+    assert list(statistics) == ["date", term_type]
+    assert _sorted_ids(statistics[term_type]) == _reference(agents, term_type, index_lists[term_type],
+                                                            upper_time_limit)
+
+
+def test_ids_are_in_agent_order(agents, index_lists):
+    statistics: dict = calculate_edam_term_statistics(agents, "topic", index_lists["topic"], UPPER_TIME_LIMIT,
+                                                      output_ids=True)
+    order: Dict[str, int] = {agent["bioagentsID"]: position for position, agent in enumerate(agents)}
+
+    for term in statistics["topic"].values():
+        assert term["total_ids"] == sorted(term["total_ids"], key=order.get)
+
+
+def test_statistics_without_ids(agents, index_lists):
+    statistics: dict = calculate_edam_term_statistics(agents, "topic", index_lists["topic"], UPPER_TIME_LIMIT)
+
+    assert all(term["strict_ids"] == term["total_ids"] == [] for term in statistics["topic"].values())
+    assert statistics["topic"]["topic_0003"]["total_count"] == sum(1 for agent in agents if agent.get("topic"))
+
+
+@pytest.mark.parametrize("output_ids", [False, True])
+def test_all_term_types_equal_each_term_type(agents, index_lists, output_ids):
+    statistics: dict = calculate_all_edam_term_statistics(agents, index_lists, UPPER_TIME_LIMIT, output_ids=output_ids)
+
+    assert list(statistics) == ["date", "topic", "operation", "format", "data"]
+    for term_type, index_list in index_lists.items():
+        assert calculate_edam_term_statistics(agents, term_type, index_list, UPPER_TIME_LIMIT,
+                                              output_ids=output_ids)[term_type] == statistics[term_type]
+
+
+def test_unknown_term_type(agents, index_lists):
+    with pytest.raises(ValueError):
+        calculate_all_edam_term_statistics(agents, {"topics": index_lists["topic"]}, UPPER_TIME_LIMIT)
@@ -0,0 +1,71 @@
+"""
+Tests for the inverted facet indexes, against filtering the agent list.
+"""
+import gzip
+
+import pytest
+
+from bioagents_statistics import AgentIndex, FacetIndex, calculate_general_statistics
+
+from conftest import UPPER_TIME_LIMIT
+
+
+@pytest.fixture(scope="module")
+def facet_index(agents, index_lists) -> FacetIndex:
+    return FacetIndex(agents, index_lists=index_lists)
+
+
+def _descendants(index_list: dict, term_id: str) -> set:
+    return {other_id for other_id, term in index_list.items()
+            if any(term_id in path["key"].split("||") for path in term["path"])}
+
+
+def test_query_equals_filtered_list(agents, index_lists, facet_index):
+    topics: set = _descendants(index_lists["topic"], "topic_0001")
+    expected = [agent for agent in agents
+                if any(term["uri"].split("/")[-1] in topics for term in agent.get("topic") or [])
+                and "Library" in (agent.get("agentType") or [])]
+    sliced = facet_index.select(facet_index.query(topic="topic_0001", agentType=["Library"]))
+
+    assert sorted(agent["bioagentsID"] for agent in sliced) == sorted(agent["bioagentsID"] for agent in expected)
+    assert calculate_general_statistics(sliced, UPPER_TIME_LIMIT) == \
+        calculate_general_statistics(expected, UPPER_TIME_LIMIT)
+
+
+def test_rows_does_not_share_the_index(facet_index):
+    rows = facet_index.rows("agentType", "Library")
+    expected: list = list(rows)
+    rows.add(len(facet_index) + 10)
+    rows.discard(expected[0])
+
+    assert list(facet_index.rows("agentType", "Library")) == expected
+
+
+def test_ids_are_case_insensitive(facet_index):
+    rows = facet_index.ids(["Synthetic_Agent_3", " synthetic_agent_5 ", "unknown"])
+
+    assert sorted(agent["bioagentsID"] for agent in facet_index.select(rows)) == ["synthetic_agent_3",
+                                                                                  "synthetic_agent_5"]
+
+
+def test_save_and_load(tmp_path, agents, facet_index):
+    path: str = str(tmp_path / "facets.json.gz")
+    facet_index.save(path)
+    loaded: FacetIndex = FacetIndex.load(path, AgentIndex(agents))
+
+    assert loaded.facets == facet_index.facets
+    with pytest.raises(ValueError):
+        FacetIndex.load(path, agents[:-1])
+
+
+def test_rare_values_are_saved_compactly(tmp_path):
+    # Each credit name is used by a single agent, where a full bitmap would take a bit for every agent
+    agents = [{"bioagentsID": f"agent_{number}", "additionDate": "2020-01-01T00:00:00Z",
+               "credit": [{"name": f"Person {number}"}]} for number in range(5000)]
+    path: str = str(tmp_path / "facets.json.gz")
+    FacetIndex(agents).save(path)
+    loaded: FacetIndex = FacetIndex.load(path, agents)
+
+    with gzip.open(path, "rb") as f:
+        assert len(f.read()) < 30 * len(agents)
+    assert list(loaded.rows("credit", "Person 4999")) == [4999]
@@ -0,0 +1,119 @@
+"""
+Tests for the incremental statistics, against the statistics recalculated from all the agents.
+"""
+import copy
+import random
+from typing import Dict, List
+
+import pytest
+
+from bioagents_statistics import IncrementalStatistics
+
+from conftest import UPPER_TIME_LIMIT
+
+
+class _Snapshot:
+    """
+    The agents in the order of a snapshot: an updated agent keeps its position, an added agent is appended.
+    """
+
+    def __init__(self, agents: List[dict]):
+        self.agents: Dict[str, dict] = {agent["bioagentsID"]: agent for agent in agents}
+
+    def add(self, agent: dict) -> None:
+        self.agents[agent["bioagentsID"]] = agent
+
+    def update(self, agent: dict) -> dict:
+        previous: dict = self.agents[agent["bioagentsID"]]
+        self.agents[agent["bioagentsID"]] = agent
+        return previous
+
+    def remove(self, agent_id: str) -> dict:
+        return self.agents.pop(agent_id)
+
+    def __iter__(self):
+        return iter(list(self.agents.values()))
+
+
+def _changed(agent: dict, rng: random.Random, agents: List[dict]) -> dict:
+    """
+    Change an agent: take the annotations of another agent, and drop some fields.
+    """
+    changed: dict = copy.deepcopy(agent)
+    other: dict = rng.choice(agents)
+    for field in ("topic", "function", "language", "license", "agentType", "maturity", "link"):
+        if rng.random() < 0.5:
+            if field in other:
+                changed[field] = copy.deepcopy(other[field])
+            else:
+                changed.pop(field, None)
+    return changed
+
+
+@pytest.mark.parametrize("output_ids", [False, True])
+def test_random_changes_equal_recalculation(agents, index_lists, output_ids):
+    rng = random.Random(3)
+    snapshot = _Snapshot(agents[:200])
+    statistics = IncrementalStatistics(agents=snapshot, index_lists=index_lists, upper_time_limit=UPPER_TIME_LIMIT,
+                                       output_ids=output_ids)
+    pool: List[dict] = list(agents[200:])
+
+    for step in range(300):
+        action: float = rng.random()
+        if action < 0.3 and pool:
+            agent: dict = pool.pop()
+            snapshot.add(agent)
+            statistics.add(agent)
+        elif action < 0.7:
+            agent = rng.choice(list(snapshot))
+            new_agent: dict = _changed(agent=agent, rng=rng, agents=agents)
+            statistics.update(old_agent=snapshot.update(new_agent), new_agent=new_agent)
+        else:
+            agent = rng.choice(list(snapshot))
+            statistics.remove(snapshot.remove(agent["bioagentsID"]))
+            # Some of the removed agents are added again later
+            pool.insert(0, agent)
+        if step % 50 == 0:
+            assert statistics.verify(snapshot) == []
+
+    assert statistics.verify(snapshot) == []
+
+
+def test_removed_agent_added_again_is_last(agents, index_lists):
+    snapshot = _Snapshot(agents[:50])
+    statistics = IncrementalStatistics(agents=snapshot, index_lists=index_lists, upper_time_limit=UPPER_TIME_LIMIT,
+                                       output_ids=True)
+
+    agent: dict = snapshot.remove(agents[3]["bioagentsID"])
+    statistics.remove(agent)
+    snapshot.add(agent)
+    statistics.add(agent)
+
+    # The IDs are in the order of the snapshot, where the agent is now the last one
+    assert statistics.verify(snapshot) == []
+    topic_statistics: dict = statistics.edam_term_statistics()["topic"]
+    assert any(term["total_ids"][-1] == agent["bioagentsID"]
+               for term in topic_statistics.values() if agent["bioagentsID"] in term["total_ids"])
+
+
+def test_removed_rows_are_reclaimed(agents, index_lists):
+    snapshot = _Snapshot(agents[:100])
+    statistics = IncrementalStatistics(agents=snapshot, index_lists=index_lists, upper_time_limit=UPPER_TIME_LIMIT,
+                                       output_ids=True)
+
+    for cycle in range(5):
+        for agent in list(snapshot)[:80]:
+            statistics.remove(snapshot.remove(agent["bioagentsID"]))
+            snapshot.add(agent)
+            statistics.add(agent)
+        edam = statistics.edam_accumulator
+        # The row space stays within twice the number of agents
+        assert len(edam.agent_ids) <= 2 * len(edam.agent_rows) + 1
+        assert statistics.verify(snapshot) == []
+
+
+def test_apply_invalid_change(agents):
+    statistics = IncrementalStatistics(agents=agents[:10], upper_time_limit=UPPER_TIME_LIMIT)
+
+    with pytest.raises(ValueError):
+        statistics.apply_changes([{"change": "renamed", "agent": agents[0], "previous": agents[0]}])
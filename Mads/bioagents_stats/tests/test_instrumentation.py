@@ -0,0 +1,55 @@
+"""
+Tests for the instrumentation: the active instrumentation of nested with blocks and of other threads.
+"""
+import threading
+from typing import List, Optional
+
+from bioagents_statistics import Instrumentation, calculate_general_statistics
+from bioagents_statistics.instrumentation import get_active_instrumentation, stage
+
+from conftest import UPPER_TIME_LIMIT
+
+
+def test_nested_instrumentations():
+    outer, inner = Instrumentation(), Instrumentation()
+
+    assert get_active_instrumentation() is None
+    with outer:
+        with inner:
+            assert get_active_instrumentation() is inner
+            with stage("inner stage", items=3):
+                pass
+        assert get_active_instrumentation() is outer
+        with stage("outer stage"):
+            pass
+    assert get_active_instrumentation() is None
+
+    assert set(inner.report()["stages"]) == {"inner stage"}
+    assert inner.report()["stages"]["inner stage"]["items"] == 3
+    assert set(outer.report()["stages"]) == {"outer stage"}
+
+
+def test_other_thread_is_not_instrumented(agents):
+    seen: List[Optional[Instrumentation]] = []
+
+    def calculate() -> None:
+        seen.append(get_active_instrumentation())
+        calculate_general_statistics(agents[:50], UPPER_TIME_LIMIT)
+
+    with Instrumentation() as instrumentation:
+        thread = threading.Thread(target=calculate)
+        thread.start()
+        thread.join()
+        assert get_active_instrumentation() is instrumentation
+
+    assert seen == [None]
+    assert instrumentation.report() == {"stages": {}, "facets": {}}
+
+
+def test_instrumentation_measures_statistics(agents):
+    with Instrumentation(track_memory=True) as instrumentation:
+        calculate_general_statistics(agents[:50], UPPER_TIME_LIMIT)
+
+    report: dict = instrumentation.report()
+    assert report["stages"] and report["facets"]
+    assert all(metrics["calls"] >= 1 for metrics in report["facets"].values())
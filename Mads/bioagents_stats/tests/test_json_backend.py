@@ -0,0 +1,93 @@
+"""
+Tests for the JSON backends: the decoded dumps of each installed backend, and the choice of the backend.
+"""
+import gc
+import gzip
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from bioagents_statistics import get_json_backend, load_agents, set_json_backend
+from bioagents_statistics.json_backend import (JSON_BACKEND_VARIABLE, available_json_backends, is_utf8, load_json,
+                                               pause_gc)
+
+# The directory of the package, for importing it in a subprocess
+PACKAGE_DIRECTORY: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def restore_backend():
+    backend: str = get_json_backend()
+    yield
+    set_json_backend(backend)
+
+
+@pytest.mark.parametrize("backend", available_json_backends())
+@pytest.mark.parametrize("name", ["agents.json", "agents.json.gz", "agents.ndjson"])
+def test_backend_equals_json(tmp_path, agents, restore_backend, backend, name):
+    path: str = str(tmp_path / name)
+    with (gzip.open if name.endswith(".gz") else open)(path, "wt", encoding="utf8") as f:
+        if name.endswith(".ndjson"):
+            f.write("\n".join(json.dumps(agent, ensure_ascii=False) for agent in agents) + "\n")
+        else:
+            json.dump(agents, f, ensure_ascii=False)
+    with (gzip.open if name.endswith(".gz") else open)(path, "rt", encoding="utf8") as f:
+        expected: list = ([json.loads(line) for line in f] if name.endswith(".ndjson") else json.load(f))
+
+    assert set_json_backend(backend) == backend
+    assert load_agents(path) == expected
+
+
+def test_loading_does_not_pause_gc(tmp_path, agents, monkeypatch):
+    path = tmp_path / "agents.json"
+    path.write_text(json.dumps(agents[:10]), encoding="utf8")
+
+    def disable():
+        raise AssertionError("The garbage collector is paused by the package.")
+
+    monkeypatch.setattr(gc, "disable", disable)
+    assert load_agents(str(path)) == agents[:10]
+
+
+def test_nested_pauses_of_gc():
+    assert gc.isenabled()
+    with pause_gc():
+        with pause_gc():
+            assert not gc.isenabled()
+        assert not gc.isenabled()
+    assert gc.isenabled()
+
+
+@pytest.mark.parametrize("encoding,expected", [("utf8", True), ("UTF-8", True), ("utf_8", True), ("latin-1", False)])
+def test_is_utf8(encoding, expected):
+    assert is_utf8(encoding) is expected
+
+
+def test_empty_file(tmp_path, restore_backend):
+    path = tmp_path / "empty.json"
+    path.write_bytes(b"")
+    set_json_backend("json")
+
+    with pytest.raises(ValueError):
+        load_json(str(path))
+
+
+def test_unknown_backend_raises(restore_backend):
+    with pytest.raises(ValueError):
+        set_json_backend("unknown")
+    assert get_json_backend() in available_json_backends()
+
+
+@pytest.mark.parametrize("backend", ["unknown", "simdjson"])
+def test_bad_environment_variable_falls_back_to_json(backend):
+    if backend in available_json_backends():
+        pytest.skip(f"{backend} is installed")
+    environment: dict = dict(os.environ, PYTHONPATH=PACKAGE_DIRECTORY, **{JSON_BACKEND_VARIABLE: backend})
+    process = subprocess.run([sys.executable, "-c", "import bioagents_statistics as s; print(s.get_json_backend())"],
+                             env=environment, capture_output=True, text=True, check=True)
+
+    assert process.stdout.strip() == "json"
+    assert JSON_BACKEND_VARIABLE in process.stderr
@@ -0,0 +1,60 @@
+"""
+Tests for the parallel statistics, against the serial statistics.
+"""
+import json
+import pickle
+from datetime import datetime
+
+import pytest
+
+from bioagents_statistics import (calculate_all_edam_term_statistics, calculate_all_edam_term_statistics_parallel,
+                                  calculate_general_statistics, calculate_general_statistics_parallel)
+from bioagents_statistics._accumulators import accumulate
+from bioagents_statistics._utilities import clean_and_filter_agent_list
+from bioagents_statistics.edam_stats import EdamTermsAccumulator
+from bioagents_statistics.stats import create_general_accumulators
+
+from conftest import MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT
+
+
+@pytest.mark.parametrize("workers, shard_size", [(1, 2000), (2, 37), (3, 1)])
+def test_general_statistics_equal_serial(agents, workers, shard_size):
+    parallel: dict = calculate_general_statistics_parallel(agents, UPPER_TIME_LIMIT, workers=workers,
+                                                           shard_size=shard_size)
+
+    # Bit-for-bit, including the order of the keys and of the unrecognised values
+    assert json.dumps(parallel) == json.dumps(calculate_general_statistics(agents, UPPER_TIME_LIMIT))
+
+
+@pytest.mark.parametrize("output_ids", [False, True])
+def test_edam_term_statistics_equal_serial(agents, index_lists, output_ids):
+    parallel: dict = calculate_all_edam_term_statistics_parallel(agents, index_lists, MIDDLE_TIME_LIMIT,
+                                                                 output_ids=output_ids, workers=2, shard_size=53)
+    serial: dict = calculate_all_edam_term_statistics(agents, index_lists, MIDDLE_TIME_LIMIT, output_ids=output_ids)
+
+    assert json.dumps(parallel) == json.dumps(serial)
+
+
+def test_partial_results_are_compact(agents, index_lists):
+    cleaned: list = clean_and_filter_agent_list(raw_agents=agents, upper_time_limit=UPPER_TIME_LIMIT)
+    accumulators: list = accumulate(agents=cleaned, accumulators=create_general_accumulators()
+                                    + [EdamTermsAccumulator(index_lists=index_lists, output_ids=True)])
+    payload: bytes = pickle.dumps([accumulator.partial() for accumulator in accumulators])
+
+    # Only the counts, row sets and IDs are sent back from the workers, not the shared data
+    assert b"EdamTermIndex" not in payload
+    assert b"LicensesData" not in payload
+    assert b"Accumulator" not in payload
+
+
+def test_invalid_arguments(agents):
+    with pytest.raises(ValueError):
+        calculate_general_statistics_parallel(agents, UPPER_TIME_LIMIT, workers=0)
+    with pytest.raises(ValueError):
+        calculate_general_statistics_parallel(agents, UPPER_TIME_LIMIT, workers=2, shard_size=0)
+
+
+def test_default_time_limit_is_the_time_of_the_call(agents):
+    before: str = datetime.today().isoformat(timespec="seconds")
+
+    assert calculate_general_statistics_parallel(agents[:20], workers=1)["date"] >= before
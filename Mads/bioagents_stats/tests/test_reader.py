@@ -0,0 +1,43 @@
+"""
+Tests for the streaming reader of the dumps.
+"""
+import gzip
+import json
+
+import pytest
+
+from bioagents_statistics import calculate_general_statistics, iter_agents
+
+from conftest import UPPER_TIME_LIMIT
+
+
+def _write(path, content: str) -> str:
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "wt", encoding="utf8") as f:
+        f.write(content)
+    return str(path)
+
+
+@pytest.mark.parametrize("name,indent", [("agents.json", None), ("agents.json", 4), ("agents.json.gz", None)])
+def test_json_array(tmp_path, agents, name, indent):
+    path: str = _write(tmp_path / name, json.dumps(agents, indent=indent, ensure_ascii=False))
+
+    assert list(iter_agents(path)) == agents
+
+
+@pytest.mark.parametrize("name", ["agents.ndjson", "agents.jsonl.gz"])
+def test_ndjson(tmp_path, agents, name):
+    path: str = _write(tmp_path / name, "\n".join(json.dumps(agent) for agent in agents) + "\n\n")
+
+    assert list(iter_agents(path)) == agents
+
+
+def test_empty_array(tmp_path):
+    assert list(iter_agents(_write(tmp_path / "agents.json", " [ ] "))) == []
+
+
+def test_statistics_of_stream_equal_list(tmp_path, agents):
+    path: str = _write(tmp_path / "agents.json", json.dumps(agents))
+
+    assert calculate_general_statistics(iter_agents(path), UPPER_TIME_LIMIT) == \
+        calculate_general_statistics(agents, UPPER_TIME_LIMIT)
@@ -0,0 +1,73 @@
+"""
+Tests for the row sets, against Python sets.
+"""
+import random
+
+import pytest
+
+from bioagents_statistics._row_sets import RowSet
+
+
+@pytest.mark.parametrize("seed,high", [(0, 100), (1, 5000), (2, 200000)])
+def test_random_operations_equal_set(seed, high):
+    rng = random.Random(seed)
+    rows, expected = RowSet(), set()
+    for _ in range(3000):
+        row: int = rng.randrange(high)
+        if rng.random() < 0.7:
+            rows.add(row)
+            expected.add(row)
+        else:
+            rows.discard(row)
+            expected.discard(row)
+        assert row in rows if row in expected else row not in rows
+        assert len(rows) == len(expected)
+
+    assert list(rows) == sorted(expected)
+    assert len(rows) == len(expected)
+    assert bool(rows) == bool(expected)
+
+
+def test_dense_rows_switch_to_bitmap_and_back():
+    rows = RowSet(range(1000))
+    assert rows.is_bitmap
+
+    for row in range(1000):
+        if row % 100:
+            rows.discard(row)
+    assert not rows.is_bitmap
+    assert list(rows) == list(range(0, 1000, 100))
+
+
+def test_count_of_bitmap_with_repeated_rows():
+    rows = RowSet(range(0, 2000, 2))
+    assert rows.is_bitmap
+    for row in (10, 10, 11, 11, 5000, 5000):
+        rows.add(row)
+    for row in (12, 12, 13, -1, 10 ** 6):
+        rows.discard(row)
+    copied = rows.copy()
+    copied.discard(0)
+
+    assert len(rows) == len(list(rows)) == 1000 + 2 - 1
+    assert len(copied) == len(rows) - 1
+    assert len(RowSet.from_bitmap(rows.to_bitmap())) == len(rows)
+
+
+@pytest.mark.parametrize("first,second", [(range(0, 3000, 2), range(0, 3000, 3)), (range(0, 3000, 2), [5, 6, 2999]),
+                                          ([1, 2, 3], [2, 3, 4]), ([], range(100))])
+def test_set_operations(first, second):
+    first_rows, second_rows = RowSet(first), RowSet(second)
+
+    assert list(first_rows & second_rows) == sorted(set(first) & set(second))
+    assert list(first_rows | second_rows) == sorted(set(first) | set(second))
+    assert list(first_rows - second_rows) == sorted(set(first) - set(second))
+    assert list(second_rows - first_rows) == sorted(set(second) - set(first))
+
+
+def test_bitmap_round_trip():
+    rows = RowSet([0, 9, 17, 64, 1000])
+
+    assert RowSet.from_bitmap(rows.to_bitmap(size=200)) == rows
+    assert RowSet.from_sorted_rows([0, 9, 17, 64, 1000]) == rows
+    assert list(RowSet.range(10)) == list(range(10))
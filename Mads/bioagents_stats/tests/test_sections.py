@@ -0,0 +1,114 @@
+"""
+Tests for the selection of sections and fields of the general statistics, and for the lazy general statistics.
+"""
+import pytest
+
+from bioagents_statistics import LazyGeneralStatistics, calculate_general_statistics, stats as stats_module
+from bioagents_statistics._accumulators import UNRECOGNISED_KEY, Accumulator
+
+from conftest import UPPER_TIME_LIMIT
+
+
+@pytest.fixture(scope="module")
+def full(agents) -> dict:
+    return calculate_general_statistics(agents, UPPER_TIME_LIMIT)
+
+
+@pytest.fixture
+def no_license_list(monkeypatch):
+    """
+    Fail on loading the SPDX license list.
+    """
+    def parse_license_list(*args, **kwargs):
+        raise AssertionError("The SPDX license list is loaded.")
+
+    monkeypatch.setattr(stats_module, "parse_license_list", parse_license_list)
+
+
+class _CountAccumulator(Accumulator):
+    """
+    Accumulator which does not declare its statistics keys, as registered by a user of the package.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, agent: dict) -> None:
+        self.count += 1
+
+    def result(self) -> dict:
+        return {"customCount": self.count}
+
+
+@pytest.fixture
+def undeclared(monkeypatch):
+    """
+    Register an undeclared accumulator, with a factory which is not a class.
+    """
+    monkeypatch.setattr(stats_module, "_GENERAL_ACCUMULATORS",
+                        stats_module._GENERAL_ACCUMULATORS + [lambda: _CountAccumulator()])
+
+
+def test_sections_equal_full_statistics(agents, full, no_license_list):
+    stats: dict = calculate_general_statistics(agents, UPPER_TIME_LIMIT, sections=["languages", "agentTypes"])
+
+    assert list(stats) == ["date", "agentTypes", "languages", UNRECOGNISED_KEY]
+    assert stats["languages"] == full["languages"] and stats["agentTypes"] == full["agentTypes"]
+    assert stats[UNRECOGNISED_KEY] == {key: full[UNRECOGNISED_KEY][key] for key in ("agentTypes", "languages")}
+
+
+def test_fields_equal_full_statistics(agents, full, no_license_list):
+    stats: dict = calculate_general_statistics(agents, UPPER_TIME_LIMIT, fields=["language"])
+
+    assert list(stats) == ["date", "hasLanguage", "languageCount", "languages", UNRECOGNISED_KEY]
+    assert all(stats[key] == full[key] for key in stats if key != UNRECOGNISED_KEY)
+    assert stats[UNRECOGNISED_KEY] == {"languages": full[UNRECOGNISED_KEY]["languages"]}
+
+
+def test_license_sections(agents, full):
+    stats: dict = calculate_general_statistics(agents, UPPER_TIME_LIMIT, sections=["licenses"])
+
+    assert stats == {"date": full["date"], "licenses": full["licenses"]}
+
+
+@pytest.mark.parametrize("sections,fields", [(["unknown"], None), (None, ["unknown"]),
+                                             (["languages", "unknown"], ["language"])])
+def test_unknown_sections_and_fields(agents, sections, fields):
+    with pytest.raises(ValueError):
+        calculate_general_statistics(agents, UPPER_TIME_LIMIT, sections=sections, fields=fields)
+
+
+def test_unknown_sections_with_undeclared_accumulator(agents, undeclared):
+    with pytest.raises(ValueError):
+        calculate_general_statistics(agents, UPPER_TIME_LIMIT, sections=["unknown"])
+    # The undeclared accumulator is always calculated
+    assert calculate_general_statistics(agents, UPPER_TIME_LIMIT, fields=["language"])["customCount"] == len(agents) - 1
+
+
+def test_lazy_statistics_equal_full_statistics(agents, full, no_license_list):
+    lazy = LazyGeneralStatistics(agents, UPPER_TIME_LIMIT)
+
+    assert lazy["languages"] == full["languages"]
+    assert "licenses" in lazy and "unknown" not in lazy
+    with pytest.raises(KeyError):
+        lazy["unknown"]
+    assert "licenses" not in lazy.stats
+
+
+def test_lazy_statistics_unrecognised_values(agents, full):
+    lazy = LazyGeneralStatistics(agents, UPPER_TIME_LIMIT)
+    lazy.calculate("agentTypes")
+
+    assert UNRECOGNISED_KEY in lazy
+    assert lazy[UNRECOGNISED_KEY] == full[UNRECOGNISED_KEY]
+    assert dict(lazy) == lazy.to_dict() == full
+    assert list(lazy) == list(full)
+
+
+def test_lazy_statistics_with_undeclared_accumulator(agents, undeclared):
+    lazy = LazyGeneralStatistics(agents, UPPER_TIME_LIMIT)
+
+    assert "customCount" in lazy
+    assert lazy["customCount"] == len(agents) - 1
+    assert "licenses" not in lazy.stats
+    assert dict(lazy) == calculate_general_statistics(agents, UPPER_TIME_LIMIT)
@@ -0,0 +1,113 @@
+"""
+Tests for the snapshot archive: the round trip of the snapshots, and the differences of the statistics against the
+statistics of the full snapshots.
+"""
+import copy
+import random
+from typing import Dict, List
+
+import pytest
+
+from bioagents_statistics import (SnapshotArchive, calculate_all_edam_term_statistics,
+                                  calculate_general_statistics)
+from bioagents_statistics.snapshot_archive import _subtract
+
+from conftest import UPPER_TIME_LIMIT
+
+
+@pytest.fixture(scope="module")
+def snapshots(agents) -> Dict[str, List[dict]]:
+    """
+    Three monthly snapshots: the second with deleted, updated and added agents, the third with one more deletion.
+    """
+    rng = random.Random(5)
+    first: Dict[str, dict] = {agent["bioagentsID"]: agent for agent in agents}
+    second: Dict[str, dict] = dict(first)
+    for agent_id in rng.sample(sorted(second), 20):
+        del second[agent_id]
+    for agent_id in rng.sample(sorted(second), 30):
+        # Another agent, so that the agent is updated
+        others: List[dict] = [agent for agent in agents if agent["bioagentsID"] != agent_id]
+        second[agent_id] = dict(copy.deepcopy(rng.choice(others)), bioagentsID=agent_id)
+    for number in range(15):
+        second[f"added_{number}"] = dict(copy.deepcopy(rng.choice(agents)), bioagentsID=f"added_{number}")
+    third: Dict[str, dict] = dict(second)
+    del third[next(iter(third))]
+    return {"January": list(first.values()), "February": list(second.values()), "March": list(third.values())}
+
+
+@pytest.fixture
+def archive_path(tmp_path, snapshots) -> str:
+    path: str = str(tmp_path / "archive.sqlite")
+    with SnapshotArchive(path) as archive:
+        assert archive.add_snapshot("January", snapshots["January"]) == {"added": len(snapshots["January"]),
+                                                                         "updated": 0, "deleted": 0}
+        assert archive.add_snapshot("February", snapshots["February"]) == {"added": 15, "updated": 30, "deleted": 20}
+        assert archive.add_snapshot("March", snapshots["March"], base=True) == {"added": 0, "updated": 0,
+                                                                                "deleted": 1}
+    return path
+
+
+def test_round_trip(archive_path, snapshots):
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.names() == ["January", "February", "March"]
+        for name, agents in snapshots.items():
+            snapshot = archive.snapshot(name)
+            assert len(snapshot) == len(agents)
+            # The updated agents keep their positions, and the added agents are appended
+            assert list(snapshot) == agents
+            assert snapshot.get(agents[7]["bioagentsID"]) == agents[7]
+        assert archive.snapshot("February").get(snapshots["January"][0]["bioagentsID"]) is not None
+        assert archive.snapshot("March").get("unknown") is None
+
+
+def test_statistics_of_snapshot(archive_path, snapshots):
+    with SnapshotArchive(archive_path) as archive:
+        assert (calculate_general_statistics(archive.snapshot("February"), UPPER_TIME_LIMIT)
+                == calculate_general_statistics(snapshots["February"], UPPER_TIME_LIMIT))
+
+
+def _without_zero_unrecognised(stats: dict) -> dict:
+    """
+    Drop the unrecognised values which occur in neither snapshot's changes, as their difference is zero.
+    """
+    stats = dict(stats)
+    unrecognised: dict = {key: {value: count for value, count in counts.items() if count}
+                          for key, counts in stats.pop("unrecognisedValues", {}).items()}
+    stats["unrecognisedValues"] = {key: counts for key, counts in unrecognised.items() if counts}
+    return stats
+
+
+@pytest.mark.parametrize("old_name,new_name", [("January", "February"), ("January", "March"), ("March", "January")])
+def test_diff_equals_difference_of_statistics(archive_path, snapshots, index_lists, old_name, new_name):
+    with SnapshotArchive(archive_path) as archive:
+        diff: dict = archive.diff_statistics(old_name, new_name, index_lists=index_lists,
+                                             upper_time_limit=UPPER_TIME_LIMIT)
+
+    old_stats: dict = calculate_general_statistics(snapshots[old_name], UPPER_TIME_LIMIT)
+    new_stats: dict = calculate_general_statistics(snapshots[new_name], UPPER_TIME_LIMIT)
+    del old_stats["date"], new_stats["date"]
+    assert (_without_zero_unrecognised(diff["general"])
+            == _without_zero_unrecognised(_subtract(new=new_stats, old=old_stats)))
+
+    old_terms: dict = calculate_all_edam_term_statistics(snapshots[old_name], index_lists, UPPER_TIME_LIMIT)
+    new_terms: dict = calculate_all_edam_term_statistics(snapshots[new_name], index_lists, UPPER_TIME_LIMIT)
+    for term_type in index_lists:
+        expected: dict = {}
+        for term_id in old_terms[term_type].keys() | new_terms[term_type].keys():
+            strict_count: int = (new_terms[term_type].get(term_id, {}).get("strict_count", 0)
+                                 - old_terms[term_type].get(term_id, {}).get("strict_count", 0))
+            total_count: int = (new_terms[term_type].get(term_id, {}).get("total_count", 0)
+                                - old_terms[term_type].get(term_id, {}).get("total_count", 0))
+            if strict_count or total_count:
+                expected[term_id] = (strict_count, total_count)
+        assert {term_id: (term["strict_count"], term["total_count"])
+                for term_id, term in diff["edam"][term_type].items()} == expected
+
+
+def test_invalid_names(archive_path, snapshots):
+    with SnapshotArchive(archive_path) as archive:
+        with pytest.raises(ValueError):
+            archive.add_snapshot("March", snapshots["March"])
+        with pytest.raises(KeyError):
+            archive.snapshot("April")
@@ -0,0 +1,67 @@
+"""
+Tests for the cached and memoised SPDX license list.
+"""
+import json
+import os
+import time
+
+import pytest
+
+from bioagents_statistics import _spdx_license_parser
+from bioagents_statistics._spdx_license_parser import parse_license_list
+from bioagents_statistics._utilities import get_cache_directory
+
+
+@pytest.fixture(autouse=True)
+def no_memo(monkeypatch):
+    monkeypatch.setattr(_spdx_license_parser, "_licenses_data", None)
+    monkeypatch.setattr(_spdx_license_parser, "_licenses_fetched", 0.0)
+
+
+def _write_cache(license_id: str, age: float):
+    data: dict = {"licenses": [{"licenseId": license_id, "name": license_id, "isOsiApproved": True}]}
+    with open(os.path.join(get_cache_directory(), _spdx_license_parser._CACHE_FILE_NAME), "w") as f:
+        json.dump({"fetched": time.time() - age, "etag": None, "last_modified": None, "data": data}, f)
+
+
+def test_bundled_snapshot_without_network_or_cache():
+    licenses = parse_license_list()
+
+    assert "MIT" in licenses.license_ids
+    assert "MIT" in licenses.osi_approved_set
+
+
+def test_memo_is_used_within_ttl():
+    _write_cache("First", age=0)
+    assert parse_license_list().licenses_list == ["First"]
+
+    _write_cache("Second", age=0)
+    assert parse_license_list().licenses_list == ["First"]
+    assert parse_license_list(offline=True).licenses_list == ["First"]
+
+
+def test_refresh_bypasses_memo():
+    _write_cache("First", age=0)
+    parse_license_list()
+    _write_cache("Second", age=0)
+
+    assert parse_license_list(refresh=True).licenses_list == ["Second"]
+    assert parse_license_list().licenses_list == ["Second"]
+
+
+def test_shorter_ttl_reloads_old_memo():
+    _write_cache("First", age=100)
+    assert parse_license_list(ttl=1000).licenses_list == ["First"]
+    _write_cache("Second", age=0)
+
+    assert parse_license_list(ttl=1000).licenses_list == ["First"]
+    assert parse_license_list(ttl=50).licenses_list == ["Second"]
+
+
+def test_failed_revalidation_is_not_retried_within_ttl(monkeypatch):
+    _write_cache("Stale", age=1000)
+    assert parse_license_list(ttl=10).licenses_list == ["Stale"]
+
+    _write_cache("Fresh", age=1000)
+    monkeypatch.setattr(_spdx_license_parser, "_load_license_list", lambda ttl, offline: pytest.fail("reloaded"))
+    assert parse_license_list(ttl=10).licenses_list == ["Stale"]
@@ -0,0 +1,101 @@
+"""
+Tests for the general statistics and the accumulator engine.
+"""
+from typing import List
+
+import pytest
+
+from bioagents_statistics import calculate_general_statistics, calculate_grouped_general_statistics
+from bioagents_statistics._accumulators import UNRECOGNISED_KEY, accumulate, collect_results, merge_accumulators
+from bioagents_statistics._utilities import clean_and_filter_agent_list
+from bioagents_statistics.stats import create_general_accumulators
+
+from conftest import MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT
+
+
+def _results(accumulators) -> dict:
+    return collect_results(accumulators=accumulators)
+
+
+def test_counts_of_small_agent_list():
+    agents: List[dict] = [
+        {"bioagentsID": "a", "additionDate": "2016-01-01T00:00:00Z", "agentType": ["Library", "Command-line tool"],
+         "license": "MIT", "language": ["Python"], "credit": [{"name": "A", "typeRole": ["Developer"]}]},
+        {"bioagentsID": "b", "additionDate": "2017-01-01T00:00:00Z", "agentType": ["Library"], "license": "",
+         "language": [], "credit": []},
+        {"bioagentsID": "c", "additionDate": "2035-01-01T00:00:00Z", "agentType": ["Library"]},
+    ]
+    stats: dict = calculate_general_statistics(agents, UPPER_TIME_LIMIT)
+
+    assert stats["date"] == UPPER_TIME_LIMIT.isoformat(timespec="seconds")
+    assert stats["agentCount"] == 2
+    assert stats["hasAgentType"] == 2
+    assert stats["agentTypeCount"] == 3
+    assert stats["agentTypes"]["Library"] == 2
+    assert stats["hasLicense"] == 1
+    assert stats["licenses"]["MIT"] == 1
+    assert stats["licenses"]["OSIApproved"] == 1
+    assert stats["hasLanguage"] == 1
+    assert stats["languages"]["Python"] == 1
+    assert stats["hasCredit"] == 1
+    assert stats["creditRoleTypes"]["Developer"] == 1
+    assert stats["hasTopic"] == 0
+
+
+def test_unrecognised_values_are_reported(agents):
+    stats: dict = calculate_general_statistics(agents, UPPER_TIME_LIMIT)
+
+    assert list(stats)[-1] == UNRECOGNISED_KEY
+    assert stats[UNRECOGNISED_KEY]["agentTypes"] == {"Spreadsheet": 1}
+    assert stats[UNRECOGNISED_KEY]["creditRoleTypes"] == {"Oracle": 1}
+    assert "Spreadsheet" not in stats["agentTypes"]
+
+
+def test_time_limit_filters_agents(agents):
+    early: dict = calculate_general_statistics(agents, MIDDLE_TIME_LIMIT)
+    late: dict = calculate_general_statistics(agents, UPPER_TIME_LIMIT)
+
+    assert 0 < early["agentCount"] < late["agentCount"] == len(agents) - 1
+
+
+def test_remove_inverts_add(agents):
+    cleaned: list = clean_and_filter_agent_list(raw_agents=agents, upper_time_limit=UPPER_TIME_LIMIT)
+    removed = accumulate(agents=cleaned, accumulators=create_general_accumulators())
+    for agent in cleaned[::2]:
+        for accumulator in removed:
+            accumulator.remove(agent)
+    expected = accumulate(agents=cleaned[1::2], accumulators=create_general_accumulators())
+
+    assert _results(removed) == _results(expected)
+
+
+def test_merge_equals_single_pass(agents):
+    cleaned: list = clean_and_filter_agent_list(raw_agents=agents, upper_time_limit=UPPER_TIME_LIMIT)
+    first = accumulate(agents=cleaned[:150], accumulators=create_general_accumulators())
+    second = accumulate(agents=cleaned[150:], accumulators=create_general_accumulators())
+    merged = merge_accumulators(accumulators=first, others=second)
+    expected = accumulate(agents=cleaned, accumulators=create_general_accumulators())
+
+    assert _results(merged) == _results(expected)
+
+
+@pytest.mark.parametrize("group_by", ["collectionID", "license"])
+def test_grouped_statistics_equal_each_group(agents, group_by):
+    grouped: dict = calculate_grouped_general_statistics(agents, group_by, MIDDLE_TIME_LIMIT)
+    values = {value for agent in agents for value in _values(agent, group_by)}
+
+    assert grouped["total"] == calculate_general_statistics(agents, MIDDLE_TIME_LIMIT)
+    assert set(grouped["groups"]) <= values
+    assert list(grouped["groups"]) == sorted(grouped["groups"])
+    for value in values:
+        group = [agent for agent in agents if value in _values(agent, group_by)]
+        expected: dict = calculate_general_statistics(group, MIDDLE_TIME_LIMIT)
+        if expected["agentCount"]:
+            assert grouped["groups"][value] == expected, value
+        else:
+            assert value not in grouped["groups"]
+
+
+def _values(agent: dict, field: str) -> list:
+    value = agent.get(field)
+    return [item for item in (value if isinstance(value, list) else [value]) if item]
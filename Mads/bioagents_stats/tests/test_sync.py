@@ -0,0 +1,179 @@
+"""
+Tests for the incremental sync of the snapshot, against a local stand-in for the bio.agents API.
+"""
+import copy
+from typing import Dict, List, Optional
+
+import pytest
+import requests
+
+from bioagents_statistics import SnapshotStore, sync, sync_registry
+from bioagents_statistics.sync import iter_changes
+
+
+@pytest.fixture
+def paths(tmp_path) -> Dict[str, str]:
+    return {"store_path": str(tmp_path / "snapshot.sqlite"), "change_log_path": str(tmp_path / "changes.ndjson")}
+
+
+def _sync(registry, paths: Dict[str, str], reconcile_interval: Optional[float] = None) -> dict:
+    return sync_registry(base_url=registry.url, backoff=0.001, reconcile_interval=reconcile_interval, **paths)
+
+
+def _new_agent(registry, agent_id: str, last_update: str) -> dict:
+    agent: dict = copy.deepcopy(registry.agents[0])
+    agent.update(bioagentsID=agent_id, name=agent_id, lastUpdate=last_update)
+    return agent
+
+
+def _snapshot(paths: Dict[str, str]) -> Dict[str, dict]:
+    with SnapshotStore(paths["store_path"]) as store:
+        return {agent["bioagentsID"]: agent for agent in store}
+
+
+def _replay(paths: Dict[str, str]) -> Dict[str, dict]:
+    """
+    Rebuild the snapshot from the change log alone.
+    """
+    agents: Dict[str, dict] = {}
+    for change in iter_changes(paths["change_log_path"]):
+        if change["change"] == "deleted":
+            assert agents.pop(change["bioagentsID"]) == change["previous"]
+        else:
+            assert agents.get(change["bioagentsID"]) == change["previous"]
+            agents[change["bioagentsID"]] = change["agent"]
+    return agents
+
+
+def _registry(registry) -> Dict[str, dict]:
+    return {agent["bioagentsID"]: agent for agent in registry.agents}
+
+
+def test_first_sync_downloads_registry(registry, paths):
+    registry.flaky_pages[3] = 1
+
+    summary: dict = _sync(registry, paths)
+
+    assert (summary["agents"], summary["pages"], summary["added"]) == (100, -1, 100)
+    with SnapshotStore(paths["store_path"]) as store:
+        assert list(store) == registry.agents
+        assert store.last_reconciliation == summary["date"]
+    assert _replay(paths) == _registry(registry)
+
+
+def test_incremental_update(registry, paths):
+    _sync(registry, paths)
+    updated: dict = dict(registry.agents[40], name="Renamed", lastUpdate="2030-01-01T00:00:00Z")
+    registry.agents[40] = updated
+    registry.agents.append(_new_agent(registry, "added", "2030-01-02T00:00:00Z"))
+    requests_before: int = registry.requests
+
+    summary: dict = _sync(registry, paths)
+
+    assert (summary["added"], summary["updated"], summary["deleted"]) == (1, 1, 0)
+    # Only the first page of the newest agents is fetched
+    assert summary["pages"] == 1 and registry.requests - requests_before == 1
+    assert _snapshot(paths) == _registry(registry)
+    assert _replay(paths) == _registry(registry)
+
+    # Nothing changed since
+    summary = _sync(registry, paths)
+    assert (summary["pages"], summary["added"], summary["updated"], summary["deleted"]) == (1, 0, 0, 0)
+
+
+def test_deletion(registry, paths):
+    _sync(registry, paths)
+    deleted: dict = registry.agents.pop(17)
+
+    summary: dict = _sync(registry, paths)
+
+    assert (summary["added"], summary["updated"], summary["deleted"]) == (0, 0, 1)
+    assert deleted["bioagentsID"] not in _snapshot(paths)
+    assert _snapshot(paths) == _registry(registry)
+    assert _replay(paths) == _registry(registry)
+
+
+def test_addition_and_deletion_in_same_window(registry, paths):
+    _sync(registry, paths)
+    # The size of the registry does not change
+    registry.agents.pop(5)
+    registry.agents.append(_new_agent(registry, "added", "2030-01-02T00:00:00Z"))
+
+    summary: dict = _sync(registry, paths)
+
+    assert (summary["agents"], summary["added"], summary["updated"], summary["deleted"]) == (100, 1, 0, 1)
+    assert _snapshot(paths) == _registry(registry)
+    assert _replay(paths) == _registry(registry)
+
+
+def test_periodic_reconciliation(registry, paths):
+    _sync(registry, paths)
+    # An agent re-added with an old lastUpdate replaces a deleted agent, so neither the sizes nor the sorted list show
+    # the changes
+    deleted: dict = registry.agents.pop(5)
+    registry.agents.append(_new_agent(registry, "restored", "2001-01-01T00:00:00Z"))
+
+    assert _sync(registry, paths)["pages"] == 1
+    assert deleted["bioagentsID"] in _snapshot(paths)
+
+    summary: dict = _sync(registry, paths, reconcile_interval=0)
+    assert (summary["added"], summary["deleted"], summary["pages"]) == (1, 1, -1)
+    assert _snapshot(paths) == _registry(registry)
+    assert _replay(paths) == _registry(registry)
+
+
+@pytest.mark.parametrize("full", [False, True])
+@pytest.mark.parametrize("listing", ["missing", "empty"])
+def test_failed_listing_deletes_nothing(registry, paths, full, listing):
+    _sync(registry, paths)
+    snapshot: Dict[str, dict] = _snapshot(paths)
+    with open(paths["change_log_path"], "rb") as f:
+        change_log: bytes = f.read()
+    if listing == "missing":
+        registry.missing = True
+    else:
+        registry.agents = []
+
+    with pytest.raises(requests.HTTPError if listing == "missing" else ValueError):
+        sync_registry(base_url=registry.url, backoff=0.001, reconcile_interval=0, full=full, **paths)
+
+    assert _snapshot(paths) == snapshot
+    with open(paths["change_log_path"], "rb") as f:
+        assert f.read() == change_log
+
+
+def test_change_log_not_written_without_commit(registry, paths, monkeypatch):
+    _sync(registry, paths)
+    registry.agents.pop(0)
+
+    append_changes = sync._append_changes
+    disk_full: List[bool] = [True]
+
+    def append_or_fail(*args, **kwargs):
+        if disk_full[0]:
+            raise OSError("The disk is full.")
+        append_changes(*args, **kwargs)
+
+    # If the change log cannot be written, the snapshot is not changed, so the next sync finds the changes again
+    monkeypatch.setattr(sync, "_append_changes", append_or_fail)
+    with pytest.raises(OSError):
+        _sync(registry, paths)
+    assert len(_snapshot(paths)) == 100
+
+    disk_full[0] = False
+
+    summary: dict = _sync(registry, paths)
+    assert summary["deleted"] == 1
+    assert _replay(paths) == _registry(registry)
+
+
+def test_replay_of_all_changes(registry, paths):
+    for step in range(3):
+        registry.agents.pop(10 * step)
+        registry.agents.append(_new_agent(registry, f"added_{step}", f"2030-01-0{step + 1}T00:00:00Z"))
+        registry.agents[20] = dict(registry.agents[20], version=[str(step)],
+                                   lastUpdate=f"2030-01-0{step + 1}T12:00:00Z")
+        _sync(registry, paths)
+
+    assert _snapshot(paths) == _registry(registry)
+    assert _replay(paths) == _registry(registry)
@@ -0,0 +1,51 @@
+"""
+Tests for the term statistics file: the round trip of the term statistics with the IDs.
+"""
+import pytest
+
+from bioagents_statistics import (TermStatisticsReader, calculate_all_edam_term_statistics,
+                                  write_edam_term_statistics, write_term_statistics)
+
+from conftest import MIDDLE_TIME_LIMIT, UPPER_TIME_LIMIT
+
+
+@pytest.fixture(scope="module")
+def statistics(agents, index_lists) -> dict:
+    return calculate_all_edam_term_statistics(agents, index_lists, UPPER_TIME_LIMIT, output_ids=True)
+
+
+def test_write_edam_term_statistics_round_trip(tmp_path, agents, index_lists, statistics):
+    path: str = str(tmp_path / "terms.bat")
+    assert (write_edam_term_statistics(path, agents, index_lists, UPPER_TIME_LIMIT)
+            == calculate_all_edam_term_statistics(agents, index_lists, UPPER_TIME_LIMIT))
+
+    with TermStatisticsReader(path) as reader:
+        assert reader.to_dict() == statistics
+        assert sorted(reader.term_types) == sorted(index_lists)
+        for term_type in index_lists:
+            assert reader.terms(term_type) == {term_id: {key: term[key] for key in ("name", "depth", "strict_count",
+                                                                                     "total_count")}
+                                               for term_id, term in statistics[term_type].items()}
+            for term_id, term in statistics[term_type].items():
+                assert reader.ids(term_type, term_id) == term["total_ids"]
+                assert reader.ids(term_type, term_id, strict=True) == term["strict_ids"]
+
+
+def test_write_term_statistics_round_trip(tmp_path, agents, index_lists):
+    # Fewer agents, so the ID lists of the terms do not all share one order
+    statistics: dict = calculate_all_edam_term_statistics(agents, index_lists, MIDDLE_TIME_LIMIT, output_ids=True)
+    path: str = str(tmp_path / "terms.bat")
+    write_term_statistics(path, statistics)
+
+    with TermStatisticsReader(path) as reader:
+        assert reader.to_dict() == statistics
+        with pytest.raises(KeyError):
+            reader.rows("topic", "unknown")
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / "terms.json"
+    path.write_text("{}", encoding="utf8")
+
+    with pytest.raises(ValueError):
+        TermStatisticsReader(str(path))
@@ -0,0 +1,43 @@
+"""
+Tests for the statistics over time, against the statistics for each cut-off date.
+"""
+from datetime import datetime
+
+import pytest
+
+from bioagents_statistics import (AgentIndex, calculate_all_edam_term_statistics, calculate_general_statistics,
+                                  calculate_statistics_over_time)
+from bioagents_statistics.time_stats import get_cut_off_dates
+
+
+def test_statistics_equal_each_date(agents, index_lists):
+    dates = [datetime(2016, 1, 1), datetime(2019, 6, 1), datetime(2019, 6, 1), datetime(2030, 1, 1)]
+    sweep = calculate_statistics_over_time(agents, dates=dates, index_lists=index_lists)
+
+    assert [statistics["date"] for statistics in sweep] == [date.isoformat(timespec="seconds") for date in dates]
+    for date, statistics in zip(dates, sweep):
+        assert statistics["general"] == calculate_general_statistics(agents, date)
+        edam: dict = calculate_all_edam_term_statistics(agents, index_lists, date)
+        assert statistics["edam"] == {term_type: {"date": edam["date"], term_type: edam[term_type]}
+                                      for term_type in index_lists}
+
+
+def test_frequency_covers_all_agents(agents):
+    sweep = calculate_statistics_over_time(agents, frequency="yearly", general=True)
+
+    assert sweep[-1]["general"]["agentCount"] == len(agents)
+    assert [statistics["general"]["agentCount"] for statistics in sweep] == \
+        sorted(statistics["general"]["agentCount"] for statistics in sweep)
+
+
+def test_dates_or_frequency_required(agents):
+    with pytest.raises(ValueError):
+        calculate_statistics_over_time(agents)
+
+
+def test_cut_off_dates_are_naive_utc():
+    agents = [{"bioagentsID": "first", "additionDate": "2019-12-31T23:30:00+00:00"},
+              {"bioagentsID": "last", "additionDate": "2020-03-01T01:00:00-05:00"}]
+
+    assert get_cut_off_dates(index=AgentIndex(agents), frequency="monthly") == \
+        [datetime(2020, 1, 1), datetime(2020, 2, 1), datetime(2020, 3, 1), datetime(2020, 4, 1)]
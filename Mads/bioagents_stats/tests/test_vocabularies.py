@@ -0,0 +1,77 @@
+"""
+Tests for the vocabulary registry and the counting of the facet values by their integer codes.
+"""
+import pytest
+
+from bioagents_statistics import _accumulators, load_vocabularies
+from bioagents_statistics._accumulators import UNRECOGNISED_KEY, FacetAccumulator
+from bioagents_statistics.stats import TOOL_TYPES, VOCABULARIES
+
+
+def test_bundled_vocabularies():
+    registry = load_vocabularies()
+
+    assert registry is VOCABULARIES
+    assert registry.version == "1"
+    assert "agentType" in registry and "unknown" not in registry
+    agent_types = registry["agentType"]
+    assert agent_types.terms == TOOL_TYPES
+    assert [agent_types.code(term) for term in agent_types] == list(range(len(agent_types)))
+    assert agent_types.code("unknown") is None
+
+
+def test_vocabulary_file(tmp_path):
+    path = tmp_path / "vocabularies.tsv"
+    path.write_text("# version: 7\nvocabulary\tcode\tterm\ncolour\t0\tred\ncolour\t1\tgreen\nshape\t0\tcircle\n",
+                    encoding="utf8")
+
+    registry = load_vocabularies(str(path))
+    assert registry.version == "7"
+    assert list(registry) == ["colour", "shape"]
+    assert registry["colour"].terms == ["red", "green"]
+    # The file is only read once
+    assert load_vocabularies(str(path)) is registry
+
+
+@pytest.mark.parametrize("content", ["vocabulary\tterm\ncolour\tred\n",
+                                     "vocabulary\tcode\tterm\ncolour\t0\tred\ncolour\t2\tgreen\n",
+                                     "vocabulary\tcode\tterm\ncolour\t0\tred\ncolour\t1\tred\n"])
+def test_invalid_vocabulary_file(tmp_path, content):
+    path = tmp_path / "vocabularies.tsv"
+    path.write_text(content, encoding="utf8")
+
+    with pytest.raises(ValueError):
+        load_vocabularies(str(path))
+
+
+def _accumulator() -> FacetAccumulator:
+    return FacetAccumulator(field="colour", has_key="hasColour", types_key="colours", vocabulary=["red", "green"])
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+def test_codes_equal_values(monkeypatch, with_numpy):
+    if not with_numpy:
+        monkeypatch.setattr(_accumulators, "np", None)
+    elif _accumulators.np is None:
+        pytest.skip("NumPy is not installed")
+    values = ["green", "blue", "red", "green", "blue", "green"]
+    by_values, by_codes = _accumulator(), _accumulator()
+
+    for value in values:
+        by_values.add({"colour": [value]})
+    codes = by_codes.encode(values)
+    assert codes == [1, 2, 0, 1, 2, 1]
+    by_codes.add_codes(_accumulators.np.asarray(codes) if with_numpy else codes)
+
+    assert by_codes.counts == by_values.counts == [1, 3, 2]
+    assert by_values.result() == {"hasColour": 6, "colours": {"red": 1, "green": 3},
+                                  UNRECOGNISED_KEY: {"colours": {"blue": 2}}}
+
+
+def test_unrecognised_values_are_removed():
+    accumulator = _accumulator()
+    accumulator.add({"colour": ["red", "blue"]})
+    accumulator.remove({"colour": ["red", "blue"]})
+
+    assert accumulator.unrecognised_counts == {}
+    assert accumulator.result() == {"hasColour": 0, "colours": {"red": 0, "green": 0}}
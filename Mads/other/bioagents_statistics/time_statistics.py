@@ -5,28 +5,29 @@ Functions to calculate different time-dependent statistics.
 
 from collections import defaultdict
 import datetime
-import pandas as pd
 
 
 def calculate_total_entries_over_time(agents: list):
     """
     Calculate the total entries over time.
 
+    The addition dates are sorted once, and the count for each day continues from the count of the previous day.
+
     :param agents: The raw list of agents.
     :return: The statistics dictionary.
     """
 
     agent_time: dict = {agent["bioagentsID"]: datetime.date.fromisoformat(agent["additionDate"].split("T")[0])
                        for agent in agents}
-
-    agent_time_df: pd.DataFrame = pd.DataFrame.from_dict(data=agent_time, orient="index")
-    agent_time_df = agent_time_df.reset_index()
-    agent_time_df.columns = ["ID", "AdditionDate"]
+    addition_dates: list = sorted(agent_time.values())
 
     stats_dict: defaultdict = defaultdict(lambda: {"count": 0})
 
-    for date in _daterange(start_date=min(agent_time_df["AdditionDate"]), end_date=max(agent_time_df["AdditionDate"])):
-        stats_dict[date] = len(agent_time_df[(agent_time_df["AdditionDate"] <= date)])
+    count: int = 0
+    for date in _daterange(start_date=addition_dates[0], end_date=addition_dates[-1]):
+        while count < len(addition_dates) and addition_dates[count] <= date:
+            count += 1
+        stats_dict[date] = count
 
     return stats_dict
 
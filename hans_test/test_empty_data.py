@@ -1,17 +1,17 @@
-import json, re
-from boltons.iterutils import remap
+import json, re, os, sys
 from collections import defaultdict
 import operator
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Mads', 'bioagents_stats'))
+from bioagents_statistics import AgentView, load_agents
+
 
 def read_local_agents():
-    with open('../RScriptVeit/bio.agentsFullDump.json') as f:
-      return json.load(f)
+    return load_agents('../RScriptVeit/bio.agentsFullDump.json')
 
 
 def clean_agents_list(agents_list):
-    drop_false = lambda path, key, value: bool(value)
-    return [remap(agent, visit=drop_false) for agent in agents_list]
+    return (AgentView(agent) for agent in agents_list)
 
 def has_data_with_format(agent): 
     for f in agent.get('function',[]):